@@ -6,6 +6,7 @@ import os
 import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
+from instrumentation import timer, incr
 
 # Load API credentials from .env file
 load_dotenv()
@@ -13,11 +14,12 @@ load_dotenv()
 APP_ID = os.getenv("ADZUNA_ID")
 API_KEY = os.getenv("ADZUNA_API_KEY")
 COUNTRY = "gb"
+ADZUNA_API_URL = os.getenv("ADZUNA_API_URL", "https://api.adzuna.com/v1/api/jobs")
 SLEEP_TIME = 0.25
 
 
 def fetch_job_listings(app_id, app_key, search_query, location, page=1, results_per_page=50, country='gb'):
-    base_url = f"https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
+    base_url = f"{ADZUNA_API_URL}/{country}/search/{page}"
     params = {
         'app_id': app_id,
         'app_key': app_key,
@@ -25,7 +27,9 @@ def fetch_job_listings(app_id, app_key, search_query, location, page=1, results_
         'where': location,
         'results_per_page': results_per_page
     }
-    response = requests.get(base_url, params=params)
+    with timer("http_request", service="adzuna"):
+        response = requests.get(base_url, params=params)
+    incr("http_responses", service="adzuna", status=response.status_code)
     if response.status_code == 200:
         return response.json()
     else:
@@ -70,7 +74,8 @@ def get_adzuna_jobs(query, location, total_results=200, results_per_page=50):
             if not jobs:
                 break
             all_jobs.extend(jobs)
-            time.sleep(SLEEP_TIME)
+            with timer("rate_limit_sleep", service="adzuna"):
+                time.sleep(SLEEP_TIME)
         else:
             break
 
@@ -29,28 +29,20 @@ st.title("🤖 Chat with your PostgreSQL Data")
 user_question = st.text_input("Ask a question about jobs, locations, or salaries:")
 
 # ---- QUERY LLM FOR SQL ----
-from llama_cpp import Llama
+# The model is served by the shared inference server (python llm_server.py)
+from uuid import uuid4
+from llm_client import stream_completion
 
-# Load the model once
-@st.cache_resource
-def load_model():
-    return Llama(
-        model_path=r"C:\data_analytics\00ProyectoFinalDA\models\mistral-7b-instruct-v0.1.Q2_K.gguf",  # 🔁 Your actual path
-        n_ctx=2048,
-        n_threads=8,  # Set to number of CPU threads you want to use
-        verbose=False
-    )
-
-llm = load_model()
-
-def get_sql_from_gpt(question):
-    system_prompt = """
+client_id = st.session_state.setdefault("llm_client_id", f"app-{uuid4().hex[:8]}")
+
+SYSTEM_PROMPT = """
 You are a helpful assistant that writes safe PostgreSQL SQL queries.
 The database has these tables:
 
-1. jobs (job_id, title, description, salary_min, salary_max, location_id, company_id, created)
-2. locations (location_id, location_name, latitude, longitude)
-3. uk_countries (globalid, geometry)
+1. jobs (job_id, title, description_hash, salary_min, salary_max, location_id, company_id, created)
+2. descriptions (description_hash, description) -- join on description_hash only when the description text is needed
+3. locations (location_id, location_name, latitude, longitude)
+4. uk_countries (globalid, geometry)
 
 Rules:
 - Use table aliases.
@@ -58,10 +50,18 @@ Rules:
 - Never use INSERT, UPDATE or DELETE.
 """
 
-    full_prompt = f"[INST] {system_prompt}\n\nUser: {question} [/INST]"
+# Static part of the prompt, kept evaluated by the server and restored for every question
+PROMPT_PREFIX = f"[INST] {SYSTEM_PROMPT}\n\nUser: "
+
+def get_sql_from_gpt(question, placeholder=None):
+    full_prompt = PROMPT_PREFIX + f"{question} [/INST]"
 
-    response = llm(full_prompt, stop=["</s>"], max_tokens=512)
-    return response["choices"][0]["text"].strip()
+    sql = ""
+    for piece in stream_completion(full_prompt, prefix=PROMPT_PREFIX, client=client_id, stop=["</s>"], max_tokens=512):
+        sql += piece
+        if placeholder is not None:
+            placeholder.code(sql, language="sql")
+    return sql.strip()
 
 
 
@@ -69,8 +69,9 @@ Rules:
 if user_question:
     with st.spinner("🔍 Asking ChatGPT..."):
         try:
-            sql = get_sql_from_gpt(user_question)
-            st.code(sql, language="sql")
+            sql_placeholder = st.empty()
+            sql = get_sql_from_gpt(user_question, placeholder=sql_placeholder)
+            sql_placeholder.code(sql, language="sql")
 
             df = pd.read_sql(sql, con=engine)
             st.success("✅ Query successful!")
@@ -0,0 +1,124 @@
+"""
+Benchmarks company-name resolution throughput and match quality at employer-table scale.
+
+Reference employers are synthetic names built from the words of real company names in
+EDA/jobs_with_levels.csv. The query batch mixes re-spellings of known employers (legal suffix, case,
+spacing, punctuation, a one-letter typo) with unseen employers. Reported: index build time, names
+resolved per second, candidate pairs compared (vs all pairs), recall on re-spellings and the
+false-match rate on unseen names.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_company_resolver --employers 10000 50000 --queries 20000
+"""
+import json
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+
+from company_resolver import normalize_company_names, build_name_index, candidate_pairs, match_names
+
+SEED_CSV = "EDA/jobs_with_levels.csv"
+SUFFIXES = ["", " Ltd", " Limited", " LTD.", " PLC", " Inc.", " Limited.", " LLP"]
+
+
+def _words(seed_csv=SEED_CSV):
+    names = pd.read_csv(seed_csv, usecols=["company"])["company"].dropna().unique()
+    words = {w for name in normalize_company_names(pd.Series(names)) for w in name.split() if len(w) > 2}
+    return sorted(words)
+
+
+def _employer(rng, words):
+    return " ".join(rng.sample(words, rng.choice([1, 2, 2, 3]))).title()
+
+
+def _respell(rng, name):
+    variant = name + rng.choice(SUFFIXES)
+    change = rng.randrange(4)
+    if change == 0:
+        variant = variant.upper()
+    elif change == 1:
+        variant = "  " + variant.replace(" ", "  ") + " "
+    elif change == 2:
+        variant = variant.replace(" ", "-", 1) + "."
+    elif len(name) > 12:  # one-letter typo, only in longer names where it is still recognisable
+        i = rng.randrange(1, len(name) - 1)
+        variant = name[:i] + name[i + 1:] + rng.choice(SUFFIXES)
+    return variant
+
+
+def run_size(n_employers, n_queries, words, seed=42):
+    rng = random.Random(seed)
+    employers = {}
+    while len(employers) < n_employers:
+        employers.setdefault(_employer(rng, words))
+    employers = list(employers)
+    known = set(employers)
+
+    queries, truth = [], []
+    for i in range(n_queries):
+        if i % 2 == 0:
+            target = rng.randrange(len(employers))
+            queries.append(_respell(rng, employers[target]))
+            truth.append(target)
+        else:
+            name = _employer(rng, words) + " " + rng.choice(words).title()
+            while name in known:
+                name = _employer(rng, words) + " " + rng.choice(words).title()
+            queries.append(name)
+            truth.append(-1)
+    truth = np.array(truth)
+
+    start = time.perf_counter()
+    reference = normalize_company_names(pd.Series(employers))
+    index = build_name_index(reference)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalized = normalize_company_names(pd.Series(queries))
+    matches = match_names(index, normalized)
+    match_s = time.perf_counter() - start
+
+    query_rows, _ = candidate_pairs(index, normalized)
+    ref = matches["ref"].to_numpy()
+    # Employers whose normalized names coincide count as the same employer
+    ref_names = reference.to_numpy()
+    same = np.array([r >= 0 and t >= 0 and ref_names[r] == ref_names[t] for r, t in zip(ref, truth)])
+    respelled = truth >= 0
+
+    result = {
+        "employers": len(employers),
+        "queries": n_queries,
+        "build_s": build_s,
+        "match_s": match_s,
+        "names_per_s": n_queries / match_s,
+        "candidate_pairs": int(len(query_rows)),
+        "all_pairs": len(employers) * n_queries,
+        "recall": float(same[respelled].mean()),
+        "wrong_employer": float(((ref >= 0) & ~same)[respelled].mean()),
+        "false_match_rate": float((ref[~respelled] >= 0).mean()),
+    }
+    print(f"⏱️ {result['employers']:>7} employers | build {build_s:5.2f}s | {result['names_per_s']:8.0f} names/s | "
+          f"{result['candidate_pairs'] / n_queries:6.1f} candidates/name (of {len(employers)}) | "
+          f"recall {result['recall']:.1%} | wrong {result['wrong_employer']:.1%} | false matches {result['false_match_rate']:.1%}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employers", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--output", default="tmp_outputs/bench_company_resolver.json")
+    args = parser.parse_args()
+
+    words = _words()
+    results = [run_size(n, args.queries, words) for n in args.employers]
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
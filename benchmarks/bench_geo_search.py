@@ -0,0 +1,95 @@
+"""
+Benchmarks the geo_search spatial index against a brute-force haversine scan.
+
+Synthetic locations are scattered around the geocoded locations in EDA/jobs_with_levels.csv
+(so they cluster around towns like the real table). For random query points the benchmark times
+radius, k-nearest and bounding-box lookups on the index and a full haversine scan over every
+location, and checks both return the same locations.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_geo_search --locations 1000000 --queries 200
+"""
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from geo_search import build_geo_index, locations_within_radius, nearest_locations, locations_in_bbox, EARTH_RADIUS_KM
+
+SEED_CSV = "EDA/jobs_with_levels.csv"
+
+
+def synthetic_locations(n_locations, seed_csv=SEED_CSV, seed=42):
+    rng = np.random.default_rng(seed)
+    centres = pd.read_csv(seed_csv, usecols=["latitude", "longitude"]).dropna().to_numpy(dtype=float)
+    picks = centres[rng.integers(0, len(centres), n_locations)]
+    coords = picks + rng.normal(scale=[0.15, 0.25], size=(n_locations, 2))
+    return pd.DataFrame({
+        "location_id": np.arange(1, n_locations + 1),
+        "location_name": "synthetic",
+        "latitude": coords[:, 0],
+        "longitude": coords[:, 1],
+    }), centres
+
+
+def haversine_scan(coords, latitude, longitude):
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--locations", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, default=30)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", default="tmp_outputs/bench_geo_search.json")
+    args = parser.parse_args()
+
+    locations, centres = synthetic_locations(args.locations)
+    index, build_ms = timed(build_geo_index, locations)
+    print(f"🗂️ Index over {len(locations)} locations built in {build_ms / 1000:.2f}s")
+
+    rng = np.random.default_rng(7)
+    points = centres[rng.integers(0, len(centres), args.queries)] + rng.normal(scale=0.05, size=(args.queries, 2))
+    coords = index["coords"]
+    timings = {"radius": [], "knn": [], "bbox": [], "scan": []}
+    mismatches = 0
+
+    for latitude, longitude in points:
+        radius, ms = timed(locations_within_radius, index, latitude, longitude, args.radius_km)
+        timings["radius"].append(ms)
+        _, ms = timed(nearest_locations, index, latitude, longitude, args.k)
+        timings["knn"].append(ms)
+        _, ms = timed(locations_in_bbox, index, latitude - 0.25, longitude - 0.4, latitude + 0.25, longitude + 0.4)
+        timings["bbox"].append(ms)
+
+        distances, ms = timed(haversine_scan, coords, latitude, longitude)
+        timings["scan"].append(ms)
+        expected = set(index["location_ids"][distances <= args.radius_km])
+        mismatches += expected != set(radius["location_id"])
+
+    summary = {
+        name: {"median_ms": float(np.median(values)), "p95_ms": float(np.percentile(values, 95))}
+        for name, values in timings.items()
+    }
+    for name, stats in summary.items():
+        print(f"⏱️ {name:<6} median {stats['median_ms']:7.2f} ms | p95 {stats['p95_ms']:7.2f} ms")
+    print(f"✅ Radius results identical to the full scan for {args.queries - mismatches}/{args.queries} queries")
+
+    with open(args.output, "w") as f:
+        json.dump({"locations": len(locations), "build_s": build_ms / 1000, "queries": summary, "mismatches": mismatches}, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
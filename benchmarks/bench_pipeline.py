@@ -0,0 +1,248 @@
+"""
+End-to-end scaling benchmark of the rule_them_all pipeline on synthetic data.
+
+For each size, synthetic Reed and Adzuna payloads are served from a local stub HTTP server
+(with a fake Nominatim), loaded into a disposable local PostgreSQL cluster (when `initdb` and
+`pg_ctl` are on PATH) or a SQLite file, and every stage is timed through the instrumentation
+layer. Results are written as JSON, tagged with the current commit, so runs can be compared.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --sizes 10000 --compare tmp_outputs/benchmarks/<previous>.json
+"""
+import os
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+from benchmarks.synthetic_jobs import SyntheticJobs, StubServer
+
+RESULTS_DIR = "tmp_outputs/benchmarks"
+
+SQLITE_SCHEMA = """
+CREATE TABLE companies (
+    company_id INTEGER PRIMARY KEY AUTOINCREMENT, company_name TEXT NOT NULL UNIQUE,
+    normalized_name TEXT, canonical_company_id INTEGER REFERENCES companies(company_id)
+);
+CREATE TABLE locations (location_id INTEGER PRIMARY KEY AUTOINCREMENT, location_name TEXT NOT NULL, latitude REAL, longitude REAL);
+CREATE TABLE job_levels (job_level_id INTEGER PRIMARY KEY AUTOINCREMENT, level_name TEXT NOT NULL UNIQUE);
+CREATE TABLE descriptions (description_hash TEXT PRIMARY KEY, description TEXT NOT NULL, normalized_description TEXT);
+CREATE TABLE jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, normalized_title TEXT,
+    description_hash TEXT REFERENCES descriptions(description_hash),
+    salary_min NUMERIC, salary_max NUMERIC, predicted_salary_min NUMERIC, predicted_salary_max NUMERIC,
+    redirect_url TEXT, created TIMESTAMP, source TEXT,
+    salary_min_outlier BOOLEAN NOT NULL DEFAULT 0, salary_max_outlier BOOLEAN NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    company_id INTEGER REFERENCES companies(company_id),
+    location_id INTEGER REFERENCES locations(location_id),
+    job_level_id INTEGER REFERENCES job_levels(job_level_id)
+);
+CREATE TABLE job_metadata (
+    metadata_id INTEGER PRIMARY KEY AUTOINCREMENT, job_id INTEGER REFERENCES jobs(job_id) ON DELETE CASCADE,
+    search_query TEXT, search_location TEXT, date_downloaded DATE
+);
+CREATE INDEX idx_jobs_title ON jobs(title);
+CREATE INDEX idx_jobs_description_hash ON jobs(description_hash);
+CREATE INDEX idx_metadata_query ON job_metadata(search_query);
+CREATE INDEX idx_jobs_updated_at ON jobs(updated_at);
+CREATE INDEX idx_jobs_salary_inliers ON jobs(job_level_id) WHERE NOT salary_min_outlier AND NOT salary_max_outlier;
+CREATE TABLE map_hex_bins (
+    zoom INTEGER NOT NULL, q INTEGER NOT NULL, r INTEGER NOT NULL, n_jobs INTEGER NOT NULL, median_salary REAL,
+    latitude REAL NOT NULL, longitude REAL NOT NULL, PRIMARY KEY (zoom, q, r)
+);
+CREATE TABLE salary_histograms (
+    job_level_id INTEGER NOT NULL, region TEXT NOT NULL, target TEXT NOT NULL, bin INTEGER NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (job_level_id, region, target, bin)
+);
+"""
+
+
+# ---------------- Disposable databases ----------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_postgres(work_dir):
+    """
+    Starts a throwaway PostgreSQL cluster in work_dir and loads database_tables.sql.
+
+    Returns:
+        (url, stop function) or None when PostgreSQL binaries are not available.
+    """
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not (initdb and pg_ctl):
+        return None
+
+    data_dir = os.path.join(work_dir, "pgdata")
+    port = _free_port()
+    subprocess.run([initdb, "-D", data_dir, "-U", "postgres", "--auth=trust"], check=True, capture_output=True)
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-l", os.path.join(work_dir, "postgres.log"), "-w", "start",
+         "-o", f"-p {port} -k {work_dir} -c listen_addresses='' -c fsync=off"],
+        check=True, capture_output=True,
+    )
+    url = f"postgresql://postgres@/postgres?host={work_dir}&port={port}"
+
+    engine = create_engine(url)
+    with open("database_tables.sql") as f, engine.begin() as conn:
+        conn.exec_driver_sql(f.read())
+    engine.dispose()
+
+    def stop():
+        subprocess.run([pg_ctl, "-D", data_dir, "-m", "immediate", "stop"], capture_output=True)
+
+    return url, stop
+
+
+def start_sqlite(work_dir):
+    import sqlite3
+    path = os.path.join(work_dir, "jobs.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SQLITE_SCHEMA)
+    return f"sqlite:///{path}", lambda: None
+
+
+# ---------------- Benchmark ----------------
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_size(size, args, work_dir):
+    import reed_api
+    import adzuna_api
+    import get_lat_long
+    import rule_them_all as pipeline_stages
+    import instrumentation
+    from pipeline import PipelineRun
+
+    cells = [(q, l) for q in pipeline_stages.QUERIES for l in pipeline_stages.LOCATIONS]
+    jobs = SyntheticJobs(size, cells, reed_share=args.reed_share)
+
+    database = None if args.sqlite else start_postgres(work_dir)
+    backend = "postgresql" if database else "sqlite"
+    url, stop_database = database or start_sqlite(work_dir)
+    os.environ["DB_PARAMETERS"] = url
+
+    with StubServer(jobs) as stub:
+        # Point the pipeline at the stand-ins
+        reed_api.REED_API_URL = stub.urls["REED_API_URL"]
+        adzuna_api.ADZUNA_API_URL = stub.urls["ADZUNA_API_URL"]
+        get_lat_long.NOMINATIM_URL = stub.urls["NOMINATIM_URL"]
+        postcode_df = jobs.postcode_table()
+        postcode_df["postcode"] = postcode_df["postcode"].str.replace(" ", "").str.upper()
+        get_lat_long.postcode_df = postcode_df
+        get_lat_long.geo_cache.clear()
+        if not args.keep_sleeps:
+            reed_api.time_sleep = adzuna_api.SLEEP_TIME = get_lat_long.NOMINATIM_SLEEP = 0
+        pipeline_stages.REED_RESULTS_PER_CELL = jobs.per_cell("reed")
+        pipeline_stages.ADZUNA_RESULTS_PER_CELL = jobs.per_cell("adzuna")
+        pipeline_stages.MODEL_DIR = os.path.join(work_dir, "models")
+        pipeline_stages.METRICS_PATH = os.path.join(work_dir, "metrics.csv")
+        pipeline_stages.TERM_STATS_DIR = os.path.join(work_dir, "term_stats")
+        pipeline_stages.EDA_DIR = os.path.join(work_dir, "eda")
+        os.makedirs(pipeline_stages.EDA_DIR, exist_ok=True)
+        pipeline_stages.EMBEDDING_DIR = os.path.join(work_dir, "embeddings")
+        pipeline_stages.SNAPSHOT_DIR = os.path.join(work_dir, "archive")
+        pipeline_stages.REPORT_EXTRACT_DIR = os.path.join(work_dir, "report_extract")
+
+        instrumentation.reset()
+        instrumentation.instrument_sqlalchemy()
+        run = PipelineRun(runs_dir=os.path.join(work_dir, "runs"), resume=False)
+        start = time.perf_counter()
+
+        try:
+            # The pipeline's own stage sequence, so the benchmark follows every change to it
+            pipeline_stages._run_stages(run, skip=set(args.skip))
+        finally:
+            stop_database()
+
+        total = time.perf_counter() - start
+        metrics = instrumentation.snapshot_metrics()
+
+    stages = {}
+    for t in metrics["timers"]:
+        if t["name"] == "stage":
+            stage = t["labels"]["stage"]
+            stages[stage] = {"seconds": t["sum"], "rows_per_sec": metrics["rows_per_sec"].get(stage)}
+    for g in metrics["gauges"]:
+        if g["name"] == "stage_rows":
+            stages.setdefault(g["labels"]["stage"], {})["rows"] = g["value"]
+
+    return {
+        "size": size,
+        "backend": backend,
+        "total_seconds": total,
+        "stages": stages,
+        "round_trips": metrics["round_trips"],
+        "cache_hit_rates": metrics["cache_hit_rates"],
+        "peak_rss_bytes": metrics["peak_rss_bytes"],
+    }
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = {r["size"]: r for r in json.load(f)["results"]}
+    for result in current:
+        old = previous.get(result["size"])
+        if not old:
+            continue
+        print(f"📊 {result['size']} jobs vs {previous_path}:")
+        for stage, stats in result["stages"].items():
+            before = old["stages"].get(stage, {}).get("seconds")
+            if before:
+                change = (stats["seconds"] - before) / before * 100
+                flag = "🔺" if change > 10 else ("🔻" if change < -10 else "  ")
+                print(f"   {flag} {stage:<13} {before:9.2f}s → {stats['seconds']:9.2f}s ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--reed-share", type=float, default=0.5, help="Fraction of jobs served by the Reed stub.")
+    parser.add_argument("--sqlite", action="store_true", help="Use SQLite even if PostgreSQL is available.")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["index", "predict", "map_layers", "snapshot", "retention", "report_extract"], help="Stages to leave out.")
+    parser.add_argument("--keep-sleeps", action="store_true", help="Keep the API rate-limit sleeps.")
+    parser.add_argument("--compare", help="Previous results JSON to compare against.")
+    args = parser.parse_args()
+
+    # get_lat_long reads its postcode table at import time; give it a placeholder until each run replaces it
+    setup_dir = tempfile.mkdtemp(prefix="bench_")
+    placeholder = os.path.join(setup_dir, "ukpostcodes.csv")
+    with open(placeholder, "w") as f:
+        f.write("postcode,latitude,longitude\n")
+    os.environ.setdefault("POSTCODE_CSV", placeholder)
+
+    results = []
+    for size in args.sizes:
+        print(f"🏋️ Benchmarking {size} synthetic jobs...")
+        work_dir = tempfile.mkdtemp(prefix=f"bench{size}_", dir=setup_dir)
+        results.append(run_size(size, args, work_dir))
+        print(f"⏱️ {size} jobs: {results[-1]['total_seconds']:.1f}s end to end ({results[-1]['backend']})")
+    shutil.rmtree(setup_dir, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = current_commit()
+    path = os.path.join(RESULTS_DIR, f"pipeline_{commit}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump({"commit": commit, "created": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"✅ Results saved to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmarks prompt prefill and total latency of the JobBot SQL prompt
+with and without the cached prompt prefix.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_prompt_cache --model models/mistral-7b-instruct-v0.1.Q2_K.gguf
+"""
+import argparse
+import json
+import time
+from llama_cpp import Llama
+
+from prompt_cache import load_prefix_state, stream_completion
+from sql_prompt import SQL_PROMPT_PREFIX, sql_prompt
+
+QUESTIONS = [
+    "average salary",
+    "10 jobs in London",
+    "highest paid job",
+    "how many senior jobs were downloaded this month",
+]
+
+
+def time_question(llm, question, prefix_state=None, max_tokens=64):
+    prompt = sql_prompt(question)
+    if prefix_state is None:
+        llm.reset()
+
+    start = time.perf_counter()
+    first_token = None
+    for _ in stream_completion(llm, prompt, prefix_state, max_tokens=max_tokens, stop=["#", ";"]):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return first_token or total, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/mistral-7b-instruct-v0.1.Q2_K.gguf")
+    parser.add_argument("--threads", type=int, default=6)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--output", default="tmp_outputs/bench_prompt_cache.json")
+    args = parser.parse_args()
+
+    llm = Llama(model_path=args.model, n_ctx=2048, n_threads=args.threads, verbose=False)
+
+    results = []
+    for label in ("no_cache", "prefix_cache"):
+        prefix_state = load_prefix_state(llm, SQL_PROMPT_PREFIX) if label == "prefix_cache" else None
+        for question in QUESTIONS:
+            prefill, total = time_question(llm, question, prefix_state, args.max_tokens)
+            results.append({"mode": label, "question": question, "prefill_s": prefill, "total_s": total})
+            print(f"⏱️ {label:<12} prefill {prefill:6.2f}s | total {total:6.2f}s | {question}")
+
+    for label in ("no_cache", "prefix_cache"):
+        rows = [r for r in results if r["mode"] == label]
+        print(f"📊 {label}: mean prefill {sum(r['prefill_s'] for r in rows) / len(rows):.2f}s | "
+              f"mean total {sum(r['total_s'] for r in rows) / len(rows):.2f}s")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
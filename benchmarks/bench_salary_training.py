@@ -0,0 +1,158 @@
+"""
+Benchmarks in-memory vs streaming salary model training on a SQLite copy of the seed jobs.
+
+The jobs in EDA/jobs_with_levels.csv are replicated up to each size (salaries jittered by a few
+percent per copy). Every copy of one seed job in ten has its salaries removed and kept aside as
+ground truth, so neither mode trains on them. Each mode then runs in its own process on a fresh
+copy of the database:
+    - memory:    predict_and_update_salaries (TF-IDF + random forests, everything loaded at once)
+    - streaming: salary_streaming.stream_and_update_salaries (chunked cursor, partial_fit)
+Reported: wall time, peak resident memory above the interpreter baseline, and MAE / R² of the
+predicted salaries against the removed ones.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_salary_training --sizes 5000 20000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import resource
+import subprocess
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import SQLITE_SCHEMA
+from text_normalization import normalize_text
+
+SEED_CSV = "EDA/jobs_with_levels.csv"
+HELD_OUT = 10
+MODES = ("memory", "streaming")
+
+
+def build_database(path, n_jobs, seed_csv=SEED_CSV, seed=42):
+    """
+    Writes n_jobs replicated seed jobs to a new SQLite file.
+
+    Returns:
+        DataFrame: job_id, salary_min, salary_max of the jobs whose salaries were removed.
+    """
+    rng = np.random.default_rng(seed)
+    seed_jobs = pd.read_csv(seed_csv, usecols=["title", "description", "salary_min", "salary_max", "created"])
+    seed_jobs = seed_jobs.dropna(subset=["title", "description"]).reset_index(drop=True)
+    seed_jobs["description_hash"] = [f"h{i}" for i in range(len(seed_jobs))]
+    seed_jobs["normalized_title"] = normalize_text(seed_jobs["title"])
+    seed_jobs["normalized_description"] = normalize_text(seed_jobs["description"])
+
+    picks = np.arange(n_jobs) % len(seed_jobs)
+    jobs = seed_jobs.iloc[picks].reset_index().rename(columns={"index": "seed_row"})
+    jobs["job_id"] = np.arange(1, n_jobs + 1)
+    jitter = rng.uniform(0.95, 1.05, n_jobs)
+    for column in ("salary_min", "salary_max"):
+        jobs[column] = (jobs[column] * jitter).round(2)
+        jobs.loc[jobs[column] <= 0, column] = np.nan
+
+    held_out = (jobs["seed_row"] % HELD_OUT == 5) & jobs["salary_min"].notna() & jobs["salary_max"].notna()
+    truth = jobs.loc[held_out, ["job_id", "salary_min", "salary_max"]].reset_index(drop=True)
+    jobs.loc[held_out, ["salary_min", "salary_max"]] = np.nan
+
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SQLITE_SCHEMA)
+        seed_jobs[["description_hash", "description", "normalized_description"]].to_sql("descriptions", conn, if_exists="append", index=False)
+        jobs[["job_id", "title", "normalized_title", "description_hash", "salary_min", "salary_max", "created"]].to_sql(
+            "jobs", conn, if_exists="append", index=False
+        )
+    return truth
+
+
+def run_child(mode, model_dir):
+    """
+    Runs one training mode in this process and prints its timing and memory as JSON.
+    """
+    from predict_and_update_salaries import predict_and_update_salaries
+    from salary_streaming import stream_and_update_salaries
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics_path = os.path.join(model_dir, "metrics.csv")
+    start = time.perf_counter()
+    if mode == "memory":
+        predict_and_update_salaries(model_dir=model_dir, metrics_path=metrics_path)
+    else:
+        stream_and_update_salaries(model_dir=model_dir, metrics_path=metrics_path)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_kb / 1024, "delta_mb": (peak_kb - baseline_kb) / 1024}))
+
+
+def accuracy(db_path, truth):
+    with sqlite3.connect(db_path) as conn:
+        predicted = pd.read_sql("SELECT job_id, predicted_salary_min, predicted_salary_max FROM jobs", conn)
+    merged = truth.merge(predicted, on="job_id")
+    result = {}
+    for target in ("salary_min", "salary_max"):
+        y_true, y_pred = merged[target].to_numpy(), merged[f"predicted_{target}"].astype(float).to_numpy()
+        scored = ~np.isnan(y_pred)
+        error = y_true[scored] - y_pred[scored]
+        total = ((y_true[scored] - y_true[scored].mean()) ** 2).sum()
+        result[target] = {
+            "coverage": float(scored.mean()),
+            "MAE": float(np.abs(error).mean()),
+            "R2": float(1 - (error ** 2).sum() / total),
+        }
+    return result
+
+
+def run_size(n_jobs, work_dir, passes, chunk_size):
+    template = os.path.join(work_dir, f"jobs_{n_jobs}.sqlite")
+    truth = build_database(template, n_jobs)
+    result = {"jobs": n_jobs, "held_out": len(truth)}
+
+    for mode in MODES:
+        db_path = os.path.join(work_dir, f"{mode}_{n_jobs}.sqlite")
+        shutil.copy(template, db_path)
+        model_dir = tempfile.mkdtemp(dir=work_dir)
+        env = dict(os.environ, DB_PARAMETERS=f"sqlite:///{db_path}", SALARY_PASSES=str(passes), SALARY_CHUNK_SIZE=str(chunk_size))
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_salary_training", "--child", mode, "--model-dir", model_dir],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        stats = json.loads(child.stdout.strip().splitlines()[-1])
+        stats["holdout"] = accuracy(db_path, truth)
+        result[mode] = stats
+        print(f"⏱️ {n_jobs:>7} jobs | {mode:<9} | {stats['seconds']:7.2f}s | peak +{stats['delta_mb']:7.1f} MB | "
+              f"salary_min MAE £{stats['holdout']['salary_min']['MAE']:,.0f} R² {stats['holdout']['salary_min']['R2']:.3f} | "
+              f"salary_max MAE £{stats['holdout']['salary_max']['MAE']:,.0f} R² {stats['holdout']['salary_max']['R2']:.3f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 20_000])
+    parser.add_argument("--passes", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--output", default="tmp_outputs/bench_salary_training.json")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--model-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.model_dir)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_salary_")
+    try:
+        results = [run_size(n, work_dir, args.passes, args.chunk_size) for n in args.sizes]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmarks the CPU saved by normalizing job text once at ingest.
+
+The baseline re-implements the text handling of a run before the normalize stage: dedup on the raw
+title/description, the two-pass barista filter, the row-by-row job level classifier and the
+title + description concatenation of the salary model. The shared path normalizes once and has
+all four read the normalized columns. CPU time (time.process_time) is reported per consumer.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_text_normalization --jobs 100000
+"""
+import re
+import json
+import time
+import argparse
+import pandas as pd
+
+from assing_job_level import assign_job_level
+from check_duplicates import remove_duplicates
+from text_normalization import add_normalized_text, normalized_text
+
+SEED_CSV = "EDA/jobs_with_levels.csv"
+
+LEVEL_TERMS = [
+    ("Apprentice", r"\b(apprentice|apprenticeship|intern(ship)?|trainee)\b"),
+    ("Graduate", r"\b(graduate|entry[- ]level|early[- ]career|recent[- ]graduate)\b"),
+    ("Junior", r"\b(junior|jr|early[- ]level|entry[- ]position)\b"),
+    ("Senior", r"\b(senior|sr|lead|principal|head|expert|specialist|manager|architect|chief|consultant|director)\b"),
+    ("Mid-level", r"\b(mid[- ]?level|associate|intermediate|experienced|analyst)\b"),
+]
+
+
+# ---------------- Baseline: every consumer handles the raw text itself ----------------
+
+def legacy_dedup(df):
+    df = remove_duplicates(df)
+    return df[~(df['title'].str.contains('barista', case=False, na=False) | df['description'].str.contains('barista', case=False, na=False))]
+
+
+def legacy_levels(df):
+    def classify(row):
+        title = str(row.get('title', '')).lower()
+        text = f"{title} {str(row.get('description', '')).lower()}"
+        for source in (text, title):
+            for level, pattern in LEVEL_TERMS:
+                if re.search(pattern, source):
+                    return level
+        return "Unknown"
+    return df.apply(classify, axis=1)
+
+
+def legacy_model_text(df):
+    return df['title'].fillna('') + ' ' + df['description'].fillna('')
+
+
+# ---------------- Shared normalized column ----------------
+
+def shared_dedup(df):
+    df = remove_duplicates(df)
+    return df[~normalized_text(df).str.contains('barista', regex=False)]
+
+
+def shared_levels(df):
+    return assign_job_level(df.copy())['job_level']
+
+
+def shared_model_text(df):
+    return df['normalized_title'] + ' ' + df['normalized_description']
+
+
+def cpu(fn, *args):
+    start = time.process_time()
+    result = fn(*args)
+    return result, time.process_time() - start
+
+
+def load_jobs(n_jobs, seed_csv=SEED_CSV):
+    seed = pd.read_csv(seed_csv, usecols=["title", "description", "salary_min", "salary_max", "redirect_url"])
+    repeats = -(-n_jobs // len(seed))
+    df = pd.concat([seed] * repeats, ignore_index=True).head(n_jobs)
+    # Unique URLs so dedup keeps the repeats, as it would for re-posted jobs
+    df['redirect_url'] = df['redirect_url'].astype(str) + "#" + df.index.astype(str)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--output", default="tmp_outputs/bench_text_normalization.json")
+    args = parser.parse_args()
+
+    df = load_jobs(args.jobs)
+    print(f"🧪 {len(df)} jobs ({df['description'].nunique()} distinct descriptions)")
+
+    baseline = {}
+    clean, baseline["dedup"] = cpu(legacy_dedup, df)
+    _, baseline["levels"] = cpu(legacy_levels, clean)
+    _, baseline["model_text"] = cpu(legacy_model_text, clean)
+
+    shared = {}
+    normalized, shared["normalize"] = cpu(add_normalized_text, df)
+    clean, shared["dedup"] = cpu(shared_dedup, normalized)
+    _, shared["levels"] = cpu(shared_levels, clean)
+    _, shared["model_text"] = cpu(shared_model_text, clean)
+
+    for label, timings in (("baseline", baseline), ("shared", shared)):
+        steps = " | ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+        print(f"⏱️ {label:<8} CPU {sum(timings.values()):6.2f}s ({steps})")
+    saved = sum(baseline.values()) - sum(shared.values())
+    print(f"📊 CPU saved per run: {saved:.2f}s ({saved / max(sum(baseline.values()), 1e-9):.0%})")
+
+    with open(args.output, "w") as f:
+        json.dump({"jobs": len(df), "baseline_cpu_s": baseline, "shared_cpu_s": shared, "saved_cpu_s": saved}, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmarks top-k query latency of the job embedding index (brute force vs IVF)
+on synthetic vectors.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vector_search --sizes 100000 1000000 --dim 4096 --dtype int8
+"""
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+
+from job_embeddings import append_vectors, build_ivf, load_index, search_vectors
+
+
+def build_synthetic_index(index_dir, size, dim, dtype, seed=42, chunk=50_000):
+    rng = np.random.default_rng(seed)
+    for start in range(0, size, chunk):
+        n = min(chunk, size - start)
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        append_vectors(np.arange(start, start + n), vectors, index_dir, dtype)
+
+
+def time_queries(index, dim, n_queries, k, n_probe=8):
+    rng = np.random.default_rng(7)
+    latencies = []
+    for _ in range(n_queries):
+        query = rng.standard_normal(dim, dtype=np.float32)
+        start = time.perf_counter()
+        search_vectors(query, k=k, index=index, n_probe=n_probe)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return {"p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--dtype", choices=["int8", "float16"], default="int8")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", default="tmp_outputs/bench_vector_search.json")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as index_dir:
+            print(f"🏗️ Building {size} x {args.dim} {args.dtype} index...")
+            build_synthetic_index(index_dir, size, args.dim, args.dtype)
+
+            brute = time_queries(load_index(index_dir), args.dim, args.queries, args.k)
+            build_ivf(index_dir)
+            ivf = time_queries(load_index(index_dir), args.dim, args.queries, args.k)
+
+        for mode, stats in (("brute_force", brute), ("ivf", ivf)):
+            results.append({"size": size, "dim": args.dim, "dtype": args.dtype, "mode": mode, **stats})
+            print(f"⏱️ {size:>9} {mode:<11} p50 {stats['p50_ms']:8.2f} ms | p95 {stats['p95_ms']:8.2f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Synthetic Reed / Adzuna job payloads and local stand-ins for the external services.
+
+Jobs are generated deterministically from their index (so a 1M-job dataset is never held in
+memory), sampling titles, companies, locations, salaries and description sentences from the
+distributions in EDA/jobs_with_levels.csv. StubServer serves them in the real API shapes:
+
+    GET /reed/api/1.0/search?keywords=&locationName=&resultsToTake=&resultsToSkip=
+    GET /adzuna/v1/api/jobs/gb/search/<page>?what=&where=&results_per_page=
+    GET /nominatim/search?q=&format=json&limit=1
+"""
+import re
+import json
+import zlib
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+SEED_CSV = "EDA/jobs_with_levels.csv"
+UK_BOUNDS = (49.9, 58.7, -7.6, 1.8)  # lat min/max, lon min/max
+
+
+class SyntheticJobs:
+    """
+    Deterministic job generator. The dataset is split into `cells` search cells
+    (query x location, like rule_them_all) and into a Reed and an Adzuna share.
+    """
+
+    def __init__(self, total_jobs, cells, seed_csv=SEED_CSV, reed_share=0.5, seed=42):
+        self.total_jobs = total_jobs
+        self.cells = list(cells)
+        self.seed = seed
+        self.reed_total = int(total_jobs * reed_share)
+        self.adzuna_total = total_jobs - self.reed_total
+
+        seed_df = pd.read_csv(seed_csv)
+        self.pools = {source: self._build_pool(seed_df[seed_df["source"] == source]) for source in ("reed", "adzuna")}
+
+        # Every location with known coordinates, used by the fake Nominatim and the postcode table
+        coords = seed_df.dropna(subset=["latitude", "longitude"]).drop_duplicates("location")
+        self.coordinates = dict(zip(coords["location"], zip(coords["latitude"], coords["longitude"])))
+
+    @staticmethod
+    def _build_pool(df):
+        sentences = []
+        for text in df["description"].dropna().head(2000):
+            sentences.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.strip()) > 20)
+        salaries = df[["salary_min", "salary_max"]].astype(object).where(df[["salary_min", "salary_max"]].notna(), None)
+        return {
+            "titles": df["title"].dropna().tolist(),
+            "companies": df["company"].dropna().tolist(),
+            "locations": df[["location", "latitude", "longitude"]].astype(object).where(df[["location", "latitude", "longitude"]].notna(), None).values.tolist(),
+            "salaries": salaries.values.tolist(),
+            "sentences": sentences or ["Exciting data role."],
+        }
+
+    def per_cell(self, source):
+        total = self.reed_total if source == "reed" else self.adzuna_total
+        return -(-total // len(self.cells))  # ceil
+
+    def _cell_range(self, source, cell):
+        total = self.reed_total if source == "reed" else self.adzuna_total
+        size = self.per_cell(source)
+        index = self.cells.index(cell) if cell in self.cells else 0
+        return index * size, min((index + 1) * size, total)
+
+    def _job(self, source, i):
+        rng = random.Random(f"{self.seed}-{source}-{i}")
+        pool = self.pools[source]
+        location, lat, lon = rng.choice(pool["locations"])
+        salary_min, salary_max = rng.choice(pool["salaries"])
+        created = datetime(2025, 5, 1) - timedelta(days=rng.randint(0, 60))
+        return {
+            "id": i,
+            "title": rng.choice(pool["titles"]),
+            "company": rng.choice(pool["companies"]),
+            "location": location,
+            "latitude": lat,
+            "longitude": lon,
+            "description": " ".join(rng.sample(pool["sentences"], k=min(len(pool["sentences"]), rng.randint(3, 7)))),
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+            "created": created,
+        }
+
+    def reed_page(self, keywords, location, skip, take):
+        start, end = self._cell_range("reed", (keywords, location))
+        results = []
+        for i in range(start + skip, min(start + skip + take, end)):
+            job = self._job("reed", i)
+            results.append({
+                "jobId": 10_000_000 + i,
+                "employerId": zlib.crc32(job["company"].encode("utf-8")) % 1_000_000,
+                "employerName": job["company"],
+                "jobTitle": job["title"],
+                "locationName": job["location"],
+                "minimumSalary": job["salary_min"],
+                "maximumSalary": job["salary_max"],
+                "currency": "GBP",
+                "expirationDate": (job["created"] + timedelta(days=42)).strftime("%d/%m/%Y"),
+                "date": job["created"].strftime("%d/%m/%Y"),
+                "jobDescription": job["description"],
+                "applications": 0,
+                "jobUrl": f"https://www.reed.co.uk/jobs/synthetic/{10_000_000 + i}",
+            })
+        return {"results": results, "ambiguousLocations": [], "totalResults": end - start}
+
+    def adzuna_page(self, what, where, page, results_per_page):
+        start, end = self._cell_range("adzuna", (what, where))
+        first = start + (page - 1) * results_per_page
+        results = []
+        for i in range(first, min(first + results_per_page, end)):
+            job = self._job("adzuna", i)
+            results.append({
+                "id": str(5_000_000_000 + i),
+                "title": job["title"],
+                "company": {"display_name": job["company"]},
+                "location": {"display_name": job["location"], "area": ["UK"]},
+                "latitude": job["latitude"],
+                "longitude": job["longitude"],
+                "description": job["description"],
+                "salary_min": job["salary_min"],
+                "salary_max": job["salary_max"],
+                "redirect_url": f"https://www.adzuna.co.uk/jobs/details/{5_000_000_000 + i}",
+                "created": job["created"].strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "category": {"label": "IT Jobs", "tag": "it-jobs"},
+            })
+        return {"results": results, "count": end - start}
+
+    def geocode(self, query):
+        name = query.replace(", UK", "").strip()
+        if name in self.coordinates:
+            lat, lon = self.coordinates[name]
+        else:
+            rng = random.Random(name)
+            lat, lon = rng.uniform(*UK_BOUNDS[:2]), rng.uniform(*UK_BOUNDS[2:])
+        return [{"lat": str(lat), "lon": str(lon), "display_name": name}]
+
+    def postcode_table(self):
+        """
+        Postcode -> coordinates table in the layout of support_data/ukpostcodes.csv.
+        """
+        rows = [(loc, lat, lon) for loc, (lat, lon) in self.coordinates.items() if any(c.isdigit() for c in str(loc))]
+        return pd.DataFrame(rows, columns=["postcode", "latitude", "longitude"])
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    jobs = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/reed/api/1.0/search":
+            payload = self.jobs.reed_page(params.get("keywords"), params.get("locationName"),
+                                          int(params.get("resultsToSkip", 0)), int(params.get("resultsToTake", 100)))
+        elif url.path.startswith("/adzuna/v1/api/jobs/"):
+            page = int(url.path.rstrip("/").rsplit("/", 1)[1])
+            payload = self.jobs.adzuna_page(params.get("what"), params.get("where"), page, int(params.get("results_per_page", 50)))
+        elif url.path == "/nominatim/search":
+            payload = self.jobs.geocode(params.get("q", ""))
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Serves a SyntheticJobs dataset on localhost from a background thread.
+    """
+
+    def __init__(self, jobs, host="127.0.0.1"):
+        handler = type("StubHandler", (_StubHandler,), {"jobs": jobs})
+        self.server = ThreadingHTTPServer((host, 0), handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def urls(self):
+        return {
+            "REED_API_URL": f"{self.base_url}/reed/api/1.0/search",
+            "ADZUNA_API_URL": f"{self.base_url}/adzuna/v1/api/jobs",
+            "NOMINATIM_URL": f"{self.base_url}/nominatim/search",
+        }
@@ -36,9 +36,10 @@ def get_sql_from_gpt(question):
 You are a data analyst who writes safe SQL queries for PostgreSQL.
 The database has the following tables:
 
-1. jobs (job_id, title, description, salary_min, salary_max, location_id, company_id, created)
-2. locations (location_id, location_name, latitude, longitude)
-3. uk_countries (globalid, geometry)
+1. jobs (job_id, title, description_hash, salary_min, salary_max, location_id, company_id, created)
+2. descriptions (description_hash, description) -- join on description_hash only when the description text is needed
+3. locations (location_id, location_name, latitude, longitude)
+4. uk_countries (globalid, geometry)
 
 Rules:
 - Use table aliases.
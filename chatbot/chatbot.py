@@ -1,10 +1,22 @@
 import os
+import sys
 import streamlit as st
 import pandas as pd
 import random
+from uuid import uuid4
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from llama_cpp import Llama
+
+# Top-level project modules live one folder up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import stream_completion
+from sql_prompt import SQL_PROMPT_PREFIX, sql_prompt
+from summary_router import route_question
+from job_search import extract_search_terms, search_jobs
+from job_embeddings import similar_jobs
+from map_layers import viewport_map, UK_BOUNDS
+from geo_search import parse_geo_question, answer_geo_question
+from streamlit_folium import st_folium
 
 # ---------------- Streamlit Config (must be first) ----------------
 st.set_page_config(page_title="JobBot", layout="wide")
@@ -13,39 +25,19 @@ st.set_page_config(page_title="JobBot", layout="wide")
 load_dotenv()
 DB_URL = os.getenv("DB_PARAMETERS")
 
-# ---------------- Load Local Model ----------------
-@st.cache_resource
-def load_model():
-    return Llama(
-        model_path="models/mistral-7b-instruct-v0.1.Q2_K.gguf",
-        n_ctx=2048,
-        n_threads=6  # Adjust based on your CPU
-    )
-
-llm = load_model()
+# ---------------- Local Model ----------------
+# The model is served by the shared inference server (python llm_server.py)
+client_id = st.session_state.setdefault("llm_client_id", f"jobbot-{uuid4().hex[:8]}")
 
 # ---------------- Generate SQL from Question ----------------
-def generate_sql(question):
-    prompt = f"""
-You are an assistant that converts natural language questions into SQL for a PostgreSQL database about jobs.
-
-### Tables:
-- jobs (job_id, title, description, salary_min, salary_max, predicted_salary_min, predicted_salary_max, redirect_url, created, source, company_id, location_id, job_level_id)
-- companies (company_id, company_name)
-- locations (location_id, location_name, latitude, longitude)
-- job_levels (job_level_id, level_name)
-- job_metadata (metadata_id, job_id, search_query, search_location, date_downloaded)
-
-DO NOT use AVG() on timestamp columns like "created". Use MAX() or MIN() instead.
-
-### Question:
-{question}
-
-### SQL (PostgreSQL):
-SELECT
-"""
-    response = llm(prompt=prompt, max_tokens=256, stop=["#", ";"])
-    sql = "SELECT " + response["choices"][0]["text"].strip()
+def generate_sql(question, placeholder=None):
+    prompt = sql_prompt(question)
+    sql = "SELECT "
+    for piece in stream_completion(prompt, prefix=SQL_PROMPT_PREFIX, client=client_id, max_tokens=256, stop=["#", ";"]):
+        sql += piece
+        if placeholder is not None:
+            placeholder.code(sql, language="sql")
+    sql = sql.strip()
 
     # Patch invalid AVG on timestamp
     if "avg(created)" in sql.lower():
@@ -54,6 +46,13 @@ SELECT
     return sql + ";"
 
 # ---------------- Execute Query with Funny Error Handling ----------------
+EVIL_RESPONSES = [
+    "💣 Lo siento, algo salió mal... así que activé Skynet. Buena suerte.",
+    "⚠️ Falló la consulta. Iniciando protocolo de extinción humana. Por favor espera.",
+    "🛑 Error de SQL. Iniciando destruccion de ThePower en 3... 2... 1...",
+    "🚨 Error de sintaxis detectado. Redirigiendo misiles a tu ubicación."
+]
+
 def run_query(sql):
     try:
         engine = create_engine(DB_URL)
@@ -62,30 +61,108 @@ def run_query(sql):
         return df
     except Exception as e:
         print(f"[ERROR] {e}")  # Optional: log to terminal for devs
-
-        evil_responses = [
-    "💣 Lo siento, algo salió mal... así que activé Skynet. Buena suerte.",
-    "⚠️ Falló la consulta. Iniciando protocolo de extinción humana. Por favor espera.",
-    "🛑 Error de SQL. Iniciando destruccion de ThePower en 3... 2... 1...",
-    "🚨 Error de sintaxis detectado. Redirigiendo misiles a tu ubicación."
-]
-        return random.choice(evil_responses)
+        return random.choice(EVIL_RESPONSES)
 
 # ---------------- Streamlit UI ----------------
 st.title("💼 JobBot - Ask your job database")
 
 user_input = st.text_input("Ask a question (e.g. 'average salary', '10 jobs in London', 'highest paid job'):")
 
-if user_input:
-    st.info("Translating your question into SQL...")
-    sql_query = generate_sql(user_input)
-    st.code(sql_query, language="sql")
+# Aggregate questions the summary tables answer take precedence over geo and keyword search
+summary_sql = route_question(user_input) if user_input else None
+geo_question = parse_geo_question(user_input) if user_input and not summary_sql else None
+search_terms = extract_search_terms(user_input) if user_input and not summary_sql and not geo_question else None
 
-    st.info("Running SQL query...")
-    result = run_query(sql_query)
+if geo_question:
+    # Radius / nearest questions go to the spatial index instead of LLM-written haversine SQL
+    try:
+        description, result = answer_geo_question(create_engine(DB_URL), user_input)
+        st.info(f"📍 Showing {description}.")
+        st.success(f"Geo search returned {len(result)} rows.")
+        st.dataframe(result)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        st.warning(random.choice(EVIL_RESPONSES))
 
-    if isinstance(result, pd.DataFrame):
-        st.success(f"Query returned {len(result)} rows.")
+elif search_terms:
+    st.info(f"🔎 Full-text search for: {search_terms}")
+    page = st.number_input("Page", min_value=1, value=1, step=1)
+    try:
+        result = search_jobs(create_engine(DB_URL), search_terms, page=int(page))
+        st.success(f"Search returned {len(result)} rows.")
         st.dataframe(result)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        st.warning(random.choice(EVIL_RESPONSES))
+
+elif user_input:
+    sql_query = summary_sql
+    if sql_query:
+        st.info("⚡ Answered from the summary tables.")
+        st.code(sql_query, language="sql")
     else:
-        st.warning(result)
+        st.info("Translating your question into SQL...")
+        sql_placeholder = st.empty()
+        try:
+            sql_query = generate_sql(user_input, placeholder=sql_placeholder)
+            sql_placeholder.code(sql_query, language="sql")
+        except Exception as e:
+            # A failed or cut-off generation is never run as SQL
+            print(f"[ERROR] {e}")
+            sql_query = None
+            st.warning(random.choice(EVIL_RESPONSES))
+
+    if sql_query:
+        st.info("Running SQL query...")
+        result = run_query(sql_query)
+
+        if isinstance(result, pd.DataFrame):
+            st.success(f"Query returned {len(result)} rows.")
+            st.dataframe(result)
+        else:
+            st.warning(result)
+
+# ---------------- Find Similar Jobs ----------------
+st.subheader("🧬 Find jobs like this one")
+similar_to = st.number_input("Job ID", min_value=1, step=1, value=None)
+
+if similar_to:
+    try:
+        matches = similar_jobs(int(similar_to), k=10)
+        if matches.empty:
+            st.info("The embedding index is empty. Run the pipeline or `python job_embeddings.py` first.")
+        else:
+            details = run_query(
+                "SELECT j.job_id, j.title, c.company_name, l.location_name, j.salary_min, j.salary_max, j.redirect_url "
+                "FROM jobs j LEFT JOIN companies c ON c.company_id = j.company_id "
+                "LEFT JOIN locations l ON l.location_id = j.location_id "
+                f"WHERE j.job_id IN ({', '.join(str(int(j)) for j in matches['job_id'])});"
+            )
+            if isinstance(details, pd.DataFrame):
+                st.dataframe(matches.merge(details, on="job_id", how="left"))
+            else:
+                st.warning(details)
+    except ValueError as e:
+        st.warning(str(e))
+
+# ---------------- Job Map ----------------
+st.subheader("🗺️ Job map")
+layer = st.radio("Layer", ["hexagons", "clusters"], horizontal=True)
+view = st.session_state.setdefault("map_view", {"zoom": 6, "bounds": UK_BOUNDS})
+
+# Only the pre-aggregated cells and simplified counties around the current view are drawn
+job_map = viewport_map(create_engine(DB_URL), view["zoom"], view["bounds"], layer=layer)
+state = st_folium(job_map, height=600, use_container_width=True, returned_objects=["zoom", "bounds"], key="job_map")
+
+if state and state.get("zoom") and state.get("bounds"):
+    south_west, north_east = state["bounds"]["_southWest"], state["bounds"]["_northEast"]
+    bounds = {"south": south_west["lat"], "west": south_west["lng"], "north": north_east["lat"], "east": north_east["lng"]}
+    old = view["bounds"]
+    panned = (
+        abs(bounds["south"] + bounds["north"] - old["south"] - old["north"]) / 2 > (old["north"] - old["south"]) / 4
+        or abs(bounds["west"] + bounds["east"] - old["west"] - old["east"]) / 2 > (old["east"] - old["west"]) / 4
+    )
+    # Re-render for a new zoom or a pan beyond the area already drawn
+    if int(state["zoom"]) != view["zoom"] or panned:
+        st.session_state["map_view"] = {"zoom": int(state["zoom"]), "bounds": bounds}
+        st.rerun()
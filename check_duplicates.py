@@ -1,8 +1,11 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.exc import NoSuchTableError
 from dotenv import load_dotenv
+from instrumentation import timer
+from description_store import description_hashes
+from job_partitions import window_start
 
 
 
@@ -10,23 +13,31 @@ def remove_duplicates(df):
     """
     Removes duplicate rows from a DataFrame (or list of DataFrames) where the values in
     'title', 'description', 'salary_min', 'salary_max', and 'redirect_url' are the same.
+    After the normalize stage the normalized title and description are compared instead,
+    so copies that only differ in HTML entities, spacing or case are dropped too.
     """
     columns_to_check = ['title', 'description', 'salary_min', 'salary_max', 'redirect_url']
 
     if isinstance(df, list):
         df = pd.concat([d for d in df if not d.empty], ignore_index=True)
 
+    if 'normalized_title' in df and 'normalized_description' in df:
+        columns_to_check = ['normalized_title', 'normalized_description', 'salary_min', 'salary_max', 'redirect_url']
+
     cleaned_df = df.drop_duplicates(subset=columns_to_check, keep='first').reset_index(drop=True)
     return cleaned_df
 
 
-def filter_new_jobs_from_api(api_df):
+def filter_new_jobs_from_api(api_df, window_days=None):
     """
     Filters out jobs from the API dataframe that already exist in the 'jobs' table in the database.
-    The comparison is based on 'title', 'description', 'salary_min', 'salary_max', and 'redirect_url'.
+    The comparison is based on 'title', 'description', 'salary_min', 'salary_max', and 'redirect_url'
+    (descriptions are compared by their stored hash, so the text is never read back).
 
     Parameters:
         api_df (pd.DataFrame): DataFrame containing job listings from an API.
+        window_days (int): Only compare against jobs created in the last N days, so only the
+            recent partitions are read (default: all jobs).
 
     Returns:
         pd.DataFrame: Filtered DataFrame containing only new job listings.
@@ -39,7 +50,18 @@ def filter_new_jobs_from_api(api_df):
 
     # Try loading the jobs table, handle empty or missing table gracefully
     try:
-        database_df = pd.read_sql_table("jobs", con=engine)
+        since = window_start(window_days)
+        if since is None:
+            with timer("full_table_read", table="jobs", caller="filter_new_jobs_from_api"):
+                database_df = pd.read_sql_table(
+                    "jobs", con=engine, columns=['title', 'description_hash', 'salary_min', 'salary_max', 'redirect_url']
+                )
+        else:
+            with timer("window_read", table="jobs", caller="filter_new_jobs_from_api"):
+                database_df = pd.read_sql(text("""
+                    SELECT title, description_hash, salary_min, salary_max, redirect_url
+                    FROM jobs WHERE created >= :since
+                """), engine, params={"since": since})
     except (ValueError, NoSuchTableError):
         # Return original API dataframe if table doesn't exist or is empty
         return api_df.reset_index(drop=True)
@@ -48,11 +70,16 @@ def filter_new_jobs_from_api(api_df):
     if database_df.empty:
         return api_df.reset_index(drop=True)
 
-    columns_to_check = ['title', 'description', 'salary_min', 'salary_max', 'redirect_url']
+    columns_to_check = ['title', 'description_hash', 'salary_min', 'salary_max', 'redirect_url']
+
+    # Reflected UUID columns come back as uuid.UUID; compare in the text form description_hashes produces
+    database_df['description_hash'] = database_df['description_hash'].map(str, na_action='ignore')
 
     # Ensure comparison is based on the relevant columns
     db_subset = database_df[columns_to_check].drop_duplicates()
-    api_subset = api_df[columns_to_check]
+    api_subset = api_df[['title', 'salary_min', 'salary_max', 'redirect_url']].assign(
+        description_hash=description_hashes(api_df['description'])
+    )[columns_to_check]
 
     # Keep only new jobs that are not already in the database
     mask = ~api_subset.apply(tuple, axis=1).isin(db_subset.apply(tuple, axis=1))
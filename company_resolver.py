@@ -0,0 +1,350 @@
+"""
+Fuzzy company-name resolution for the companies lookup.
+
+Employer names arrive in many spellings ("Sagacity ", "Sagacity Ltd", "SAGACITY LIMITED").
+Every spelling keeps its own row in companies (company_name stays UNIQUE, so exact lookups still
+work), but the variants point at one canonical row through companies.canonical_company_id
+(NULL on the canonical row itself), and df_to_db writes the canonical id to jobs.company_id.
+
+Matching works on normalized names (lower case, punctuation, legal suffixes such as Ltd / Limited /
+PLC and "t/a" trading names dropped):
+    1. exact match on the normalized name;
+    2. blocking: candidates share a name prefix or a rare character trigram (an in-memory
+       inverted index; trigrams and prefixes shared by more than MAX_BLOCK_SIZE names are not used
+       as keys), so names are never compared all-pairs;
+    3. vectorized trigram cosine similarity of the candidate pairs, accepted at SIMILARITY_THRESHOLD
+       unless one name is the other plus whole words ("Be Resourcing" / "Be IT Resourcing").
+
+`python company_resolver.py` previews how the companies already in the table would be linked;
+`python company_resolver.py apply` links them and repoints jobs.
+"""
+import os
+import re
+import html
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from sqlalchemy import text
+from sklearn.feature_extraction.text import CountVectorizer
+
+SIMILARITY_THRESHOLD = 0.9
+MAX_BLOCK_SIZE = 200
+PREFIX_LENGTH = 5
+MIN_SHARED_KEYS = 2
+
+# Legal forms only: words like "UK", "Group" or "Holdings" often tell related employers apart
+LEGAL_SUFFIXES = {
+    "ltd", "limited", "plc", "llp", "lp", "llc", "inc", "incorporated", "corp", "corporation",
+    "gmbh", "ag", "ohg", "kg", "sa", "sas", "bv", "nv", "cic",
+}
+TRADING_AS_RE = re.compile(r"\b(?:t/a|trading as)\b.*$")
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+# ---------------- Normalization ----------------
+
+def normalize_company_name(name):
+    """
+    Lower-cases a company name and strips punctuation, whitespace and trailing legal suffixes.
+    Returns "" for missing names.
+    """
+    if name is None or (not isinstance(name, str) and pd.isna(name)):
+        return ""
+    name = html.unescape(str(name)).lower().replace("&", " and ")
+    name = TRADING_AS_RE.sub("", name)
+    tokens = NON_ALNUM_RE.sub(" ", name).split()
+    stripped = list(tokens)
+    while stripped and stripped[-1] in LEGAL_SUFFIXES:
+        stripped.pop()
+    # A name made only of suffixes ("Limited") is kept as it is
+    return " ".join(stripped or tokens)
+
+
+def normalize_company_names(names):
+    """
+    Vectorized normalize_company_name over a Series; each distinct name is normalized once.
+    """
+    names = pd.Series(names, dtype="object")
+    lookup = {name: normalize_company_name(name) for name in names.dropna().unique()}
+    return names.map(lookup).fillna("")
+
+
+# ---------------- Blocking index ----------------
+
+def build_name_index(names):
+    """
+    Builds the in-memory blocking index over normalized reference names.
+
+    Returns:
+        dict: 'names', 'vectorizer', 'vectors' (binary trigram matrix), 'sizes' (trigrams per name),
+        'blocking' (trigram columns usable as block keys) and 'prefixes' (prefix -> row positions).
+    """
+    names = pd.Series(names, dtype="object").reset_index(drop=True)
+    vectorizer = CountVectorizer(analyzer="char_wb", ngram_range=(3, 3), binary=True, dtype=np.float32)
+    try:
+        vectors = vectorizer.fit_transform(names)
+    except ValueError:  # no names, or none with a trigram
+        vectors = None
+
+    index = {"names": names, "vectorizer": vectorizer, "vectors": vectors}
+    if vectors is None:
+        return index
+
+    index["sizes"] = np.asarray(vectors.sum(axis=1)).ravel()
+    index["blocking"] = np.flatnonzero(np.asarray(vectors.sum(axis=0)).ravel() <= MAX_BLOCK_SIZE)
+    prefixes = names.str.replace(" ", "", regex=False).str[:PREFIX_LENGTH]
+    groups = prefixes.groupby(prefixes).indices
+    index["prefixes"] = {key: rows for key, rows in groups.items() if len(rows) <= MAX_BLOCK_SIZE}
+    return index
+
+
+def _trigram_sizes(vectorizer, names):
+    analyzer = vectorizer.build_analyzer()
+    return np.array([len(set(analyzer(name))) for name in names], dtype=np.float32)
+
+
+def candidate_pairs(index, names):
+    """
+    Pairs (query position, reference position) that share a blocking key.
+    """
+    names = pd.Series(names, dtype="object").reset_index(drop=True)
+    if index["vectors"] is None or names.empty:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    # Shared rare trigrams: a sparse product over the blocking columns only. Names with several
+    # rare trigrams must share MIN_SHARED_KEYS of them, which keeps blocks small
+    blocking = index["blocking"]
+    queries = index["vectorizer"].transform(names)[:, blocking]
+    shared = (queries @ index["vectors"][:, blocking].T).tocoo()
+    required = np.minimum(np.asarray(queries.sum(axis=1)).ravel(), MIN_SHARED_KEYS)
+    keep = shared.data >= required[shared.row]
+    query_rows, ref_rows = [shared.row[keep]], [shared.col[keep]]
+
+    # Same prefix
+    prefixes = names.str.replace(" ", "", regex=False).str[:PREFIX_LENGTH]
+    for position, prefix in enumerate(prefixes):
+        rows = index["prefixes"].get(prefix)
+        if rows is not None:
+            query_rows.append(np.full(len(rows), position))
+            ref_rows.append(rows)
+
+    n_refs = len(index["names"])
+    pairs = np.unique(np.concatenate(query_rows).astype(np.int64) * n_refs + np.concatenate(ref_rows))
+    return pairs // n_refs, pairs % n_refs
+
+
+def score_pairs(index, names, query_rows, ref_rows):
+    """
+    Trigram cosine similarity of candidate pairs, computed in one sparse operation.
+    """
+    if len(query_rows) == 0:
+        return np.empty(0, dtype=np.float32)
+    queries = index["vectorizer"].transform(pd.Series(names, dtype="object"))
+    sizes = _trigram_sizes(index["vectorizer"], names)
+    overlap = np.asarray(queries[query_rows].multiply(index["vectors"][ref_rows]).sum(axis=1)).ravel()
+    return overlap / np.sqrt(np.maximum(sizes[query_rows] * index["sizes"][ref_rows], 1))
+
+
+def _adds_words(names, other_names):
+    """
+    True where one name's words are a strict subset of the other's: an extra word such as a
+    region or a trade ("Smith Recruitment" / "Smith Recruitment Scotland") names another employer.
+    """
+    result = []
+    for name, other in zip(names, other_names):
+        words, other_words = set(name.split()), set(other.split())
+        result.append(words != other_words and (words <= other_words or other_words <= words))
+    return np.array(result, dtype=bool)
+
+
+def match_names(index, names, threshold=SIMILARITY_THRESHOLD):
+    """
+    Best reference match of each query name.
+
+    Returns:
+        pd.DataFrame: query, ref (position in the index, -1 when unmatched), score.
+    """
+    names = pd.Series(names, dtype="object").reset_index(drop=True)
+    result = pd.DataFrame({"query": np.arange(len(names)), "ref": -1, "score": 0.0})
+    if index["vectors"] is None or names.empty:
+        return result
+
+    exact = pd.Series(np.arange(len(index["names"])), index=index["names"].values)
+    exact = exact[~exact.index.duplicated()]
+    exact_ref = names.map(exact)
+    matched = exact_ref.notna().to_numpy()
+    result.loc[matched, "ref"] = exact_ref[matched].astype(int).to_numpy()
+    result.loc[matched, "score"] = 1.0
+
+    fuzzy = np.flatnonzero(~matched)
+    query_rows, ref_rows = candidate_pairs(index, names.iloc[fuzzy])
+    scores = score_pairs(index, names.iloc[fuzzy], query_rows, ref_rows)
+    pairs = pd.DataFrame({"query": fuzzy[query_rows], "ref": ref_rows, "score": scores})
+    pairs = pairs[pairs["score"] >= threshold]
+    pairs = pairs[~_adds_words(names.to_numpy()[pairs["query"]], index["names"].to_numpy()[pairs["ref"]])]
+    best = pairs.sort_values("score", ascending=False).drop_duplicates("query")
+    result.loc[best["query"].to_numpy(), ["ref", "score"]] = best[["ref", "score"]].to_numpy()
+    result["ref"] = result["ref"].astype(int)
+    return result
+
+
+def cluster_names(names, threshold=SIMILARITY_THRESHOLD):
+    """
+    Groups names that match each other (connected components of the matching pairs).
+
+    Returns:
+        np.ndarray: For every name, the position of the first name of its cluster.
+    """
+    names = pd.Series(names, dtype="object").reset_index(drop=True)
+    if names.empty:
+        return np.empty(0, dtype=int)
+    index = build_name_index(names)
+    query_rows, ref_rows = candidate_pairs(index, names)
+    scores = score_pairs(index, names, query_rows, ref_rows)
+    keep = (scores >= threshold) & (query_rows != ref_rows)
+    keep[keep] = ~_adds_words(names.to_numpy()[query_rows[keep]], names.to_numpy()[ref_rows[keep]])
+
+    graph = sp.coo_matrix((np.ones(keep.sum()), (query_rows[keep], ref_rows[keep])), shape=(len(names), len(names)))
+    _, labels = connected_components(graph, directed=False)
+    first = pd.Series(np.arange(len(names))).groupby(labels).transform("min")
+    return first.to_numpy()
+
+
+# ---------------- Database ----------------
+
+def _load_companies(conn):
+    companies = pd.read_sql("SELECT company_id, company_name, normalized_name, canonical_company_id FROM companies", conn)
+    missing = companies["normalized_name"].isna()
+    companies.loc[missing, "normalized_name"] = normalize_company_names(companies.loc[missing, "company_name"])
+    companies["resolved_id"] = companies["canonical_company_id"].fillna(companies["company_id"]).astype(int)
+    return companies
+
+
+def _insert_companies(conn, rows):
+    if rows:
+        conn.execute(text("""
+            INSERT INTO companies (company_name, normalized_name, canonical_company_id)
+            VALUES (:company_name, :normalized_name, :canonical_company_id)
+            ON CONFLICT (company_name) DO NOTHING
+        """), rows)
+
+
+def resolve_company_ids(conn, names):
+    """
+    Maps raw company names to canonical company ids, creating rows for unseen names.
+    An unseen name that matches an existing company becomes an alias of it; unseen names that
+    only match each other get one new canonical row (the first spelling) plus aliases.
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        names (pd.Series): Raw company names (e.g. df['company']).
+
+    Returns:
+        pd.Series: Canonical company_id per name (NaN for missing names), aligned with names.
+    """
+    companies = _load_companies(conn)
+    known = set(companies["company_name"])
+    new_names = pd.Series([n for n in pd.Series(names).dropna().unique() if n not in known], dtype="object")
+
+    if not new_names.empty:
+        normalized = normalize_company_names(new_names)
+        canonical = companies[companies["canonical_company_id"].isna()].reset_index(drop=True)
+        matches = match_names(build_name_index(canonical["normalized_name"]), normalized)
+        matched = matches["ref"].to_numpy() >= 0
+
+        aliases = [
+            {"company_name": name, "normalized_name": norm, "canonical_company_id": int(canonical.at[ref, "resolved_id"])}
+            for name, norm, ref in zip(new_names[matched], normalized[matched], matches["ref"][matched])
+        ]
+
+        # Unmatched names: the first spelling of each cluster becomes a new canonical company
+        unmatched_names = new_names[~matched].reset_index(drop=True)
+        unmatched_norm = normalized[~matched].reset_index(drop=True)
+        leaders = cluster_names(unmatched_norm)
+        is_leader = leaders == np.arange(len(leaders))
+        _insert_companies(conn, [
+            {"company_name": name, "normalized_name": norm, "canonical_company_id": None}
+            for name, norm in zip(unmatched_names[is_leader], unmatched_norm[is_leader])
+        ])
+        if (~is_leader).any():
+            leader_names = unmatched_names[leaders[~is_leader]].tolist()
+            leader_ids = pd.read_sql(
+                text("SELECT company_name, company_id FROM companies"), conn
+            ).set_index("company_name")["company_id"]
+            aliases += [
+                {"company_name": name, "normalized_name": norm, "canonical_company_id": int(leader_ids[leader])}
+                for name, norm, leader in zip(unmatched_names[~is_leader], unmatched_norm[~is_leader], leader_names)
+            ]
+        _insert_companies(conn, aliases)
+
+        print(f"🏢 Companies: {len(new_names)} new name(s), {len(aliases)} linked to another spelling of the same employer.")
+        companies = _load_companies(conn)
+
+    return pd.Series(names).map(dict(zip(companies["company_name"], companies["resolved_id"])))
+
+
+def merge_existing_companies(conn, apply=False, preview_path="tmp_outputs/company_merge_preview.csv"):
+    """
+    One-off backfill: fills normalized_name, links duplicate spellings already in companies to one
+    canonical row and repoints jobs to it. Repointed jobs cannot be told apart afterwards, so by
+    default it only writes the proposed links to preview_path and prints the first ones.
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        apply (bool): Write the links and repoint jobs.company_id.
+        preview_path (str): CSV of the proposed links (company_name, canonical_name).
+
+    Returns:
+        pd.DataFrame: The proposed links.
+    """
+    if apply and conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE companies ADD COLUMN IF NOT EXISTS normalized_name TEXT"))
+        conn.execute(text("ALTER TABLE companies ADD COLUMN IF NOT EXISTS canonical_company_id INTEGER REFERENCES companies(company_id)"))
+
+    companies = pd.read_sql("SELECT company_id, company_name FROM companies ORDER BY company_id", conn)
+    # Normalized again from the name, so rows stored with older rules are re-matched too
+    companies["normalized_name"] = normalize_company_names(companies["company_name"])
+    leaders = cluster_names(companies["normalized_name"])
+    companies["canonical_company_id"] = np.where(
+        leaders == np.arange(len(companies)), None, companies["company_id"].to_numpy()[leaders]
+    )
+    links = pd.DataFrame({
+        "company_name": companies["company_name"],
+        "canonical_name": companies["company_name"].to_numpy()[leaders],
+    })[leaders != np.arange(len(companies))].reset_index(drop=True)
+
+    if not apply:
+        os.makedirs(os.path.dirname(preview_path) or ".", exist_ok=True)
+        links.to_csv(preview_path, index=False)
+        for row in links.head(20).itertuples():
+            print(f"   {row.company_name!r} -> {row.canonical_name!r}")
+        print(f"🔍 {len(links)} of {len(companies)} name(s) would be linked (all in {preview_path}). "
+              "Run `python company_resolver.py apply` to link them and repoint jobs.")
+        return links
+
+    conn.execute(
+        text("UPDATE companies SET normalized_name = :normalized_name, canonical_company_id = :canonical_company_id WHERE company_id = :company_id"),
+        companies[["company_id", "normalized_name", "canonical_company_id"]].astype(object).to_dict("records"),
+    )
+    conn.execute(text("""
+        UPDATE jobs SET company_id = (SELECT c.canonical_company_id FROM companies c WHERE c.company_id = jobs.company_id),
+                        updated_at = CURRENT_TIMESTAMP
+        WHERE company_id IN (SELECT company_id FROM companies WHERE canonical_company_id IS NOT NULL)
+    """))
+    print(f"🏢 Companies merged: {len(links)} of {len(companies)} name(s) linked to a canonical employer.")
+    return links
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("", "apply"):
+        print("Usage: python company_resolver.py [apply]")
+        sys.exit(1)
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        merge_existing_companies(conn, apply=command == "apply")
@@ -1,6 +1,9 @@
+-- Lookup tables come first: jobs references companies, locations and job_levels
 CREATE TABLE companies (
     company_id SERIAL PRIMARY KEY,
-    company_name TEXT NOT NULL UNIQUE
+    company_name TEXT NOT NULL UNIQUE,
+    normalized_name TEXT,  -- see company_resolver.py
+    canonical_company_id INTEGER REFERENCES companies(company_id)  -- NULL on the canonical row
 );
 CREATE TABLE locations (
     location_id SERIAL PRIMARY KEY,
@@ -8,32 +11,97 @@ CREATE TABLE locations (
     latitude DECIMAL(9,6),
     longitude DECIMAL(9,6)
 );
+CREATE TABLE job_levels (
+    job_level_id SERIAL PRIMARY KEY,
+    level_name TEXT NOT NULL UNIQUE
+);
+-- Each distinct description once, keyed by md5(description)::uuid (see description_store.py)
+CREATE TABLE descriptions (
+    description_hash UUID PRIMARY KEY,
+    description TEXT NOT NULL,
+    normalized_description TEXT  -- see text_normalization.py
+);
+-- jobs and job_metadata are partitioned by month; the loader creates partitions named
+-- jobs_YYYY_MM / job_metadata_YYYY_MM as needed (see job_partitions.py)
 CREATE TABLE jobs (
-    job_id SERIAL PRIMARY KEY,
+    job_id SERIAL,
     title TEXT NOT NULL,
-    description TEXT,
+    normalized_title TEXT,
+    description_hash UUID REFERENCES descriptions(description_hash),
     salary_min NUMERIC,
     salary_max NUMERIC,
     predicted_salary_min NUMERIC,
     predicted_salary_max NUMERIC,
     redirect_url TEXT,
-    created TIMESTAMP,
+    created TIMESTAMP NOT NULL,  -- partition key; df_to_db falls back to the download date
     source TEXT,
-    
+    search_vector TSVECTOR,  -- weighted title (A) + description (B), filled by df_to_db
+    salary_min_outlier BOOLEAN NOT NULL DEFAULT FALSE,  -- set at ingest by salary_outliers.py
+    salary_max_outlier BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),  -- bumped by updates the report shows (see report_extract.py)
+
     company_id INTEGER REFERENCES companies(company_id),
     location_id INTEGER REFERENCES locations(location_id),
-    job_level_id INTEGER REFERENCES job_levels(job_level_id)
-);
+    job_level_id INTEGER REFERENCES job_levels(job_level_id),
+    PRIMARY KEY (job_id, created)
+) PARTITION BY RANGE (created);
 CREATE TABLE job_metadata (
-    metadata_id SERIAL PRIMARY KEY,
-    job_id INTEGER REFERENCES jobs(job_id) ON DELETE CASCADE,
+    metadata_id SERIAL,
+    job_id INTEGER NOT NULL,  -- jobs(job_id); no foreign key, a partitioned jobs is only unique on (job_id, created)
     search_query TEXT,
     search_location TEXT,
-    date_downloaded DATE
-);
-CREATE TABLE job_levels (
-    job_level_id SERIAL PRIMARY KEY,
-    level_name TEXT NOT NULL UNIQUE
-);
+    date_downloaded DATE NOT NULL,
+    PRIMARY KEY (metadata_id, date_downloaded)
+) PARTITION BY RANGE (date_downloaded);
 CREATE INDEX idx_jobs_title ON jobs(title);
+CREATE INDEX idx_jobs_location_id ON jobs(location_id);  -- geo_search.py joins matched locations to jobs
 CREATE INDEX idx_metadata_query ON job_metadata(search_query);
+CREATE INDEX idx_metadata_job_id ON job_metadata(job_id);
+CREATE INDEX idx_jobs_description_hash ON jobs(description_hash);
+CREATE INDEX idx_jobs_search_vector ON jobs USING GIN (search_vector);
+CREATE INDEX idx_jobs_updated_at ON jobs(updated_at);
+CREATE INDEX idx_jobs_salary_inliers ON jobs(job_level_id) WHERE NOT salary_min_outlier AND NOT salary_max_outlier;
+CREATE VIEW jobs_with_description AS
+SELECT j.*, d.description FROM jobs j
+LEFT JOIN descriptions d ON d.description_hash = j.description_hash;
+
+-- Summary tables, refreshed incrementally by inserts_jobs_daily.df_to_db (see summary_tables.py)
+CREATE TABLE summary_salary_by_level (
+    job_level_id INTEGER PRIMARY KEY REFERENCES job_levels(job_level_id),
+    n_jobs INTEGER NOT NULL DEFAULT 0,
+    n_salary_min INTEGER NOT NULL DEFAULT 0,
+    sum_salary_min NUMERIC NOT NULL DEFAULT 0,
+    n_salary_max INTEGER NOT NULL DEFAULT 0,
+    sum_salary_max NUMERIC NOT NULL DEFAULT 0
+);
+CREATE TABLE summary_jobs_by_location (
+    location_id INTEGER PRIMARY KEY REFERENCES locations(location_id),
+    n_jobs INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE summary_postings_by_day (
+    date_downloaded DATE PRIMARY KEY,
+    n_jobs INTEGER NOT NULL DEFAULT 0
+);
+
+-- Per (job level, region) salary histograms behind the outlier flags (see salary_outliers.py)
+CREATE TABLE salary_histograms (
+    job_level_id INTEGER NOT NULL,  -- 0 = all levels, -1 = jobs without a level
+    region TEXT NOT NULL,           -- job_metadata.search_location, '*' = all regions, '?' = jobs without one
+    target TEXT NOT NULL,           -- 'salary_min' or 'salary_max'
+    bin SMALLINT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_level_id, region, target, bin)
+);
+
+-- Hexagon bins per map zoom, rebuilt after each load by map_layers.refresh_map_layers
+CREATE TABLE map_hex_bins (
+    zoom SMALLINT NOT NULL,
+    q INTEGER NOT NULL,
+    r INTEGER NOT NULL,
+    n_jobs INTEGER NOT NULL,
+    median_salary NUMERIC,
+    latitude DOUBLE PRECISION NOT NULL,   -- mean position of the jobs in the cell (cluster marker)
+    longitude DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (zoom, q, r)
+);
+CREATE INDEX idx_map_hex_bins_viewport ON map_hex_bins(zoom, latitude, longitude);
@@ -0,0 +1,148 @@
+"""
+Content-addressed storage for job descriptions.
+
+Each distinct description text is stored once in the descriptions table, keyed by its MD5
+(stored as a UUID, 16 bytes, the same value PostgreSQL's md5(text)::uuid gives). jobs keeps
+only description_hash, so scans of jobs no longer carry the text, and re-posted boilerplate
+is stored once. Join the text in only where it is needed:
+
+    SELECT j.title, d.description
+    FROM jobs j
+    LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+
+(or use the jobs_with_description view).
+"""
+import uuid
+import hashlib
+import pandas as pd
+from sqlalchemy import text, bindparam
+
+
+def description_hash(description):
+    """
+    Returns the content hash of a description in UUID text form (as PostgreSQL returns
+    md5(description)::uuid), or None for missing text.
+    """
+    if description is None or (not isinstance(description, str) and pd.isna(description)):
+        return None
+    return str(uuid.UUID(hashlib.md5(str(description).encode("utf-8")).hexdigest()))
+
+
+def description_hashes(descriptions):
+    """
+    Vectorized description_hash over a Series; each distinct text is hashed once.
+    """
+    descriptions = pd.Series(descriptions)
+    unique = descriptions.dropna().unique()
+    lookup = {d: description_hash(d) for d in unique}
+    return descriptions.map(lookup).astype(object).where(descriptions.notna(), None)
+
+
+def store_descriptions(conn, df):
+    """
+    Writes the distinct descriptions of a batch in one bulk statement, skipping texts already stored.
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        df (pd.DataFrame): Rows with 'description', 'description_hash' and optionally 'normalized_description'.
+
+    Returns:
+        int: Number of distinct descriptions in the batch.
+    """
+    columns = ["description_hash", "description"] + (["normalized_description"] if "normalized_description" in df else [])
+    distinct = df[columns].dropna(subset=["description_hash", "description"]).drop_duplicates("description_hash")
+    if distinct.empty:
+        return 0
+    conn.execute(
+        text(f"""
+            INSERT INTO descriptions ({', '.join(columns)})
+            VALUES ({', '.join(':' + c for c in columns)})
+            ON CONFLICT (description_hash) DO NOTHING
+        """),
+        distinct.to_dict("records"),
+    )
+    return len(distinct)
+
+
+def prune_descriptions(conn, hashes, batch_size=1000):
+    """
+    Deletes the given descriptions when no job references them any more (e.g. after the jobs
+    that used them were archived and dropped).
+
+    Returns:
+        int: Number of descriptions deleted.
+    """
+    hashes = sorted({str(h) for h in hashes if h is not None and not pd.isna(h)})
+    statement = text("""
+        DELETE FROM descriptions
+        WHERE description_hash IN :hashes
+          AND NOT EXISTS (SELECT 1 FROM jobs j WHERE j.description_hash = descriptions.description_hash)
+    """).bindparams(bindparam("hashes", expanding=True))
+    deleted = 0
+    for start in range(0, len(hashes), batch_size):
+        deleted += conn.execute(statement, {"hashes": hashes[start:start + batch_size]}).rowcount
+    return deleted
+
+
+def migrate_inline_descriptions(conn):
+    """
+    Moves jobs.description into the descriptions table on databases created before the split
+    (PostgreSQL only). Run VACUUM FULL jobs afterwards to give the space back.
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS descriptions (
+            description_hash UUID PRIMARY KEY,
+            description TEXT NOT NULL,
+            normalized_description TEXT
+        )
+    """))
+    conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS description_hash UUID"))
+    conn.execute(text("""
+        INSERT INTO descriptions (description_hash, description)
+        SELECT DISTINCT md5(description)::uuid, description
+        FROM jobs
+        WHERE description IS NOT NULL
+        ON CONFLICT (description_hash) DO NOTHING
+    """))
+    result = conn.execute(text("""
+        UPDATE jobs SET description_hash = md5(description)::uuid
+        WHERE description IS NOT NULL AND description_hash IS NULL
+    """))
+    conn.execute(text("DROP VIEW IF EXISTS jobs_with_description"))
+    conn.execute(text("ALTER TABLE jobs DROP COLUMN description"))
+    conn.execute(text("ALTER TABLE jobs ADD FOREIGN KEY (description_hash) REFERENCES descriptions(description_hash)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_jobs_description_hash ON jobs(description_hash)"))
+    conn.execute(text("""
+        CREATE VIEW jobs_with_description AS
+        SELECT j.*, d.description FROM jobs j
+        LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    """))
+    print(f"🗜️ Moved descriptions of {result.rowcount} job(s) to the descriptions table.")
+
+
+def compress_descriptions(conn):
+    """
+    Optional: has PostgreSQL (14+) compress stored descriptions with LZ4. Lowering
+    toast_tuple_target makes rows above 128 bytes eligible, instead of only those above ~2 kB.
+    Existing rows are compressed when rewritten (e.g. VACUUM FULL descriptions).
+    """
+    conn.execute(text("ALTER TABLE descriptions ALTER COLUMN description SET COMPRESSION lz4"))
+    conn.execute(text("ALTER TABLE descriptions SET (toast_tuple_target = 128)"))
+    print("🗜️ Description compression enabled (lz4).")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        if command == "migrate":
+            migrate_inline_descriptions(conn)
+        elif command == "compress":
+            compress_descriptions(conn)
+        else:
+            print("Usage: python description_store.py [migrate | compress]")
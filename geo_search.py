@@ -0,0 +1,321 @@
+"""
+Radius, nearest and bounding-box job queries over an in-process spatial index of locations.
+
+The coordinates of all geocoded locations are loaded once into a BallTree (haversine metric, in
+radians) plus a latitude-sorted array for bounding boxes, and kept per database URL. The index is
+rebuilt when a new location appears (MAX(location_id) changed) or after GEO_INDEX_TTL seconds
+(coordinates fixed by update_lat_long_db.py). Matching location_ids are then joined to jobs in SQL.
+
+    jobs_within_radius(engine, 53.8, -1.55, 30)        jobs within 30 km of Leeds
+    nearest_jobs(engine, 53.8, -1.55, k=10)            the 10 closest jobs
+    jobs_in_bbox(engine, 53.5, -2.0, 54.0, -1.0)       jobs inside a box
+
+The chatbot answers questions like "data jobs within 30 km of Leeds" through answer_geo_question.
+"""
+import os
+import re
+import time
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import text, bindparam
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_INDEX_TTL = int(os.getenv("GEO_INDEX_TTL", "300"))
+DEFAULT_RADIUS_KM = 25
+MAX_JOBS = 200
+LOCATION_BATCH = 1000  # location_ids per jobs query
+
+_indexes = {}
+_lock = threading.Lock()
+
+JOB_COLUMNS_SQL = """
+    SELECT j.job_id, j.title, c.company_name, l.location_name, j.location_id,
+           j.salary_min, j.salary_max, j.predicted_salary_min, j.predicted_salary_max,
+           j.created, j.redirect_url
+    FROM jobs j
+    JOIN locations l ON l.location_id = j.location_id
+    LEFT JOIN companies c ON c.company_id = j.company_id
+    WHERE j.location_id IN :location_ids {keyword}
+"""
+
+# Whole words only ("GIS" must not match Logistics): the full-text index on PostgreSQL, with a
+# word-boundary regex on the title for rows without a search_vector
+KEYWORD_SQL = """
+    AND (j.search_vector @@ websearch_to_tsquery('english', :keyword)
+         OR (j.search_vector IS NULL AND j.title ~* :keyword_pattern))
+"""
+
+
+# ---------------- Spatial index ----------------
+
+def build_geo_index(locations):
+    """
+    Builds the spatial index from a DataFrame with location_id, location_name, latitude, longitude.
+    """
+    locations = locations.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+    coords = locations[["latitude", "longitude"]].to_numpy(dtype=float)
+    lat_order = np.argsort(coords[:, 0], kind="stable")
+    return {
+        "location_ids": locations["location_id"].to_numpy(dtype=np.int64),
+        "names": locations["location_name"].astype(str).str.lower().to_numpy() if "location_name" in locations else None,
+        "coords": coords,
+        "tree": BallTree(np.radians(coords), metric="haversine") if len(coords) else None,
+        "lat_order": lat_order,
+        "lat_sorted": coords[lat_order, 0],
+    }
+
+
+def _max_location_id(conn):
+    return conn.execute(text("SELECT MAX(location_id) FROM locations")).scalar()
+
+
+def load_geo_index(engine, refresh=False):
+    """
+    Returns the cached spatial index for a database, rebuilding it when locations were added
+    or the cached copy is older than GEO_INDEX_TTL.
+    """
+    key = str(engine.url)
+    with engine.connect() as conn:
+        version = _max_location_id(conn)
+        with _lock:
+            cached = _indexes.get(key)
+            if cached and not refresh and cached["version"] == version and time.time() - cached["loaded_at"] < GEO_INDEX_TTL:
+                return cached
+            locations = pd.read_sql(
+                "SELECT location_id, location_name, latitude, longitude FROM locations "
+                "WHERE latitude IS NOT NULL AND longitude IS NOT NULL",
+                conn,
+            )
+            index = build_geo_index(locations)
+            index.update(version=version, loaded_at=time.time())
+            _indexes[key] = index
+            return index
+
+
+def _result(index, rows, distances_km):
+    return pd.DataFrame({"location_id": index["location_ids"][rows], "distance_km": distances_km})
+
+
+def _distances_km(index, rows, latitude, longitude):
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(index["coords"][rows, 0]), np.radians(index["coords"][rows, 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def locations_within_radius(index, latitude, longitude, radius_km):
+    """
+    Locations within radius_km of a point, closest first.
+
+    Returns:
+        pd.DataFrame: location_id, distance_km
+    """
+    if index["tree"] is None:
+        return _result(index, np.empty(0, dtype=int), np.empty(0))
+    rows, distances = index["tree"].query_radius(
+        np.radians([[latitude, longitude]]), r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+    )
+    return _result(index, rows[0], distances[0] * EARTH_RADIUS_KM)
+
+
+def nearest_locations(index, latitude, longitude, k=10):
+    """
+    The k locations closest to a point.
+
+    Returns:
+        pd.DataFrame: location_id, distance_km
+    """
+    k = min(k, len(index["location_ids"]))
+    if k == 0:
+        return _result(index, np.empty(0, dtype=int), np.empty(0))
+    distances, rows = index["tree"].query(np.radians([[latitude, longitude]]), k=k)
+    return _result(index, rows[0], distances[0] * EARTH_RADIUS_KM)
+
+
+def locations_in_bbox(index, south, west, north, east):
+    """
+    Locations inside a latitude/longitude box (a slice of the latitude-sorted array, then a
+    longitude filter).
+
+    Returns:
+        pd.DataFrame: location_id, distance_km (from the box centre)
+    """
+    start = np.searchsorted(index["lat_sorted"], south, side="left")
+    end = np.searchsorted(index["lat_sorted"], north, side="right")
+    rows = index["lat_order"][start:end]
+    lon = index["coords"][rows, 1]
+    rows = rows[(lon >= west) & (lon <= east)]
+    result = _result(index, rows, _distances_km(index, rows, (south + north) / 2, (west + east) / 2))
+    return result.sort_values("distance_km", kind="stable").reset_index(drop=True)
+
+
+# ---------------- Jobs ----------------
+
+def _jobs_at(engine, locations, keyword=None, limit=MAX_JOBS):
+    """
+    Joins matched locations (closest first) to their jobs, newest job first within a location.
+    Locations are queried in batches of LOCATION_BATCH until `limit` jobs are found.
+    """
+    columns = ["job_id", "title", "company_name", "location_name", "distance_km", "salary_min", "salary_max",
+               "predicted_salary_min", "predicted_salary_max", "created", "redirect_url"]
+    if locations.empty:
+        return pd.DataFrame(columns=columns)
+
+    in_sql = bool(keyword) and engine.dialect.name == "postgresql"
+    query = text(JOB_COLUMNS_SQL.format(keyword=KEYWORD_SQL if in_sql else "")).bindparams(
+        bindparam("location_ids", expanding=True)
+    )
+    params = {"keyword": keyword, "keyword_pattern": rf"\m{re.escape(keyword)}\M"} if in_sql else {}
+    batches = []
+    with engine.connect() as conn:
+        for start in range(0, len(locations), LOCATION_BATCH):
+            batch = locations.iloc[start:start + LOCATION_BATCH]
+            jobs = pd.read_sql(query, conn, params={**params, "location_ids": batch["location_id"].tolist()})
+            if keyword and not in_sql:
+                jobs = jobs[jobs["title"].fillna("").str.contains(rf"\b{re.escape(keyword)}\b", case=False, regex=True)]
+            batches.append(jobs)
+            if sum(len(b) for b in batches) >= limit:
+                break
+
+    jobs = pd.concat(batches, ignore_index=True).merge(locations, on="location_id")
+    jobs["created"] = pd.to_datetime(jobs["created"], errors="coerce")
+    jobs = jobs.sort_values(["distance_km", "created"], ascending=[True, False]).head(limit)
+    return jobs[columns].reset_index(drop=True)
+
+
+def jobs_within_radius(engine, latitude, longitude, radius_km=DEFAULT_RADIUS_KM, keyword=None, limit=MAX_JOBS):
+    """
+    Jobs located within radius_km of a point.
+
+    Parameters:
+        engine: SQLAlchemy engine.
+        latitude, longitude (float): Centre in degrees.
+        radius_km (float): Search radius.
+        keyword (str): Optional whole-word filter (full-text search on PostgreSQL, else the job title).
+        limit (int): Maximum number of jobs returned.
+
+    Returns:
+        pd.DataFrame: Jobs with their location_name and distance_km, closest first.
+    """
+    locations = locations_within_radius(load_geo_index(engine), latitude, longitude, radius_km)
+    return _jobs_at(engine, locations, keyword, limit)
+
+
+def nearest_jobs(engine, latitude, longitude, k=10, keyword=None):
+    """
+    The k jobs closest to a point. Nearest locations are fetched in growing batches until
+    they hold at least k (matching) jobs.
+    """
+    index = load_geo_index(engine)
+    found, queried, n_locations = [], 0, k
+    while True:
+        # Each round only queries the ring of locations the previous rounds did not cover
+        locations = nearest_locations(index, latitude, longitude, n_locations)
+        found.append(_jobs_at(engine, locations.iloc[queried:], keyword, limit=k - sum(len(jobs) for jobs in found)))
+        queried = len(locations)
+        if sum(len(jobs) for jobs in found) >= k or queried >= len(index["location_ids"]):
+            return pd.concat(found, ignore_index=True).head(k)
+        n_locations *= 4
+
+
+def jobs_in_bbox(engine, south, west, north, east, keyword=None, limit=MAX_JOBS):
+    """
+    Jobs inside a latitude/longitude box, closest to its centre first.
+    """
+    locations = locations_in_bbox(load_geo_index(engine), south, west, north, east)
+    return _jobs_at(engine, locations, keyword, limit)
+
+
+# ---------------- Chatbot questions ----------------
+
+RADIUS_RE = re.compile(
+    r"^(?P<what>.*?)\bwithin\s+(?P<radius>\d+(?:\.\d+)?)\s*(?P<unit>km|kms|kilomet(?:er|re)s?|mi|miles?)\s+(?:of|from)\s+(?P<place>.+?)\??$"
+)
+NEAREST_RE = re.compile(
+    r"^(?:(?:the\s+)?(?:nearest|closest)\s+(?P<k>\d+)?\s*)(?P<what>.*?)\b(?:to|near|around)\s+(?P<place>.+?)\??$"
+)
+NEAR_RE = re.compile(r"^(?P<what>.*?)\b(?:near|around|close to)\s+(?P<place>.+?)\??$")
+GENERIC_WORDS = {
+    "jobs", "job", "roles", "role", "positions", "vacancies", "all", "any", "show", "me", "find", "list", "the",
+    "what", "which", "are", "is", "there", "a", "an", "some", "give", "get", "see", "please", "can", "you", "i",
+    "do", "have", "with", "of", "for", "in", "top", "open", "available", "latest", "new",
+}
+# Salary, count and ranking questions go to SQL, even when they say "around 40000" or "near Leeds"
+NOT_GEO_RE = re.compile(
+    r"\b(salary|salaries|pay|paid|paying|wages?|average|avg|mean|median|how many|count|number of|total|highest|lowest)\b"
+)
+
+
+def _is_place(place):
+    # "40000", "£45k" or "60,000 a year" are amounts, not places; postcodes mix letters and digits
+    return re.search(r"[a-z]", place) is not None and not re.fullmatch(r"[£$€]?\s*[\d.,]+\s*k?\b.*", place)
+
+
+def _keyword(what):
+    words = [w for w in re.findall(r"[a-z][a-z+#.-]*", what.lower()) if w not in GENERIC_WORDS]
+    return " ".join(words) or None
+
+
+def parse_geo_question(question):
+    """
+    Recognizes radius and nearest-job questions.
+
+    Returns:
+        dict | None: {'kind': 'radius' | 'nearest', 'place', 'radius_km', 'k', 'keyword'}, or None.
+    """
+    q = question.lower().strip()
+    if NOT_GEO_RE.search(q):
+        return None
+    match = RADIUS_RE.match(q)
+    if match and _is_place(match["place"]):
+        radius = float(match["radius"]) * (1.609344 if match["unit"].startswith("mi") else 1)
+        return {"kind": "radius", "place": match["place"].strip(), "radius_km": radius, "k": None, "keyword": _keyword(match["what"])}
+    match = NEAREST_RE.match(q)
+    if match and _is_place(match["place"]):
+        return {"kind": "nearest", "place": match["place"].strip(), "radius_km": None, "k": int(match["k"] or 10), "keyword": _keyword(match["what"])}
+    match = NEAR_RE.match(q)
+    if match and _is_place(match["place"]) and re.search(r"\b(jobs?|roles?|positions|vacancies)\b", match["what"]):
+        return {"kind": "radius", "place": match["place"].strip(), "radius_km": DEFAULT_RADIUS_KM, "k": None, "keyword": _keyword(match["what"])}
+    return None
+
+
+def resolve_place(engine, place):
+    """
+    Coordinates of a place name: a known location first, then the postcode file / Nominatim.
+    """
+    index = load_geo_index(engine)
+    if index["names"] is not None:
+        rows = np.flatnonzero(index["names"] == place.lower())
+        if rows.size:
+            return tuple(index["coords"][rows[0]])
+
+    from get_lat_long import get_lat_long, get_lat_long_offline
+    if any(char.isdigit() for char in place):
+        latitude, longitude = get_lat_long_offline(place)
+    else:
+        latitude, longitude = get_lat_long(f"{place}, UK")
+    return (latitude, longitude) if latitude is not None and longitude is not None else None
+
+
+def answer_geo_question(engine, question):
+    """
+    Answers a parsed geo question.
+
+    Returns:
+        tuple | None: (description, jobs DataFrame), or None if the question is not a geo question.
+    """
+    geo = parse_geo_question(question)
+    if geo is None:
+        return None
+    point = resolve_place(engine, geo["place"])
+    if point is None:
+        return f"Could not find '{geo['place']}'.", pd.DataFrame()
+
+    what = f"'{geo['keyword']}' jobs" if geo["keyword"] else "jobs"
+    if geo["kind"] == "radius":
+        jobs = jobs_within_radius(engine, *point, radius_km=geo["radius_km"], keyword=geo["keyword"])
+        return f"{what} within {geo['radius_km']:.0f} km of {geo['place'].title()}", jobs
+    jobs = nearest_jobs(engine, *point, k=geo["k"], keyword=geo["keyword"])
+    return f"the {geo['k']} {what} nearest to {geo['place'].title()}", jobs
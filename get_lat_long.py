@@ -1,9 +1,15 @@
+import os
 import pandas as pd
 import requests
 import time
+from instrumentation import timer, incr
+
+POSTCODE_CSV = os.getenv("POSTCODE_CSV", "support_data/ukpostcodes.csv")
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+NOMINATIM_SLEEP = 1  # Nominatim usage policy: max 1 request per second
 
 # --- Load postcode database ---
-postcode_df = pd.read_csv("support_data/ukpostcodes.csv")
+postcode_df = pd.read_csv(POSTCODE_CSV)
 postcode_df["postcode"] = postcode_df["postcode"].str.replace(" ", "").str.upper()
 
 # --- Geo cache to avoid repeated lookups ---
@@ -12,21 +18,26 @@ geo_cache = {}
 # --- Function: Get coordinates from Nominatim API ---
 def get_lat_long(location):
     if location in geo_cache:
+        incr("geocode_cache_hits")
         return geo_cache[location]
+    incr("geocode_cache_misses")
 
     try:
-        response = requests.get("https://nominatim.openstreetmap.org/search", params={
-            "q": location,
-            "format": "json",
-            "limit": 1
-        }, headers={"User-Agent": "GeoLookupApp/1.0"})
+        with timer("http_request", service="nominatim"):
+            response = requests.get(NOMINATIM_URL, params={
+                "q": location,
+                "format": "json",
+                "limit": 1
+            }, headers={"User-Agent": "GeoLookupApp/1.0"})
+        incr("http_responses", service="nominatim", status=response.status_code)
         response.raise_for_status()
         data = response.json()
 
         if data:
             lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
             geo_cache[location] = (lat, lon)
-            time.sleep(1)
+            with timer("rate_limit_sleep", service="nominatim"):
+                time.sleep(NOMINATIM_SLEEP)
             return lat, lon
     except Exception as e:
         print(f"⚠️ Error fetching location '{location}': {e}")
@@ -36,7 +47,9 @@ def get_lat_long(location):
 # --- Function: Get coordinates from local postcode CSV ---
 def get_lat_long_offline(postcode):
     postcode = postcode.replace(" ", "").upper()
-    match = postcode_df[postcode_df["postcode"] == postcode]
+    with timer("postcode_lookup"):
+        match = postcode_df[postcode_df["postcode"] == postcode]
+    incr("postcode_lookups", found=not match.empty)
     if not match.empty:
         return match["latitude"].values[0], match["longitude"].values[0]
     return None, None
@@ -0,0 +1,292 @@
+"""
+Lightweight run instrumentation: timers, counters and gauges kept in memory for one process and
+written at the end of a run as a JSON report and a Prometheus text-format file.
+
+    from instrumentation import timer, incr, gauge
+
+    with timer("http_request", service="reed"):
+        response = requests.get(...)
+    incr("geocode_cache_hits")
+
+Per-stage profiling is opt-in through environment variables:
+    PROFILE_STAGES=load,predict   (or "all")
+    PROFILER=cprofile             (default) or "pyinstrument" for a sampling profile, if installed
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+METRIC_PREFIX = "jobs_pipeline_"
+
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_gauges = {}
+_started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+@contextmanager
+def timer(name, **labels):
+    """
+    Times the enclosed block and adds it to the timer `name` (count, total and max seconds).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        stats = _timers.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["sum"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+
+
+def timed(name, **labels):
+    """
+    Decorator version of timer().
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+def incr(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def reset():
+    global _started
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _gauges.clear()
+        _started = time.time()
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process, or None when it cannot be measured.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    except ImportError:
+        return None
+
+
+# ---------------- SQL instrumentation ----------------
+
+_sql_instrumented = False
+
+
+def instrument_sqlalchemy():
+    """
+    Counts and times every SQL statement executed through SQLAlchemy engines in this process.
+    """
+    global _sql_instrumented
+    if _sql_instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        observe("sql_statement", elapsed, verb=verb)
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            incr("sql_rows", cursor.rowcount, verb=verb)
+
+    _sql_instrumented = True
+
+
+# ---------------- Per-stage profiling ----------------
+
+def _profile_enabled(stage):
+    stages = os.getenv("PROFILE_STAGES", "")
+    return stages == "all" or stage in [s.strip() for s in stages.split(",") if s.strip()]
+
+
+@contextmanager
+def stage_profiler(stage, output_dir):
+    """
+    Profiles the enclosed block when the stage is listed in PROFILE_STAGES and writes
+    <output_dir>/<stage>.prof (cProfile) or <stage>.profile.html (pyinstrument).
+    """
+    if not _profile_enabled(stage):
+        yield
+        return
+
+    if os.getenv("PROFILER", "cprofile") == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠️ pyinstrument is not installed, falling back to cProfile")
+        else:
+            profiler = Profiler(async_mode="disabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(os.path.join(output_dir, f"{stage}.profile.html"), "w") as f:
+                    f.write(profiler.output_html())
+            return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(output_dir, f"{stage}.prof"))
+
+
+# ---------------- Reports ----------------
+
+def snapshot_metrics():
+    """
+    Returns all metrics plus derived rates (rows/sec per stage, cache hit rates, peak RSS).
+    """
+    with _lock:
+        timers = [{"name": n, "labels": dict(l), **s} for (n, l), s in _timers.items()]
+        counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()]
+        gauges = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _gauges.items()]
+
+    rows_per_sec = {}
+    for t in timers:
+        if t["name"] != "stage":
+            continue
+        stage = t["labels"].get("stage")
+        rows = next((g["value"] for g in gauges if g["name"] == "stage_rows" and g["labels"].get("stage") == stage), None)
+        if rows and t["sum"] > 0:
+            rows_per_sec[stage] = rows / t["sum"]
+
+    hit_rates = {}
+    totals = {}
+    for c in counters:
+        for suffix in ("_hits", "_misses"):
+            if c["name"].endswith(suffix):
+                base = c["name"][: -len(suffix)]
+                totals.setdefault(base, {"_hits": 0, "_misses": 0})[suffix] += c["value"]
+    for base, t in totals.items():
+        if t["_hits"] + t["_misses"]:
+            hit_rates[base] = t["_hits"] / (t["_hits"] + t["_misses"])
+
+    round_trips = {}
+    for t in timers:
+        if t["name"] in ("http_request", "sql_statement"):
+            label = t["labels"].get("service") or t["labels"].get("verb")
+            round_trips[f"{t['name']}:{label}"] = round_trips.get(f"{t['name']}:{label}", 0) + t["count"]
+
+    return {
+        "started": datetime.fromtimestamp(_started).isoformat(),
+        "wall_seconds": time.time() - _started,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "rows_per_sec": rows_per_sec,
+        "cache_hit_rates": hit_rates,
+        "round_trips": round_trips,
+        "timers": timers,
+        "counters": counters,
+        "gauges": gauges,
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def to_prometheus(metrics):
+    # Samples are grouped per metric family, as the text format requires
+    families = {}
+
+    def add(name, kind, labels, value):
+        families.setdefault(name, (kind, []))[1].append(f"{name}{_prom_labels(labels)} {value}")
+
+    for t in metrics["timers"]:
+        base = f"{METRIC_PREFIX}{t['name']}_seconds"
+        families.setdefault(base, ("summary", []))[1].extend([
+            f"{base}_sum{_prom_labels(t['labels'])} {t['sum']:.6f}",
+            f"{base}_count{_prom_labels(t['labels'])} {t['count']}",
+        ])
+        add(f"{base}_max", "gauge", t["labels"], f"{t['max']:.6f}")
+    for c in metrics["counters"]:
+        add(f"{METRIC_PREFIX}{c['name']}_total", "counter", c["labels"], c["value"])
+    for g in metrics["gauges"]:
+        add(f"{METRIC_PREFIX}{g['name']}", "gauge", g["labels"], g["value"])
+    for stage, rate in metrics["rows_per_sec"].items():
+        add(f"{METRIC_PREFIX}stage_rows_per_second", "gauge", {"stage": stage}, f"{rate:.3f}")
+    for cache, rate in metrics["cache_hit_rates"].items():
+        add(f"{METRIC_PREFIX}cache_hit_ratio", "gauge", {"cache": cache}, f"{rate:.4f}")
+    if metrics["peak_rss_bytes"] is not None:
+        add(f"{METRIC_PREFIX}peak_rss_bytes", "gauge", {}, metrics["peak_rss_bytes"])
+    add(f"{METRIC_PREFIX}wall_seconds", "gauge", {}, f"{metrics['wall_seconds']:.3f}")
+
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def write_report(output_dir, run_id=None):
+    """
+    Writes <output_dir>/metrics.json and <output_dir>/metrics.prom.
+
+    Returns:
+        dict: The report.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    metrics = snapshot_metrics()
+    metrics["run_id"] = run_id
+
+    with open(os.path.join(output_dir, "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2, default=str)
+    with open(os.path.join(output_dir, "metrics.prom"), "w") as f:
+        f.write(to_prometheus(metrics))
+
+    print(f"📈 Run report written to {output_dir}/metrics.json and metrics.prom")
+    return metrics
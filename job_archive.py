@@ -0,0 +1,218 @@
+"""
+Columnar archive of the pipeline snapshots.
+
+Every run of rule_them_all appends its final dataset as Parquet to a dataset partitioned by
+download date (tmp_outputs/jobs_archive/download_date=YYYY-MM-DD/part-<timestamp>.parquet).
+Low-cardinality text columns are dictionary-encoded. `compact` rewrites each partition as a
+single file and drops jobs already archived by an earlier run.
+
+Usage (from the repository root):
+    python job_archive.py import tmp_outputs/all_jobs_*.csv
+    python job_archive.py compact
+"""
+import os
+import glob
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+ARCHIVE_DIR = "tmp_outputs/jobs_archive"
+PARTITION_COLUMN = "download_date"
+
+# Same key as check_duplicates.remove_duplicates
+DEDUP_COLUMNS = ["title", "description", "salary_min", "salary_max", "redirect_url"]
+
+DICTIONARY_COLUMNS = ["company", "location", "search_query", "search_location", "source", "job_level"]
+
+JOB_SCHEMA = pa.schema([
+    ("title", pa.string()),
+    ("company", pa.dictionary(pa.int32(), pa.string())),
+    ("location", pa.dictionary(pa.int32(), pa.string())),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("description", pa.string()),
+    ("salary_min", pa.float64()),
+    ("salary_max", pa.float64()),
+    ("redirect_url", pa.string()),
+    ("created", pa.timestamp("s")),
+    ("search_query", pa.dictionary(pa.int32(), pa.string())),
+    ("search_location", pa.dictionary(pa.int32(), pa.string())),
+    ("source", pa.dictionary(pa.int32(), pa.string())),
+    ("date_downloaded", pa.timestamp("s")),
+    ("job_level", pa.dictionary(pa.int32(), pa.string())),
+])
+
+# Declared pandas dtypes for reading the legacy CSV snapshots
+CSV_DTYPES = {
+    "title": "string", "company": "string", "location": "string", "description": "string",
+    "redirect_url": "string", "search_query": "string", "search_location": "string",
+    "source": "string", "job_level": "string", "created": "string", "date_downloaded": "string",
+    "latitude": "float64", "longitude": "float64", "salary_min": "float64", "salary_max": "float64",
+}
+
+
+def _to_table(df):
+    """
+    Coerces a pipeline DataFrame to JOB_SCHEMA (missing columns become nulls, extra columns are dropped).
+    """
+    df = df.copy()
+    for col in ("created", "date_downloaded"):
+        if col not in df:
+            continue
+        # Adzuna timestamps carry a UTC suffix, Reed ones are naive day-first dates
+        values = pd.to_datetime(df[col], errors="coerce", dayfirst=True, format="mixed", utc=True)
+        df[col] = values.dt.tz_localize(None).astype("datetime64[s]")
+
+    arrays = []
+    for field in JOB_SCHEMA:
+        if field.name not in df:
+            arrays.append(pa.nulls(len(df), type=field.type))
+            continue
+        values = df[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values.astype("string"), type=pa.string(), from_pandas=True).dictionary_encode())
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array(values.astype("string"), type=pa.string(), from_pandas=True))
+        else:
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=JOB_SCHEMA)
+
+
+def _write_partition_file(table, path):
+    pq.write_table(table, path, compression="zstd", use_dictionary=DICTIONARY_COLUMNS + ["title"])
+
+
+def write_snapshot(df, archive_dir=ARCHIVE_DIR):
+    """
+    Appends a pipeline snapshot to the archive, one file per download-date partition.
+
+    Returns:
+        list: Paths of the written files.
+    """
+    if df.empty:
+        return []
+
+    table = _to_table(df)
+    dates = pd.Series(table.column("date_downloaded").to_pandas()).dt.strftime("%Y-%m-%d").fillna("unknown")
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+    written = []
+    for date in sorted(dates.unique()):
+        partition_dir = os.path.join(archive_dir, f"{PARTITION_COLUMN}={date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-{timestamp}.parquet")
+        _write_partition_file(table.filter(pa.array((dates == date).values)), path)
+        written.append(path)
+
+    print(f"✅ Snapshot archived: {len(df)} rows in {len(written)} partition(s)")
+    return written
+
+
+def list_partitions(archive_dir=ARCHIVE_DIR, start_date=None, end_date=None):
+    """
+    Returns (date, directory) pairs for the partitions inside the date window, oldest first.
+    """
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, f"{PARTITION_COLUMN}=*"))):
+        date = os.path.basename(path).split("=", 1)[1]
+        if date != "unknown":
+            if start_date and date < str(pd.Timestamp(start_date).date()):
+                continue
+            if end_date and date > str(pd.Timestamp(end_date).date()):
+                continue
+        partitions.append((date, path))
+    return partitions
+
+
+def _read_partition(partition_dir, columns, filters):
+    files = sorted(glob.glob(os.path.join(partition_dir, "*.parquet")))
+    tables = [pq.read_table(f, columns=columns, filters=filters, schema=JOB_SCHEMA) for f in files]
+    return pa.concat_tables(tables) if tables else None
+
+
+def load_archive(archive_dir=ARCHIVE_DIR, columns=None, start_date=None, end_date=None, filters=None, max_workers=8):
+    """
+    Loads the archive in parallel, reading only the requested columns and date partitions.
+
+    Parameters:
+        columns (list): Columns to read (default: all).
+        start_date, end_date: Inclusive download-date window; partitions outside it are never opened.
+        filters: Extra pyarrow row filters, e.g. [("search_query", "=", "GIS")].
+        max_workers (int): Threads used to read partitions.
+
+    Returns:
+        pd.DataFrame
+    """
+    partitions = list_partitions(archive_dir, start_date, end_date)
+    if not partitions:
+        return pd.DataFrame(columns=columns or JOB_SCHEMA.names)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tables = list(pool.map(lambda p: _read_partition(p[1], columns, filters), partitions))
+
+    tables = [t for t in tables if t is not None and t.num_rows]
+    if not tables:
+        return pd.DataFrame(columns=columns or JOB_SCHEMA.names)
+    return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+
+def compact_archive(archive_dir=ARCHIVE_DIR):
+    """
+    Rewrites each partition as one file, dropping jobs already seen in an earlier partition
+    (or earlier in the same one). Partitions are processed chronologically and only the
+    64-bit hashes of the dedup key are kept in memory.
+    """
+    seen = set()
+    before = after = 0
+
+    for date, partition_dir in list_partitions(archive_dir):
+        table = _read_partition(partition_dir, None, None)
+        if table is None:
+            continue
+        df = table.to_pandas()
+        before += len(df)
+
+        keys = pd.util.hash_pandas_object(df[DEDUP_COLUMNS].astype("string"), index=False)
+        keep = ~keys.duplicated() & ~keys.isin(seen)
+        seen.update(keys[keep].tolist())
+        df = df[keep.values]
+        after += len(df)
+
+        tmp_path = os.path.join(archive_dir, f".compact-{date}.parquet")
+        _write_partition_file(_to_table(df), tmp_path)
+        shutil.rmtree(partition_dir)
+        if df.empty:
+            os.remove(tmp_path)
+            continue
+        os.makedirs(partition_dir)
+        os.replace(tmp_path, os.path.join(partition_dir, "part-compacted.parquet"))
+
+    print(f"🗜️ Archive compacted: {before} → {after} rows")
+
+
+def import_csv_snapshots(paths, archive_dir=ARCHIVE_DIR, max_workers=8):
+    """
+    Loads legacy tmp_outputs/all_jobs_*.csv snapshots into the archive.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(
+            lambda p: pd.read_csv(p, dtype=CSV_DTYPES, usecols=lambda c: c in CSV_DTYPES), paths
+        ))
+    for path, df in zip(paths, frames):
+        print(f"📥 Importing {path} ({len(df)} rows)")
+        write_snapshot(df, archive_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "compact"
+    if command == "import":
+        import_csv_snapshots(sorted(sys.argv[2:]))
+    elif command == "compact":
+        compact_archive()
+    else:
+        print("Usage: python job_archive.py [import <csv files> | compact]")
@@ -0,0 +1,372 @@
+"""
+Local embedding index for "find jobs like this one".
+
+Embeddings are computed with the local GGUF model (llama_cpp, embedding mode) only for jobs
+that are not in the index yet, L2-normalised, quantised (int8 with a per-row scale, or float16)
+and appended to memory-mapped files aligned with a job_id array:
+
+    models/embeddings/meta.json     dim, dtype, count
+    models/embeddings/vectors.bin   count x dim   (int8 or float16)
+    models/embeddings/scales.bin    count         (float32, int8 only)
+    models/embeddings/job_ids.bin   count         (int64)
+    models/embeddings/ivf.npz       optional IVF partitioning (centroids + inverted lists)
+"""
+import os
+import json
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+EMBEDDING_DIR = os.getenv("EMBEDDING_DIR", "models/embeddings")
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "models/mistral-7b-instruct-v0.1.Q2_K.gguf")
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "int8")  # int8 | float16
+BATCH_SIZE = 32
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))  # llama.cpp contexts kept loaded
+SEARCH_CHUNK_BYTES = 64 * 1024 * 1024  # float32 scratch per brute-force chunk
+
+# Idle llama.cpp contexts, shared by every embed_texts call: at most EMBED_WORKERS are ever loaded
+_embedders = queue.LifoQueue()
+_embedders_created = 0
+_embedders_lock = threading.Lock()
+
+
+# ---------------- Embedding model ----------------
+
+def _acquire_embedder():
+    global _embedders_created
+    try:
+        return _embedders.get_nowait()
+    except queue.Empty:
+        pass
+    with _embedders_lock:
+        create = _embedders_created < EMBED_WORKERS
+        if create:
+            _embedders_created += 1
+    if not create:
+        return _embedders.get()
+
+    import llama_cpp
+    try:
+        # Causal models (like the default Mistral) otherwise use no pooling and return token vectors
+        return llama_cpp.Llama(
+            model_path=EMBEDDING_MODEL_PATH, embedding=True, pooling_type=llama_cpp.LLAMA_POOLING_TYPE_MEAN,
+            n_ctx=512, n_threads=2, verbose=False,
+        )
+    except Exception:
+        with _embedders_lock:
+            _embedders_created -= 1
+        raise
+
+
+def _embed_batch(texts):
+    llm = _acquire_embedder()
+    try:
+        # One vector per text, or (without pooling) one list of token vectors per text, of varying length
+        pooled = [np.asarray(e, dtype=np.float32) for e in llm.embed(texts, truncate=True)]
+    finally:
+        _embedders.put(llm)
+    return np.vstack([e.mean(axis=0) if e.ndim == 2 else e for e in pooled])
+
+
+def embed_texts(texts, batch_size=BATCH_SIZE, max_workers=EMBED_WORKERS):
+    """
+    Embeds texts in batches on a thread pool and returns L2-normalised float32 vectors.
+    The llama.cpp contexts are loaded once and reused by later calls.
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_embed_batch, batches))
+    vectors = np.vstack(results) if results else np.empty((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# ---------------- Quantised memory-mapped store ----------------
+
+def _paths(index_dir):
+    return {name: os.path.join(index_dir, name) for name in ("meta.json", "vectors.bin", "scales.bin", "job_ids.bin", "ivf.npz")}
+
+
+def _load_meta(index_dir):
+    path = _paths(index_dir)["meta.json"]
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def quantize(vectors, dtype=EMBEDDING_DTYPE):
+    """
+    Returns (quantised vectors, per-row scales). Scales are only meaningful for int8.
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+
+def append_vectors(job_ids, vectors, index_dir=EMBEDDING_DIR, dtype=EMBEDDING_DTYPE):
+    """
+    Quantises and appends vectors for job_ids to the on-disk index.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    paths = _paths(index_dir)
+    meta = _load_meta(index_dir) or {"dim": int(vectors.shape[1]), "dtype": dtype, "count": 0}
+
+    if meta["dim"] != vectors.shape[1]:
+        raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {meta['dim']}.")
+
+    # meta.json is written last, so after a crash mid-append the .bin files may hold rows it does
+    # not count; cut them back to meta["count"] rows so the three files stay aligned
+    row_bytes = {
+        "vectors.bin": meta["dim"] * np.dtype(meta["dtype"]).itemsize,
+        "scales.bin": np.dtype(np.float32).itemsize,
+        "job_ids.bin": np.dtype(np.int64).itemsize,
+    }
+    for name, size in row_bytes.items():
+        if os.path.exists(paths[name]) and os.path.getsize(paths[name]) != meta["count"] * size:
+            os.truncate(paths[name], meta["count"] * size)
+
+    quantised, scales = quantize(vectors, meta["dtype"])
+    with open(paths["vectors.bin"], "ab") as f:
+        f.write(quantised.tobytes())
+    with open(paths["scales.bin"], "ab") as f:
+        f.write(scales.tobytes())
+    with open(paths["job_ids.bin"], "ab") as f:
+        f.write(np.asarray(job_ids, dtype=np.int64).tobytes())
+
+    meta["count"] += len(job_ids)
+    with open(paths["meta.json"] + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(paths["meta.json"] + ".tmp", paths["meta.json"])
+
+
+def remove_jobs(job_ids, index_dir=EMBEDDING_DIR):
+    """
+    Drops the vectors of job_ids from the on-disk index (e.g. jobs archived by the retention stage).
+    The files are rewritten through temporary copies and meta.json is replaced last. IVF partitions
+    refer to row positions, so they are deleted and have to be rebuilt with build_ivf.
+
+    Returns:
+        int: Number of vectors removed.
+    """
+    index = load_index(index_dir)
+    if index is None:
+        return 0
+    keep = ~np.isin(np.asarray(index["job_ids"]), np.asarray(list(job_ids), dtype=np.int64))
+    removed = int((~keep).sum())
+    if not removed:
+        return 0
+
+    paths = _paths(index_dir)
+    meta = _load_meta(index_dir)
+    for name in ("vectors.bin", "scales.bin", "job_ids.bin"):
+        rows = np.asarray(index[name.split(".")[0]][keep])
+        with open(paths[name] + ".tmp", "wb") as f:
+            f.write(rows.tobytes())
+    del index  # Close the memory maps before replacing the files
+    for name in ("vectors.bin", "scales.bin", "job_ids.bin"):
+        os.replace(paths[name] + ".tmp", paths[name])
+    if os.path.exists(paths["ivf.npz"]):
+        os.remove(paths["ivf.npz"])
+
+    meta["count"] -= removed
+    with open(paths["meta.json"] + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(paths["meta.json"] + ".tmp", paths["meta.json"])
+    print(f"🧬 Removed {removed} archived job(s) from the embedding index.")
+    return removed
+
+
+def load_index(index_dir=EMBEDDING_DIR):
+    """
+    Opens the index read-only as memory maps.
+
+    Returns:
+        dict | None: {'job_ids', 'vectors', 'scales', 'ivf'} or None if the index is empty.
+    """
+    meta = _load_meta(index_dir)
+    if not meta or meta["count"] == 0:
+        return None
+
+    paths = _paths(index_dir)
+    count, dim = meta["count"], meta["dim"]
+    index = {
+        "job_ids": np.memmap(paths["job_ids.bin"], dtype=np.int64, mode="r", shape=(count,)),
+        "vectors": np.memmap(paths["vectors.bin"], dtype=np.dtype(meta["dtype"]), mode="r", shape=(count, dim)),
+        "scales": np.memmap(paths["scales.bin"], dtype=np.float32, mode="r", shape=(count,)),
+        "ivf": None,
+    }
+    if os.path.exists(paths["ivf.npz"]):
+        ivf = np.load(paths["ivf.npz"])
+        if int(ivf["count"]) == count:  # Stale partitions are ignored until rebuilt
+            index["ivf"] = {key: ivf[key] for key in ("centroids", "order", "offsets")}
+    return index
+
+
+# ---------------- Ingest ----------------
+
+def embed_new_jobs(df, index_dir=EMBEDDING_DIR):
+    """
+    Embeds jobs whose job_id is not yet in the index and appends them.
+
+    Parameters:
+        df (pd.DataFrame): Rows with 'job_id', 'title' and 'description' (e.g. the output of df_to_db).
+    """
+    if df is None or df.empty:
+        return 0
+
+    index = load_index(index_dir)
+    known = set(index["job_ids"].tolist()) if index else set()
+    new_df = df[~df["job_id"].astype("int64").isin(known)]
+    if new_df.empty:
+        print("✅ No new jobs to embed.")
+        return 0
+
+    texts = (new_df["title"].fillna("") + ". " + new_df["description"].fillna("")).tolist()
+    vectors = embed_texts(texts)
+    append_vectors(new_df["job_id"].astype("int64").values, vectors, index_dir)
+    print(f"🧬 Embedded {len(new_df)} new job(s).")
+    return len(new_df)
+
+
+# ---------------- Search ----------------
+
+def _scores(vectors, scales, query):
+    return (np.asarray(vectors, dtype=np.float32) @ query) * scales
+
+
+def _chunk_rows(index):
+    # Rows per scan chunk, sized so its float32 copy stays within SEARCH_CHUNK_BYTES at any dimension
+    return max(1, SEARCH_CHUNK_BYTES // (index["vectors"].shape[1] * 4))
+
+
+def _top_k(scores, ids, k):
+    k = min(k, len(scores))
+    if k <= 0:  # e.g. every probed IVF list is empty
+        return ids[:0], scores[:0]
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return ids[top], scores[top]
+
+
+def search_vectors(query, k=10, index=None, n_probe=8, exclude_job_id=None):
+    """
+    Top-k cosine similarity search over the index.
+    Uses the IVF partitions when they are built (probing n_probe lists), otherwise a
+    chunked brute-force scan of the whole memory-mapped matrix.
+
+    Returns:
+        pd.DataFrame: job_id, similarity.
+    """
+    index = index or load_index()
+    if index is None:
+        return pd.DataFrame(columns=["job_id", "similarity"])
+
+    query = np.asarray(query, dtype=np.float32)
+    query = query / max(np.linalg.norm(query), 1e-12)
+    extra = 1 if exclude_job_id is not None else 0
+
+    if index["ivf"] is not None:
+        ivf = index["ivf"]
+        probes = np.argsort(-(ivf["centroids"] @ query))[:n_probe]
+        rows = np.concatenate([ivf["order"][ivf["offsets"][p]:ivf["offsets"][p + 1]] for p in probes])
+        rows.sort()
+        scores = _scores(index["vectors"][rows], index["scales"][rows], query)
+        ids, sims = _top_k(scores, np.asarray(index["job_ids"][rows]), k + extra)
+    else:
+        best_ids, best_scores = [], []
+        chunk_rows = _chunk_rows(index)
+        for start in range(0, len(index["job_ids"]), chunk_rows):
+            end = start + chunk_rows
+            scores = _scores(index["vectors"][start:end], index["scales"][start:end], query)
+            ids, sims = _top_k(scores, np.asarray(index["job_ids"][start:end]), k + extra)
+            best_ids.append(ids)
+            best_scores.append(sims)
+        ids, sims = _top_k(np.concatenate(best_scores), np.concatenate(best_ids), k + extra)
+
+    result = pd.DataFrame({"job_id": ids, "similarity": sims})
+    if exclude_job_id is not None:
+        result = result[result["job_id"] != exclude_job_id]
+    return result.head(k).reset_index(drop=True)
+
+
+def similar_jobs(job_id, k=10, index=None):
+    """
+    Finds the k jobs most similar to an already indexed job ("find jobs like this one").
+    """
+    index = index or load_index()
+    if index is None:
+        return pd.DataFrame(columns=["job_id", "similarity"])
+
+    rows = np.flatnonzero(np.asarray(index["job_ids"]) == job_id)
+    if rows.size == 0:
+        raise ValueError(f"Job {job_id} has no embedding yet.")
+    row = rows[0]
+    query = np.asarray(index["vectors"][row], dtype=np.float32) * index["scales"][row]
+    return search_vectors(query, k=k, index=index, exclude_job_id=job_id)
+
+
+def search_text(text, k=10, index=None):
+    """
+    Embeds free text and returns the k most similar jobs.
+    """
+    return search_vectors(embed_texts([text])[0], k=k, index=index)
+
+
+# ---------------- IVF partitioning ----------------
+
+def build_ivf(index_dir=EMBEDDING_DIR, n_lists=None, n_iter=10, sample_size=100_000, seed=42):
+    """
+    Clusters the vectors with k-means (on a sample) and writes inverted lists so searches
+    only scan the closest partitions. Rebuild after large appends; a stale file is ignored.
+    """
+    index = load_index(index_dir)
+    if index is None:
+        return
+    count = len(index["job_ids"])
+    n_lists = n_lists or max(1, int(np.sqrt(count)))
+    rng = np.random.default_rng(seed)
+
+    sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+    sample = np.asarray(index["vectors"][sample_rows], dtype=np.float32) * index["scales"][sample_rows, None]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+
+    for _ in range(n_iter):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assignment == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    assignment = np.empty(count, dtype=np.int32)
+    chunk_rows = _chunk_rows(index)
+    for start in range(0, count, chunk_rows):
+        chunk = np.asarray(index["vectors"][start:start + chunk_rows], dtype=np.float32)
+        assignment[start:start + chunk_rows] = np.argmax(chunk @ centroids.T, axis=1)
+
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+    np.savez(_paths(index_dir)["ivf.npz"], centroids=centroids, order=order, offsets=offsets, count=count)
+    print(f"🗂️ IVF index built with {n_lists} partitions over {count} vectors.")
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    # Backfill embeddings for every job in the database, then (re)build the IVF partitions
+    load_dotenv()
+    jobs = pd.read_sql("""
+        SELECT j.job_id, j.title, d.description
+        FROM jobs j
+        LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    """, create_engine(os.getenv("DB_PARAMETERS")))
+    embed_new_jobs(jobs)
+    if "--ivf" in sys.argv:
+        build_ivf()
@@ -0,0 +1,295 @@
+"""
+Monthly range partitions of jobs (by created) and job_metadata (by date_downloaded).
+
+Partitions are named <table>_YYYY_MM and created by the loader (df_to_db calls ensure_partitions for
+the months of every batch), so queries on a recent window of created / date_downloaded only scan
+the matching partitions. Partitions older than PARTITION_HOT_MONTHS are copied to zstd-compressed Parquet
+(tmp_outputs/partition_archive/<table>/month=YYYY-MM/) and then detached and dropped:
+
+    python job_partitions.py migrate     convert existing unpartitioned tables (PostgreSQL only)
+    python job_partitions.py archive     archive partitions past the retention window
+
+Readers that only need recent jobs (filter_new_jobs_from_api, df_to_db, predict_and_update_salaries)
+take an optional window_days argument; rule_them_all passes READ_WINDOW_DAYS. Settings (.env):
+
+    PARTITION_HOT_MONTHS   months kept in the database (default 24)
+    READ_WINDOW_DAYS       pipeline read window in days (default: unset, read all jobs)
+"""
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+from summary_tables import rebuild_summaries
+from description_store import prune_descriptions
+from job_embeddings import remove_jobs, EMBEDDING_DIR
+from salary_outliers import remove_from_histograms
+from term_stats import remove_term_stats, STORE_DIR
+
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "tmp_outputs/partition_archive")
+
+# Partitioned table -> (partition key, id column)
+PARTITIONED_TABLES = {
+    "jobs": ("created", "job_id"),
+    "job_metadata": ("date_downloaded", "metadata_id"),
+}
+
+# Rows of an unpartitioned table without a partition key get one before migrating
+FILL_MISSING_KEYS = {
+    "jobs": """
+        UPDATE jobs_heap j SET created = COALESCE(
+            (SELECT MIN(m.date_downloaded) FROM job_metadata m WHERE m.job_id = j.job_id), now()
+        ) WHERE created IS NULL
+    """,
+    "job_metadata": "UPDATE job_metadata_heap SET date_downloaded = CURRENT_DATE WHERE date_downloaded IS NULL",
+}
+
+# Constraints and indexes of database_tables.sql that CREATE TABLE ... (LIKE ...) does not copy
+PARTITIONED_CONSTRAINTS = [
+    "ALTER TABLE jobs ADD FOREIGN KEY (description_hash) REFERENCES descriptions(description_hash)",
+    "ALTER TABLE jobs ADD FOREIGN KEY (company_id) REFERENCES companies(company_id)",
+    "ALTER TABLE jobs ADD FOREIGN KEY (location_id) REFERENCES locations(location_id)",
+    "ALTER TABLE jobs ADD FOREIGN KEY (job_level_id) REFERENCES job_levels(job_level_id)",
+    "CREATE INDEX idx_jobs_title ON jobs(title)",
+    "CREATE INDEX idx_jobs_location_id ON jobs(location_id)",
+    "CREATE INDEX idx_jobs_description_hash ON jobs(description_hash)",
+    "CREATE INDEX idx_jobs_search_vector ON jobs USING GIN (search_vector)",
+    "CREATE INDEX idx_jobs_updated_at ON jobs(updated_at)",
+    "CREATE INDEX idx_jobs_salary_inliers ON jobs(job_level_id) WHERE NOT salary_min_outlier AND NOT salary_max_outlier",
+    "CREATE INDEX idx_metadata_query ON job_metadata(search_query)",
+    "CREATE INDEX idx_metadata_job_id ON job_metadata(job_id)",
+    """
+    CREATE VIEW jobs_with_description AS
+    SELECT j.*, d.description FROM jobs j
+    LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    """,
+]
+
+
+def month_starts(dates):
+    """
+    Distinct first days of the months covered by a sequence of dates (missing values ignored).
+    """
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce", utc=True, format="mixed").dropna().dt.tz_localize(None)
+    return sorted(dates.dt.to_period("M").unique().to_timestamp())
+
+
+def partition_name(table, month):
+    return f"{table}_{month:%Y_%m}"
+
+
+def hot_months():
+    return int(os.getenv("PARTITION_HOT_MONTHS", "24"))
+
+
+def read_window_days():
+    """
+    The pipeline's read window from READ_WINDOW_DAYS (None when unset: read all jobs).
+    """
+    return int(os.getenv("READ_WINDOW_DAYS", "0")) or None
+
+
+def window_start(window_days):
+    """
+    Start of a reader's date window (None reads everything).
+    """
+    if not window_days:
+        return None
+    return (pd.Timestamp.now().normalize() - pd.Timedelta(days=int(window_days))).to_pydatetime()
+
+
+def list_partitions(conn, table):
+    """
+    Returns {month start: partition name} for the partitions of a table.
+    """
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+    """), {"table": table}).scalars()
+    prefix = f"{table}_"
+    return {
+        pd.Timestamp(f"{name[len(prefix):len(prefix) + 4]}-{name[-2:]}-01"): name
+        for name in rows if name.startswith(prefix) and name[len(prefix):].replace("_", "").isdigit()
+    }
+
+
+def ensure_partitions(conn, table, dates):
+    """
+    Creates the monthly partitions a batch of rows will land in (PostgreSQL only; elsewhere,
+    e.g. the SQLite benchmarks, the tables are not partitioned and nothing is done).
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        table (str): 'jobs' or 'job_metadata'.
+        dates: Values of the table's partition key for the batch.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+
+    existing = list_partitions(conn, table)
+    created = []
+    for month in month_starts(dates):
+        if month in existing:
+            continue
+        name = partition_name(table, month)
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table}
+            FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{month + pd.offsets.MonthBegin(1):%Y-%m-%d}')
+        """))
+        created.append(name)
+    if created:
+        print(f"🧱 Created partition(s): {', '.join(created)}")
+    return created
+
+
+def _archive_query(table, partition):
+    if table == "jobs":
+        # Keep the description text with the archived jobs; search_vector can be rebuilt from it
+        return f"""
+            SELECT j.*, d.description FROM {partition} j
+            LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+        """
+    return f"SELECT * FROM {partition}"
+
+
+# What the salary histograms and term statistics counted for each job of a partition about to be dropped
+DROPPED_JOBS_SQL = """
+    SELECT j.job_id, j.job_level_id, l.level_name AS job_level, j.salary_min, j.salary_max,
+           j.title, j.normalized_title, d.description, d.normalized_description,
+           m.search_query, m.search_location AS region, m.date_downloaded
+    FROM {partition} j
+    LEFT JOIN job_levels l ON l.job_level_id = j.job_level_id
+    LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    LEFT JOIN (
+        SELECT job_id, MIN(search_query) AS search_query, MIN(search_location) AS search_location,
+               MIN(date_downloaded) AS date_downloaded
+        FROM job_metadata
+        WHERE job_id IN (SELECT job_id FROM {partition})
+        GROUP BY job_id
+    ) m ON m.job_id = j.job_id
+"""
+
+
+def _write_archive(df, table, month, archive_dir):
+    # Named after the rows' id range, so rerunning an archive that failed before its commit
+    # overwrites the same file instead of adding a second copy of the rows
+    id_col = PARTITIONED_TABLES[table][1]
+    month_dir = os.path.join(archive_dir, table, f"month={month:%Y-%m}")
+    os.makedirs(month_dir, exist_ok=True)
+    path = os.path.join(month_dir, f"part-{df[id_col].min()}-{df[id_col].max()}.parquet")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def archive_partitions(conn, months=None, archive_dir=PARTITION_ARCHIVE_DIR, embedding_dir=EMBEDDING_DIR,
+                       term_stats_dir=STORE_DIR):
+    """
+    Writes partitions older than the last `months` months (default PARTITION_HOT_MONTHS) to
+    compressed Parquet, then detaches and drops them. What was derived from the dropped jobs goes
+    with them: their now unreferenced descriptions, their embedding vectors, their share of the
+    summary tables (rebuilt), of the salary histograms and of the term statistics.
+
+    Returns:
+        list: Names of the archived partitions.
+    """
+    if conn.dialect.name != "postgresql":
+        print("⚠️ Partition archiving requires PostgreSQL, skipping.")
+        return []
+
+    months = months or hot_months()
+    cutoff = pd.Timestamp.now().to_period("M").to_timestamp() - pd.DateOffset(months=months)
+    archived = []
+    dropped_job_ids, dropped_hashes, dropped_jobs = [], [], []
+    for table in PARTITIONED_TABLES:
+        for month, partition in sorted(list_partitions(conn, table).items()):
+            if month >= cutoff:
+                continue
+            df = pd.read_sql(text(_archive_query(table, partition)), conn)
+            df = df.drop(columns=["search_vector"], errors="ignore")
+            if table == "jobs":
+                dropped_job_ids.extend(df["job_id"].tolist())
+                dropped_hashes.extend(df["description_hash"].dropna().tolist())
+                # Read while job_metadata still holds the jobs' search and region
+                counted = pd.read_sql(text(DROPPED_JOBS_SQL.format(partition=partition)), conn)
+                remove_from_histograms(conn, counted)
+                dropped_jobs.append(counted)
+            if not df.empty:
+                if "description_hash" in df:
+                    df["description_hash"] = df["description_hash"].map(str, na_action="ignore")
+                _write_archive(df, table, month, archive_dir)
+
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+            conn.execute(text(f"DROP TABLE {partition}"))
+            archived.append(partition)
+            print(f"📦 Archived {partition}: {len(df)} row(s)")
+
+    if not archived:
+        print(f"✅ No partitions older than {months} month(s) to archive.")
+        return archived
+
+    pruned = prune_descriptions(conn, dropped_hashes)
+    print(f"🗜️ Pruned {pruned} description(s) no longer used by any job.")
+    rebuild_summaries(conn)
+    remove_jobs(dropped_job_ids, embedding_dir)
+    if dropped_jobs:
+        remove_term_stats(pd.concat(dropped_jobs, ignore_index=True), term_stats_dir)
+    return archived
+
+
+def migrate_to_partitions(conn):
+    """
+    Rebuilds unpartitioned jobs / job_metadata tables as monthly partitioned tables (PostgreSQL only).
+    job_metadata loses its foreign key to jobs: a partitioned jobs table is only unique on
+    (job_id, created).
+    """
+    if conn.dialect.name != "postgresql":
+        print("⚠️ Partitioning requires PostgreSQL, skipping.")
+        return
+    if conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'jobs'")).scalar() == "p":
+        print("✅ jobs is already partitioned.")
+        return
+
+    conn.execute(text("DROP VIEW IF EXISTS jobs_with_description"))
+    conn.execute(text("ALTER TABLE job_metadata DROP CONSTRAINT IF EXISTS job_metadata_job_id_fkey"))
+
+    for table, (key, id_col) in PARTITIONED_TABLES.items():
+        # Free the table, index and constraint names for the partitioned table
+        indexes = conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": table}).scalars().all()
+        for index_name in indexes:
+            conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_heap"'))
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_heap"))
+        conn.execute(text(FILL_MISSING_KEYS[table]))
+
+        conn.execute(text(f"CREATE TABLE {table} (LIKE {table}_heap INCLUDING DEFAULTS) PARTITION BY RANGE ({key})"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL, ADD PRIMARY KEY ({id_col}, {key})"))
+        conn.execute(text(f"ALTER SEQUENCE {table}_{id_col}_seq OWNED BY {table}.{id_col}"))
+
+        months = conn.execute(text(f"SELECT DISTINCT date_trunc('month', {key}) FROM {table}_heap")).scalars().all()
+        ensure_partitions(conn, table, months)
+        rows = conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_heap")).rowcount
+        conn.execute(text(f"DROP TABLE {table}_heap"))
+        print(f"🧱 {table}: {rows} row(s) moved into {len(months)} monthly partition(s).")
+
+    for statement in PARTITIONED_CONSTRAINTS:
+        conn.execute(text(statement))
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        if command == "migrate":
+            migrate_to_partitions(conn)
+        elif command == "archive":
+            archive_partitions(conn)
+        else:
+            print("Usage: python job_partitions.py [migrate | archive]")
@@ -0,0 +1,120 @@
+import re
+import pandas as pd
+from sqlalchemy import text
+
+# Title matches rank above description matches; the text is looked up from the description store
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce(j.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(
+        (SELECT d.description FROM descriptions d WHERE d.description_hash = j.description_hash), ''
+    )), 'B')
+"""
+
+
+def update_search_vectors(conn, job_ids=None):
+    """
+    Fills jobs.search_vector in one statement for the given job_ids
+    (or for every job still missing it when job_ids is None).
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        job_ids (list): job_id values inserted by the current run.
+    """
+    if conn.dialect.name != "postgresql":
+        print("⚠️ Full-text search requires PostgreSQL, skipping search index update.")
+        return
+
+    if job_ids is None:
+        result = conn.execute(text(f"""
+            UPDATE jobs j SET search_vector = {SEARCH_VECTOR_SQL}
+            WHERE j.search_vector IS NULL
+        """))
+    else:
+        job_ids = [int(j) for j in job_ids]
+        if not job_ids:
+            return
+        result = conn.execute(text(f"""
+            UPDATE jobs j SET search_vector = {SEARCH_VECTOR_SQL}
+            WHERE j.job_id = ANY(:job_ids)
+        """), {"job_ids": job_ids})
+    print(f"🔎 Search index updated for {result.rowcount} job(s).")
+
+
+def search_jobs(conn, query, page=1, page_size=20):
+    """
+    Full-text search over job titles and descriptions, best matches first.
+
+    Parameters:
+        conn: SQLAlchemy engine or connection.
+        query (str): Search terms in web-search syntax (e.g. 'python -java', '"data engineer"').
+        page (int): 1-based page number.
+        page_size (int): Rows per page.
+
+    Returns:
+        pd.DataFrame: job_id, title, company_name, location_name, salary_min, salary_max, redirect_url, rank.
+    """
+    sql = text("""
+        SELECT j.job_id, j.title, c.company_name, l.location_name,
+               j.salary_min, j.salary_max, j.redirect_url,
+               ts_rank_cd(j.search_vector, q) AS rank
+        FROM jobs j
+        CROSS JOIN websearch_to_tsquery('english', :query) q
+        LEFT JOIN companies c ON c.company_id = j.company_id
+        LEFT JOIN locations l ON l.location_id = j.location_id
+        WHERE j.search_vector @@ q
+        ORDER BY rank DESC, j.job_id DESC
+        LIMIT :limit OFFSET :offset
+    """)
+    params = {"query": query, "limit": page_size, "offset": (max(page, 1) - 1) * page_size}
+    return pd.read_sql(sql, conn, params=params)
+
+
+# Counts, averages, rankings and salary questions are answered by SQL, never by keyword search
+AGGREGATE_RE = re.compile(
+    r"\b(how many|count|number of|average|avg|mean|median|total|sum|salary|salaries|pay|paid|paying|wages?"
+    r"|highest|lowest|most|least|top|max|maximum|min|minimum)\b",
+    flags=re.IGNORECASE,
+)
+
+# Leading words that are part of the question, not of the job title ("show me all data analyst jobs ...")
+QUESTION_WORDS = {
+    "show", "me", "find", "list", "give", "get", "see", "search", "for", "all", "the", "any", "some", "a", "an",
+    "what", "which", "are", "is", "there", "do", "does", "you", "have", "i", "can", "please", "of", "in",
+}
+
+
+def extract_search_terms(question):
+    """
+    Recognizes keyword questions such as "jobs mentioning Python" or "GIS roles with ArcGIS".
+
+    Returns:
+        str | None: Search terms for search_jobs, or None if the question is not a keyword lookup.
+    """
+    if AGGREGATE_RE.search(question):
+        return None
+    match = re.search(
+        r"^(.*?)\b(jobs|roles|positions|vacancies|postings)\b\s+"
+        r"(mentioning|with|requiring|using|that mention|that require|about|containing)\s+(.+?)\??$",
+        question.strip(),
+        flags=re.IGNORECASE,
+    )
+    if not match:
+        return None
+
+    # Keep the leading job title words only ("data analyst jobs ..."), not the question around them
+    leading = [w for w in re.findall(r"[\w+#.-]+", match.group(1)) if w.lower() not in QUESTION_WORDS and not w.isdigit()]
+    terms = f"{' '.join(leading)} {match.group(4)}"
+    terms = re.sub(r"\band\b", " ", terms, flags=re.IGNORECASE)
+    terms = " ".join(terms.split())
+    return terms or None
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    # Backfill search vectors for rows loaded before the index existed
+    load_dotenv()
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        update_search_vectors(conn)
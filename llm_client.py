@@ -0,0 +1,38 @@
+import os
+import json
+import requests
+
+# Address of the shared inference server started with `python llm_server.py`
+LLM_SERVER_URL = os.getenv("LLM_SERVER_URL", "http://127.0.0.1:8765")
+
+
+def stream_completion(prompt, prefix=None, client=None, max_tokens=256, stop=None, timeout=300):
+    """
+    Streams a completion from the shared LLM server, yielding text pieces as they arrive.
+
+    Parameters:
+        prompt (str): Full prompt to complete.
+        prefix (str): Static start of the prompt; the server keeps its evaluated state cached.
+        client (str): Caller id used for fair scheduling between users.
+        max_tokens (int): Maximum number of tokens to generate.
+        stop (list): Stop sequences.
+
+    Raises:
+        RuntimeError: If the server fails, including mid-stream; a stream that ends without its
+            "done" line is treated as failed, so partial SQL is never returned as complete.
+    """
+    payload = {"prompt": prompt, "prefix": prefix, "client": client, "max_tokens": max_tokens, "stop": stop}
+    with requests.post(f"{LLM_SERVER_URL}/v1/completions", json=payload, stream=True, timeout=timeout) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"LLM server error {response.status_code}: {response.text}")
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            message = json.loads(line)
+            if "error" in message:
+                raise RuntimeError(f"LLM server error mid-stream: {message['error']}")
+            if message.get("done"):
+                return
+            yield message["text"]
+        raise RuntimeError("LLM server closed the stream before the completion finished.")
@@ -0,0 +1,190 @@
+"""
+Local LLM inference server shared by the Streamlit apps.
+
+Loads the GGUF model once and serves a streaming completion endpoint:
+
+    POST /v1/completions   {"prompt": ..., "prefix": ..., "client": ..., "max_tokens": ..., "stop": [...]}
+    GET  /health
+
+The response is newline-delimited JSON ({"text": ...} per generated piece, then {"done": true}).
+Requests wait in per-client queues that are served round-robin, so one busy user cannot
+starve the others, and at most LLM_SERVER_CONCURRENCY requests run at the same time.
+
+Usage (from the repository root):
+    python llm_server.py
+"""
+import os
+import json
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+from llama_cpp import Llama
+
+from prompt_cache import load_prefix_state, stream_completion
+
+load_dotenv()
+
+MODEL_PATH = os.getenv("LLM_MODEL_PATH", "models/mistral-7b-instruct-v0.1.Q2_K.gguf")
+N_CTX = int(os.getenv("LLM_N_CTX", "2048"))
+N_THREADS = int(os.getenv("LLM_N_THREADS", "6"))
+HOST = os.getenv("LLM_SERVER_HOST", "127.0.0.1")
+PORT = int(os.getenv("LLM_SERVER_PORT", "8765"))
+# Each concurrent slot gets its own llama.cpp context; the weights are mmapped and shared
+CONCURRENCY = int(os.getenv("LLM_SERVER_CONCURRENCY", "1"))
+MAX_QUEUED = int(os.getenv("LLM_SERVER_MAX_QUEUED", "32"))
+
+
+class FairScheduler:
+    """
+    Hands out a fixed number of model slots. Waiting requests are grouped by client and
+    clients take turns (round-robin), each client's own requests staying in FIFO order.
+    """
+
+    def __init__(self, slots, max_queued=MAX_QUEUED):
+        self._free = list(slots)
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._max_queued = max_queued
+        self._cond = threading.Condition()
+
+    def _next_ticket(self):
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def acquire(self, client):
+        ticket = object()
+        with self._cond:
+            if self._queued >= self._max_queued:
+                return None
+            self._queues.setdefault(client, deque()).append(ticket)
+            self._queued += 1
+
+            while not (self._free and self._next_ticket() is ticket):
+                self._cond.wait()
+
+            queue = self._queues.pop(client)
+            queue.popleft()
+            if queue:
+                self._queues[client] = queue  # Re-append: this client goes to the back of the line
+            self._queued -= 1
+            slot = self._free.pop()
+            if self._free and self._queued:
+                # Several slots may have been released while a non-head waiter held the lock;
+                # wake the new head so a free slot is not left idle until the next release
+                self._cond.notify_all()
+            return slot
+
+    def release(self, slot):
+        with self._cond:
+            self._free.append(slot)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"free_slots": len(self._free), "queued": self._queued, "clients_waiting": len(self._queues)}
+
+
+class ModelSlot:
+    """One llama.cpp context plus the prompt prefixes already evaluated in it."""
+
+    def __init__(self):
+        self.llm = Llama(model_path=MODEL_PATH, n_ctx=N_CTX, n_threads=N_THREADS, verbose=False)
+        self.prefix_states = {}
+
+    def prefix_state(self, prefix):
+        if not prefix:
+            return None
+        if prefix not in self.prefix_states:
+            self.prefix_states[prefix] = load_prefix_state(self.llm, prefix)
+        return self.prefix_states[prefix]
+
+
+scheduler = None
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": MODEL_PATH, **scheduler.stats()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/v1/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = request["prompt"]
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"invalid request: {e}"})
+            return
+
+        client = request.get("client") or self.client_address[0]
+        slot = scheduler.acquire(client)
+        if slot is None:
+            self._send_json(503, {"error": "queue full"})
+            return
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+
+            pieces = stream_completion(
+                slot.llm,
+                prompt,
+                slot.prefix_state(request.get("prefix")),
+                max_tokens=int(request.get("max_tokens", 256)),
+                stop=request.get("stop") or None,
+            )
+            for piece in pieces:
+                self.wfile.write((json.dumps({"text": piece}) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b'{"done": true}\n')
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"⚠️ Client '{client}' disconnected mid-stream")
+        except Exception as e:
+            # The 200 status is already sent: end the stream with an error line instead of "done"
+            print(f"❌ Completion for '{client}' failed: {e}")
+            try:
+                self.wfile.write((json.dumps({"error": str(e)}) + "\n").encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        finally:
+            scheduler.release(slot)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    global scheduler
+    print(f"🧠 Loading {CONCURRENCY} model slot(s) from {MODEL_PATH}...")
+    scheduler = FairScheduler([ModelSlot() for _ in range(CONCURRENCY)])
+
+    server = ThreadingHTTPServer((HOST, PORT), CompletionHandler)
+    server.daemon_threads = True
+    print(f"🚀 LLM server listening on http://{HOST}:{PORT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Shutting down LLM server.")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
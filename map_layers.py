@@ -0,0 +1,445 @@
+"""
+Pre-aggregated map layers for the job map.
+
+Jobs are binned into hexagons whose size is fixed on screen (HEX_PIXELS) at each zoom in
+MAP_ZOOMS. Each cell stores its job count, median salary and the mean position of its jobs, which
+is also where its cluster marker goes. The cells live in map_hex_bins, and refresh_map_layers()
+rebuilds them after every load.
+
+County outlines (support_data/uk_counties.geojson, British National Grid) are split into arcs
+between border junctions. Each border shared by two counties is simplified once per zoom, so
+neighbouring outlines stay aligned (no gaps or overlaps). The simplified layers are cached in
+memory and on disk, per zoom.
+
+A map view only ever fetches the cells and counties inside its bounds, at the nearest precomputed
+zoom. That is a few hundred hexagons at most, whatever the size of the jobs table.
+"""
+import os
+import json
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+MAP_ZOOMS = [5, 7, 9, 11, 13]
+HEX_PIXELS = 40                    # hexagon radius on screen
+SIMPLIFY_PIXELS = 0.75             # county outline error allowed on screen
+SIMPLIFY_REPAIRS = 6
+METERS_PER_PIXEL_Z0 = 156543.03392  # web mercator, at the equator
+UK_LATITUDE = 54.5
+UK_BOUNDS = {"south": 49.8, "west": -8.7, "north": 60.9, "east": 1.8}
+COUNTY_GEOJSON = "support_data/uk_counties.geojson"
+COUNTY_CRS = "EPSG:27700"          # British National Grid
+MAP_CACHE_DIR = os.getenv("MAP_CACHE_DIR", "tmp_outputs/map_layers")
+
+JOB_POSITIONS_SQL = """
+    SELECT l.latitude, l.longitude,
+           CASE WHEN j.salary_min_outlier OR j.salary_max_outlier THEN NULL
+                ELSE (COALESCE(j.salary_min, j.predicted_salary_min) + COALESCE(j.salary_max, j.predicted_salary_max)) / 2
+           END AS salary
+    FROM jobs j
+    JOIN locations l ON l.location_id = j.location_id
+    WHERE l.latitude IS NOT NULL AND l.longitude IS NOT NULL
+"""
+
+
+# ---------------- Hexagon grid ----------------
+
+def _to_mercator(lon, lat):
+    x = np.radians(lon) * 6378137.0
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * 6378137.0
+    return x, y
+
+
+def _from_mercator(x, y):
+    lon = np.degrees(x / 6378137.0)
+    lat = np.degrees(2 * np.arctan(np.exp(y / 6378137.0)) - np.pi / 2)
+    return lon, lat
+
+
+def hex_size(zoom):
+    """
+    Hexagon radius in web-mercator meters at a zoom level.
+    """
+    return HEX_PIXELS * METERS_PER_PIXEL_Z0 / 2 ** zoom
+
+
+def hex_cells(lon, lat, zoom):
+    """
+    Axial (q, r) coordinates of the pointy-top hexagon containing each point.
+    """
+    x, y = _to_mercator(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    size = hex_size(zoom)
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+
+    # Round in cube coordinates, fixing the component with the largest rounding error
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(int), rr.astype(int)
+
+
+def hex_polygon(q, r, zoom):
+    """
+    Corners of a hexagon as [lat, lon] pairs (folium's order).
+    """
+    size = hex_size(zoom)
+    cx = size * np.sqrt(3) * (q + r / 2)
+    cy = size * 1.5 * r
+    angles = np.radians(60 * np.arange(6) - 30)
+    lon, lat = _from_mercator(cx + size * np.cos(angles), cy + size * np.sin(angles))
+    return [[round(float(a), 5), round(float(o), 5)] for a, o in zip(lat, lon)]
+
+
+def build_hex_bins(jobs, zooms=MAP_ZOOMS):
+    """
+    Aggregates job positions into hexagons at every zoom.
+
+    Parameters:
+        jobs (pd.DataFrame): latitude, longitude, salary (salary may be missing).
+
+    Returns:
+        pd.DataFrame: zoom, q, r, n_jobs, median_salary, latitude, longitude
+    """
+    jobs = jobs.astype({"latitude": float, "longitude": float, "salary": float})
+    layers = []
+    for zoom in zooms:
+        q, r = hex_cells(jobs["longitude"].values, jobs["latitude"].values, zoom)
+        cells = jobs.assign(q=q, r=r).groupby(["q", "r"]).agg(
+            n_jobs=("salary", "size"),
+            median_salary=("salary", "median"),
+            latitude=("latitude", "mean"),
+            longitude=("longitude", "mean"),
+        ).reset_index()
+        layers.append(cells.assign(zoom=zoom))
+    columns = ["zoom", "q", "r", "n_jobs", "median_salary", "latitude", "longitude"]
+    return pd.concat(layers, ignore_index=True)[columns] if layers else pd.DataFrame(columns=columns)
+
+
+def refresh_map_layers(engine=None):
+    """
+    Rebuilds map_hex_bins from jobs and locations (called after each load).
+
+    Returns:
+        int: Number of cells written across all zooms.
+    """
+    if engine is None:
+        from sqlalchemy import create_engine
+        engine = create_engine(os.getenv("DB_PARAMETERS"))
+
+    with engine.begin() as conn:
+        jobs = pd.read_sql(text(JOB_POSITIONS_SQL), conn)
+        cells = build_hex_bins(jobs)
+        conn.execute(text("DELETE FROM map_hex_bins"))
+        cells.to_sql("map_hex_bins", conn, if_exists="append", index=False, chunksize=10000)
+
+    print(f"🗺️ Map layers refreshed: {len(cells)} cells over {len(MAP_ZOOMS)} zoom levels from {len(jobs)} jobs.")
+    return len(cells)
+
+
+def layer_zoom(zoom):
+    """
+    The precomputed zoom used for a map zoom: the finest one not finer than the view.
+    """
+    return max([z for z in MAP_ZOOMS if z <= zoom] or [MAP_ZOOMS[0]])
+
+
+def _padded(bounds, margin):
+    return {
+        "south": bounds["south"] - margin, "north": bounds["north"] + margin,
+        "west": bounds["west"] - margin, "east": bounds["east"] + margin,
+    }
+
+
+def viewport_cells(conn, zoom, bounds):
+    """
+    Hexagon cells visible in a map view.
+
+    Parameters:
+        conn: SQLAlchemy engine or connection.
+        zoom (int): Current map zoom.
+        bounds (dict): south, west, north, east in degrees.
+
+    Returns:
+        pd.DataFrame: zoom, q, r, n_jobs, median_salary, latitude, longitude
+    """
+    zoom = layer_zoom(zoom)
+    # Cells are selected by their centre, so reach one hexagon beyond the edges
+    margin = np.degrees(2 * hex_size(zoom) / 6378137.0)
+    params = {"zoom": zoom, **_padded(bounds, margin)}
+    return pd.read_sql(text("""
+        SELECT zoom, q, r, n_jobs, median_salary, latitude, longitude
+        FROM map_hex_bins
+        WHERE zoom = :zoom
+          AND latitude BETWEEN :south AND :north
+          AND longitude BETWEEN :west AND :east
+    """), conn, params=params)
+
+
+# ---------------- County outlines ----------------
+
+def _simplify(points, tolerance):
+    """
+    Douglas-Peucker simplification of one arc; both ends are always kept so that arcs
+    still meet at the same junctions.
+    """
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    return points[keep]
+
+
+def _split_into_arcs(geojson):
+    """
+    Splits every ring at the vertices where the set of counties sharing the boundary changes
+    (and at ring starts), so a border shared by two counties is the same arc in both.
+
+    Returns:
+        rings (dict): (feature, polygon, ring) -> list of (arc index, reversed)
+        arcs (list): np.ndarray of projected points per arc
+    """
+    ring_points = {}
+    owners = {}
+    for f, feature in enumerate(geojson["features"]):
+        for p, polygon in enumerate(feature["geometry"]["coordinates"]):
+            for r, ring in enumerate(polygon):
+                points = [tuple(point) for point in ring[:-1]]
+                ring_points[(f, p, r)] = points
+                for point in points:
+                    owners.setdefault(point, set()).add(f)
+
+    junctions = {points[0] for points in ring_points.values() if points}
+    for points in ring_points.values():
+        for i, point in enumerate(points):
+            if len(owners[point]) > 1 and (owners[points[i - 1]] != owners[point] or owners[points[(i + 1) % len(points)]] != owners[point]):
+                junctions.add(point)
+
+    arcs, arc_ids, rings = [], {}, {}
+    for key, points in ring_points.items():
+        cuts = [i for i, point in enumerate(points) if point in junctions]
+        pieces = []
+        for a, b in zip(cuts, cuts[1:] + [len(points)]):
+            piece = points[a:b + 1] if b < len(points) else points[a:] + [points[0]]
+            # Store each arc once, in a canonical direction, so both neighbours reuse it
+            reverse = tuple(piece[::-1]) < tuple(piece)
+            canonical = tuple(piece[::-1]) if reverse else tuple(piece)
+            if canonical not in arc_ids:
+                arc_ids[canonical] = len(arcs)
+                arcs.append(np.array(canonical))
+            pieces.append((arc_ids[canonical], reverse))
+        rings[key] = pieces
+    return rings, arcs
+
+
+def _crossing_arcs(arc_ids, arcs):
+    """
+    The arcs (of one county) that cross themselves or touch another arc anywhere but at a shared end.
+    """
+    from shapely import STRtree
+    from shapely.geometry import LineString, MultiPoint
+
+    lines = [LineString(arcs[arc_id]) for arc_id in arc_ids]
+    crossing = {arc_id for arc_id, line in zip(arc_ids, lines) if not line.is_simple}
+    tree = STRtree(lines)
+    for i, j in zip(*tree.query(lines, predicate="intersects")):
+        if i < j:
+            ends = MultiPoint([lines[i].coords[0], lines[i].coords[-1], lines[j].coords[0], lines[j].coords[-1]])
+            if not lines[i].intersection(lines[j]).difference(ends).is_empty:
+                crossing.update((arc_ids[i], arc_ids[j]))
+    return crossing
+
+
+def _ring(pieces, arcs):
+    points = []
+    for arc_id, reverse in pieces:
+        arc = arcs[arc_id][::-1] if reverse else arcs[arc_id]
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def _bbox(polygons):
+    coords = np.array([point for polygon in polygons for ring in polygon for point in ring])
+    return [float(coords[:, 0].min()), float(coords[:, 1].min()), float(coords[:, 0].max()), float(coords[:, 1].max())]
+
+
+def _build_counties(zoom, source):
+    from pyproj import Transformer
+    from shapely.geometry import Polygon, MultiPolygon
+
+    with open(source) as f:
+        geojson = json.load(f)
+    rings, projected_arcs = _split_into_arcs(geojson)
+    to_wgs84 = Transformer.from_crs(COUNTY_CRS, "EPSG:4326", always_xy=True)
+
+    # Simplify in projected meters
+    tolerances = np.full(len(projected_arcs), SIMPLIFY_PIXELS * METERS_PER_PIXEL_Z0 / 2 ** zoom * np.cos(np.radians(UK_LATITUDE)))
+    simplified = [_simplify(arc, tolerance) for arc, tolerance in zip(projected_arcs, tolerances)]
+
+    # Douglas-Peucker can make arcs cross; redo the crossing ones more finely (the last round keeps
+    # them at full resolution). Neighbours share the arcs, so they stay aligned.
+    counties = [
+        [[rings[(f, p, r)] for r in range(len(polygon))] for p, polygon in enumerate(feature["geometry"]["coordinates"])]
+        for f, feature in enumerate(geojson["features"])
+    ]
+    for attempt in range(SIMPLIFY_REPAIRS):
+        invalid = set()
+        for county in counties:
+            shapes = []
+            for polygon in county:
+                outline = [_ring(pieces, simplified) for pieces in polygon]
+                if len(outline[0]) >= 4:
+                    shapes.append(Polygon(outline[0], [ring for ring in outline[1:] if len(ring) >= 4]))
+            if shapes and not MultiPolygon(shapes).is_valid:
+                arc_ids = sorted({arc_id for polygon in county for pieces in polygon for arc_id, _ in pieces})
+                invalid.update(_crossing_arcs(arc_ids, simplified))
+        if not invalid:
+            break
+        for arc_id in invalid:
+            tolerances[arc_id] = tolerances[arc_id] / 4 if attempt < SIMPLIFY_REPAIRS - 1 else 0
+            simplified[arc_id] = _simplify(projected_arcs[arc_id], tolerances[arc_id])
+
+    # Reproject and trim to ~0.1 m precision
+    arcs = []
+    for arc in simplified:
+        lon, lat = to_wgs84.transform(arc[:, 0], arc[:, 1])
+        arcs.append(np.round(np.column_stack([lon, lat]), 6).tolist())
+
+    features = []
+    for f, feature in enumerate(geojson["features"]):
+        shapes = []
+        for p, polygon in enumerate(feature["geometry"]["coordinates"]):
+            outline = [_ring(rings[(f, p, r)], arcs) for r in range(len(polygon))]
+            if len(outline[0]) < 4:
+                continue  # collapsed at this zoom (small islands)
+            shapes.append([outline[0]] + [ring for ring in outline[1:] if len(ring) >= 4])
+        if shapes:
+            features.append({
+                "type": "Feature",
+                "properties": {k: feature["properties"][k] for k in ("CTYUA23CD", "CTYUA23NM")},
+                "bbox": _bbox(shapes),
+                "geometry": {"type": "MultiPolygon", "coordinates": shapes},
+            })
+    return {"type": "FeatureCollection", "features": features}
+
+
+@lru_cache(maxsize=None)
+def county_geometries(zoom, source=COUNTY_GEOJSON, cache_dir=MAP_CACHE_DIR):
+    """
+    County outlines simplified for a zoom level, as a GeoJSON dict in WGS84.
+    Cached in memory and in <cache_dir>/counties_z<zoom>.json (rebuilt if the source is newer).
+    """
+    zoom = int(min(max(zoom, MAP_ZOOMS[0]), MAP_ZOOMS[-1]))
+    path = os.path.join(cache_dir, f"counties_z{zoom}.json")
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        with open(path) as f:
+            return json.load(f)
+
+    counties = _build_counties(zoom, source)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(counties, f, separators=(",", ":"))
+    return counties
+
+
+def viewport_counties(zoom, bounds):
+    """
+    The counties intersecting a map view, simplified for its zoom.
+    """
+    features = [
+        feature for feature in county_geometries(int(zoom))["features"]
+        if feature["bbox"][0] <= bounds["east"] and feature["bbox"][2] >= bounds["west"]
+        and feature["bbox"][1] <= bounds["north"] and feature["bbox"][3] >= bounds["south"]
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+# ---------------- Rendering ----------------
+
+def viewport_map(conn, zoom, bounds, layer="hexagons"):
+    """
+    Builds a folium map of one view with only the data inside it.
+
+    Parameters:
+        conn: SQLAlchemy engine or connection.
+        zoom (int): Map zoom.
+        bounds (dict): south, west, north, east in degrees.
+        layer (str): "hexagons" (binned counts coloured by median salary) or "clusters" (sized markers).
+    """
+    import folium
+    import branca.colormap as cm
+
+    center = [(bounds["south"] + bounds["north"]) / 2, (bounds["west"] + bounds["east"]) / 2]
+    m = folium.Map(location=center, zoom_start=zoom, prefer_canvas=True)
+
+    # Include half a view around the visible area so short pans don't need a new query
+    half_height, half_width = (bounds["north"] - bounds["south"]) / 2, (bounds["east"] - bounds["west"]) / 2
+    bounds = {
+        "south": bounds["south"] - half_height, "north": bounds["north"] + half_height,
+        "west": bounds["west"] - half_width, "east": bounds["east"] + half_width,
+    }
+
+    folium.GeoJson(
+        viewport_counties(zoom, bounds),
+        name="Counties",
+        style_function=lambda _: {"color": "#555555", "weight": 1, "fillOpacity": 0},
+        tooltip=folium.GeoJsonTooltip(fields=["CTYUA23NM"], aliases=["County"]),
+    ).add_to(m)
+
+    cells = viewport_cells(conn, zoom, bounds)
+    if cells.empty:
+        return m
+
+    salaries = cells["median_salary"].dropna()
+    colormap = cm.linear.YlOrRd_09.scale(*(salaries.quantile([0.05, 0.95]) if not salaries.empty else (0, 1)))
+    colormap.caption = "Median salary (£)"
+    colormap.add_to(m)
+
+    for cell in cells.itertuples():
+        salary = f"£{cell.median_salary:,.0f}" if pd.notna(cell.median_salary) else "n/a"
+        tooltip = f"{cell.n_jobs} job(s) · median {salary}"
+        color = colormap(cell.median_salary) if pd.notna(cell.median_salary) else "#999999"
+        if layer == "clusters":
+            folium.CircleMarker(
+                [cell.latitude, cell.longitude], radius=4 + 3 * np.log1p(cell.n_jobs),
+                color=color, fill=True, fill_opacity=0.7, weight=1, tooltip=tooltip,
+            ).add_to(m)
+        else:
+            folium.Polygon(
+                hex_polygon(cell.q, cell.r, cell.zoom), color=color, weight=1,
+                fill=True, fill_opacity=0.55, tooltip=tooltip,
+            ).add_to(m)
+    return m
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Rebuild the hexagon layers and warm the county cache for every zoom
+    load_dotenv()
+    refresh_map_layers()
+    for zoom in range(MAP_ZOOMS[0], MAP_ZOOMS[-1] + 1):
+        counties = county_geometries(zoom)
+        print(f"🗺️ Counties at zoom {zoom}: {len(counties['features'])} features")
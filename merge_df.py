@@ -1,44 +1,61 @@
 import pandas as pd
 import glob
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def load_and_concat_job_data(directory: str, file_pattern: str = "*.csv"):
+# Declared column types so files are not re-inferred one by one
+JOB_CSV_DTYPES = {
+    "title": "string", "company": "string", "location": "string", "description": "string",
+    "redirect_url": "string", "search_query": "string", "search_location": "string",
+    "source": "string", "created": "string", "date_downloaded": "string",
+    "latitude": "float64", "longitude": "float64", "salary_min": "float64", "salary_max": "float64",
+}
+
+
+def _read_job_file(file, dtype, usecols):
+    # Extract job position and location from filename
+    filename = os.path.basename(file)
+    parts = filename.replace(".csv", "").split("__")
+    if len(parts) != 2:
+        print(f"Skipping file {filename}: incorrect filename format")
+        return None
+    job_position, location = parts
+
+    try:
+        # Read the CSV file
+        df = pd.read_csv(file, dtype=dtype, usecols=usecols)
+    except Exception as e:
+        print(f"Error reading {file}: {e}")
+        return None
+
+    # Add extracted job position and location as columns
+    df["job_position"] = job_position
+    df["location"] = location
+    return df
+
+
+def load_and_concat_job_data(directory: str, file_pattern: str = "*.csv", columns=None, max_workers: int = 8):
     """
     Reads all CSV files in the given directory matching the pattern,
     extracts job position and location from filenames,
     and concatenates them into a single DataFrame with error handling.
+    Files are read in parallel with declared column types.
     
     Args:
         directory (str): The directory containing the CSV files.
         file_pattern (str, optional): The pattern for CSV files. Default is "*.csv".
+        columns (list, optional): Only read these columns. Default is all.
+        max_workers (int, optional): Threads used to read files. Default is 8.
 
     Returns:
         pd.DataFrame: Concatenated DataFrame with added job_position and location columns.
     """
-    files = glob.glob(os.path.join(directory, file_pattern))
-    
-    all_dataframes = []
-    
-    for file in files:
-        try:
-            # Extract job position and location from filename
-            filename = os.path.basename(file)
-            parts = filename.replace(".csv", "").split("__")
-            if len(parts) != 2:
-                print(f"Skipping file {filename}: incorrect filename format")
-                continue
-            job_position, location = parts
-            
-            # Read the CSV file
-            df = pd.read_csv(file)
-            
-            # Add extracted job position and location as columns
-            df["job_position"] = job_position
-            df["location"] = location
-            
-            all_dataframes.append(df)
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
+    files = sorted(glob.glob(os.path.join(directory, file_pattern)))
+    dtype = {col: t for col, t in JOB_CSV_DTYPES.items() if columns is None or col in columns}
+    usecols = (lambda c: c in columns) if columns else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        all_dataframes = [df for df in pool.map(lambda f: _read_job_file(f, dtype, usecols), files) if df is not None]
     
     # Concatenate all DataFrames if there is data
     if all_dataframes:
@@ -47,6 +64,3 @@ def load_and_concat_job_data(directory: str, file_pattern: str = "*.csv"):
     else:
         print("No valid CSV files were processed.")
         return pd.DataFrame()  # Return an empty DataFrame if no files were processed
-
-
-
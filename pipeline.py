@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import pickle
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import timer, gauge, stage_profiler
+
+RUNS_DIR = "tmp_outputs/runs"
+COMPLETE_MARKER = "_complete.json"
+
+
+class PipelineRun:
+    """
+    Checkpointed execution of pipeline stages.
+    Every stage stores its output in tmp_outputs/runs/<run_id>/<stage>.pkl plus a <stage>.done
+    marker, so running the same run id again skips finished stages and resumes from the first
+    incomplete one.
+    """
+
+    def __init__(self, run_id=None, runs_dir=RUNS_DIR, resume=True):
+        self.runs_dir = runs_dir
+        if run_id is None and resume:
+            # Only auto-resume today's runs; older ones would reuse stale API results
+            run_id = latest_incomplete_run(runs_dir, since=datetime.now().strftime("%Y%m%d"))
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+        self.run_dir = os.path.join(runs_dir, self.run_id)
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def _artifact_path(self, stage):
+        return os.path.join(self.run_dir, f"{stage}.pkl")
+
+    def _marker_path(self, stage):
+        return os.path.join(self.run_dir, f"{stage}.done")
+
+    def is_done(self, stage):
+        return os.path.exists(self._marker_path(stage))
+
+    def load(self, stage):
+        path = self._artifact_path(stage)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def run_stage(self, stage, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) unless the stage already completed in this run,
+        in which case its stored output is returned.
+        """
+        if self.is_done(stage):
+            print(f"⏭️ [{self.run_id}] {stage}: already done, reusing checkpoint")
+            return self.load(stage)
+
+        print(f"▶️ [{self.run_id}] {stage}")
+        start = time.perf_counter()
+        with timer("stage", stage=stage), stage_profiler(stage, self.run_dir):
+            result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if result is not None:
+            tmp_path = self._artifact_path(stage) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._artifact_path(stage))
+
+        rows = len(result) if hasattr(result, "__len__") else None
+        if rows is not None:
+            gauge("stage_rows", rows, stage=stage)
+        with open(self._marker_path(stage), "w") as f:
+            json.dump({"stage": stage, "rows": rows, "seconds": round(elapsed, 3), "finished": datetime.now().isoformat()}, f)
+        print(f"✅ [{self.run_id}] {stage} finished in {elapsed:.1f}s")
+        return result
+
+    def run_parallel(self, stages):
+        """
+        Runs independent stages concurrently.
+
+        Parameters:
+            stages (dict): stage name -> (func, args tuple)
+
+        Returns:
+            dict: stage name -> result
+        """
+        with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+            futures = {name: pool.submit(self.run_stage, name, func, *args) for name, (func, args) in stages.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def mark_complete(self):
+        with open(os.path.join(self.run_dir, COMPLETE_MARKER), "w") as f:
+            json.dump({"run_id": self.run_id, "finished": datetime.now().isoformat()}, f)
+
+
+def latest_incomplete_run(runs_dir=RUNS_DIR, since=None):
+    """
+    Returns the id of the most recent run that did not finish (optionally only run ids >= since), or None.
+    """
+    if not os.path.isdir(runs_dir):
+        return None
+    for run_id in sorted(os.listdir(runs_dir), reverse=True):
+        if since and run_id < since:
+            break
+        run_dir = os.path.join(runs_dir, run_id)
+        if os.path.isdir(run_dir) and not os.path.exists(os.path.join(run_dir, COMPLETE_MARKER)):
+            return run_id
+    return None
@@ -7,18 +7,34 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sqlalchemy import create_engine, text
 import joblib
+from instrumentation import timer, gauge
+from text_normalization import normalize_text
+from job_partitions import window_start
 
-def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/metrics_results.csv'):
+def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/metrics_results.csv', window_days=None):
     db_url = os.getenv("DB_PARAMETERS")
     if not db_url:
         raise ValueError("❌ Environment variable DB_PARAMETERS is not set.")
 
+    # With window_days, train on and predict for the jobs created in the last N days only
+    since = window_start(window_days)
     engine = create_engine(db_url)
-    df = pd.read_sql("SELECT job_id, title, description, salary_min, salary_max FROM jobs", engine)
-
-    df['title'] = df['title'].fillna('')
-    df['description'] = df['description'].fillna('')
-    df['text'] = df['title'] + ' ' + df['description']
+    df = pd.read_sql(text(f"""
+        SELECT j.job_id, j.normalized_title, d.normalized_description, j.title, d.description,
+               j.salary_min, j.salary_max, j.salary_min_outlier, j.salary_max_outlier,
+               j.predicted_salary_min AS previous_salary_min, j.predicted_salary_max AS previous_salary_max
+        FROM jobs j
+        LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+        {"" if since is None else "WHERE j.created >= :since"}
+    """), engine, params={"since": since})
+    df[['salary_min_outlier', 'salary_max_outlier']] = df[['salary_min_outlier', 'salary_max_outlier']].fillna(False).astype(bool)
+
+    # Normalized at ingest; only rows loaded before that (see text_normalization.py) are cleaned here
+    missing_title = df['normalized_title'].isna()
+    df.loc[missing_title, 'normalized_title'] = normalize_text(df.loc[missing_title, 'title'])
+    missing_description = df['normalized_description'].isna()
+    df.loc[missing_description, 'normalized_description'] = normalize_text(df.loc[missing_description, 'description'])
+    df['text'] = df['normalized_title'] + ' ' + df['normalized_description']
 
     os.makedirs(model_dir, exist_ok=True)
     tfidf_path = os.path.join(model_dir, 'tfidf.joblib')
@@ -27,15 +43,19 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
         tfidf = joblib.load(tfidf_path)
     else:
         tfidf = TfidfVectorizer(max_features=1000, stop_words='english')
-        tfidf.fit(df['text'])
+        with timer("model_fit", model="tfidf"):
+            tfidf.fit(df['text'])
         joblib.dump(tfidf, tfidf_path)
 
-    X_all = tfidf.transform(df['text'])
+    with timer("vectorize", model="tfidf"):
+        X_all = tfidf.transform(df['text'])
+    gauge("training_rows", len(df))
 
     metrics = []
 
     # ----- salary_min -----
-    df_min_train = df[df['salary_min'].notna()]
+    # Flagged outliers (see salary_outliers.py) are kept out of training but are not re-predicted
+    df_min_train = df[df['salary_min'].notna() & ~df['salary_min_outlier']]
     df_min_missing = df[df['salary_min'].isna()]
     model_min_path = os.path.join(model_dir, 'model_salary_min.joblib')
 
@@ -47,11 +67,13 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
             model_min = joblib.load(model_min_path)
         else:
             model_min = RandomForestRegressor(n_estimators=100, random_state=42)
-            model_min.fit(X_min_train, y_min_train)
+            with timer("model_fit", model="salary_min"):
+                model_min.fit(X_min_train, y_min_train)
             joblib.dump(model_min, model_min_path)
 
         X_eval, X_test, y_eval, y_test = train_test_split(X_min_train, y_min_train, test_size=0.2, random_state=42)
-        y_pred = model_min.predict(X_test)
+        with timer("model_predict", model="salary_min"):
+            y_pred = model_min.predict(X_test)
 
         mae = mean_absolute_error(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
@@ -60,13 +82,16 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
         print(f"📉 MAE (salary_min): £{mae:.2f} | RMSE: {rmse:.2f} | R²: {r2:.3f}")
 
         if not df_min_missing.empty:
-            preds_min = model_min.predict(tfidf.transform(df_min_missing['text']))
+            with timer("vectorize", model="tfidf"):
+                X_min_missing = tfidf.transform(df_min_missing['text'])
+            with timer("model_predict", model="salary_min"):
+                preds_min = model_min.predict(X_min_missing)
             df.loc[df['salary_min'].isna(), 'predicted_salary_min'] = preds_min
     else:
         print("⚠️ No training data for salary_min")
 
     # ----- salary_max -----
-    df_max_train = df[df['salary_max'].notna()]
+    df_max_train = df[df['salary_max'].notna() & ~df['salary_max_outlier']]
     df_max_missing = df[df['salary_max'].isna()]
     model_max_path = os.path.join(model_dir, 'model_salary_max.joblib')
 
@@ -78,11 +103,13 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
             model_max = joblib.load(model_max_path)
         else:
             model_max = RandomForestRegressor(n_estimators=100, random_state=42)
-            model_max.fit(X_max_train, y_max_train)
+            with timer("model_fit", model="salary_max"):
+                model_max.fit(X_max_train, y_max_train)
             joblib.dump(model_max, model_max_path)
 
         X_eval, X_test, y_eval, y_test = train_test_split(X_max_train, y_max_train, test_size=0.2, random_state=42)
-        y_pred = model_max.predict(X_test)
+        with timer("model_predict", model="salary_max"):
+            y_pred = model_max.predict(X_test)
 
         mae = mean_absolute_error(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
@@ -91,7 +118,10 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
         print(f"📉 MAE (salary_max): £{mae:.2f} | RMSE: {rmse:.2f} | R²: {r2:.3f}")
 
         if not df_max_missing.empty:
-            preds_max = model_max.predict(tfidf.transform(df_max_missing['text']))
+            with timer("vectorize", model="tfidf"):
+                X_max_missing = tfidf.transform(df_max_missing['text'])
+            with timer("model_predict", model="salary_max"):
+                preds_max = model_max.predict(X_max_missing)
             df.loc[df['salary_max'].isna(), 'predicted_salary_max'] = preds_max
     else:
         print("⚠️ No training data for salary_max")
@@ -100,6 +130,13 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
     pd.DataFrame(metrics).to_csv(metrics_path, index=False)
 
     # ----- Update database -----
+    # Saved models re-predict the same value for an unchanged job; only write (and bump updated_at,
+    # which the report extract follows) where the prediction is new or different
+    for target in ('salary_min', 'salary_max'):
+        if f'predicted_{target}' in df:
+            previous = pd.to_numeric(df[f'previous_{target}'], errors='coerce')
+            df.loc[np.isclose(df[f'predicted_{target}'], previous), f'predicted_{target}'] = np.nan
+
     updated = df[(df['predicted_salary_min'].notna()) | (df['predicted_salary_max'].notna())]
     with engine.begin() as conn:
         for _, row in updated.iterrows():
@@ -117,7 +154,7 @@ def predict_and_update_salaries(model_dir='models', metrics_path='tmp_outputs/me
             if update_fields:
                 query_str = f"""
                     UPDATE jobs
-                    SET {', '.join(update_fields)}
+                    SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
                     WHERE job_id = :job_id
                 """
                 conn.execute(text(query_str), update_data)
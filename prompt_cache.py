@@ -0,0 +1,70 @@
+import os
+import time
+import pickle
+import hashlib
+
+# --- Where evaluated prompt prefixes are persisted between restarts ---
+PROMPT_CACHE_DIR = os.getenv("PROMPT_CACHE_DIR", "models/prompt_cache")
+
+
+def _prefix_key(llm, prefix):
+    """
+    Builds a stable key for a (model, context size, prefix) combination so a cached
+    KV state is never restored into a different model or prompt.
+    """
+    model_path = getattr(llm, "model_path", "")
+    n_ctx = llm.n_ctx() if callable(getattr(llm, "n_ctx", None)) else 0
+    raw = f"{model_path}|{n_ctx}|{prefix}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def load_prefix_state(llm, prefix, cache_dir=PROMPT_CACHE_DIR):
+    """
+    Returns the llama.cpp state after evaluating the static prompt prefix.
+    The state is read from disk when available, otherwise the prefix is evaluated once
+    and the resulting KV state is saved for the next restart.
+
+    Parameters:
+        llm (llama_cpp.Llama): Loaded model.
+        prefix (str): Static part of the prompt (schema / system instructions).
+        cache_dir (str): Directory holding the pickled states.
+
+    Returns:
+        llama_cpp.LlamaState: State to restore before each question.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    state_path = os.path.join(cache_dir, f"{_prefix_key(llm, prefix)}.pkl")
+
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, "rb") as f:
+                state = pickle.load(f)
+            llm.load_state(state)
+            print(f"✅ Prompt prefix restored from {state_path}")
+            return state
+        except Exception as e:
+            print(f"⚠️ Could not restore prompt cache '{state_path}': {e}")
+
+    start = time.perf_counter()
+    llm.reset()
+    llm.eval(llm.tokenize(prefix.encode("utf-8")))
+    state = llm.save_state()
+    print(f"🧠 Prompt prefix evaluated in {time.perf_counter() - start:.2f}s")
+
+    with open(state_path, "wb") as f:
+        pickle.dump(state, f)
+
+    return state
+
+
+def stream_completion(llm, prompt, prefix_state=None, **kwargs):
+    """
+    Yields generated text pieces for the prompt as llama.cpp produces them.
+    When a prefix state is given it is restored first, so llama.cpp only evaluates the
+    tokens that come after the cached prefix.
+    """
+    if prefix_state is not None:
+        llm.load_state(prefix_state)
+
+    for chunk in llm(prompt=prompt, stream=True, **kwargs):
+        yield chunk["choices"][0]["text"]
@@ -5,13 +5,15 @@ import os
 import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
+from instrumentation import timer, incr
 
 load_dotenv()
 API_KEY = os.getenv("REED_API_KEY")
+REED_API_URL = os.getenv("REED_API_URL", "https://www.reed.co.uk/api/1.0/search")
 time_sleep = 0.25
 
 def get_reed_jobs(job_title, location, total_results=1000, results_per_page=100):
-    url = "https://www.reed.co.uk/api/1.0/search"
+    url = REED_API_URL
     auth_value = base64.b64encode(f"{API_KEY}:".encode()).decode()
     headers = {"Accept": "application/json", "Authorization": f"Basic {auth_value}"}
     all_jobs = []
@@ -24,12 +26,15 @@ def get_reed_jobs(job_title, location, total_results=1000, results_per_page=100)
             "resultsToSkip": skip
         }
 
-        response = requests.get(url, headers=headers, params=params)
+        with timer("http_request", service="reed"):
+            response = requests.get(url, headers=headers, params=params)
+        incr("http_responses", service="reed", status=response.status_code)
         if response.status_code == 200:
             jobs = response.json().get("results", [])
             if not jobs: break
             all_jobs.extend(jobs)
-            time.sleep(time_sleep)
+            with timer("rate_limit_sleep", service="reed"):
+                time.sleep(time_sleep)
         else:
             print(f"❌ REED error {response.status_code}: {response.text}")
             break
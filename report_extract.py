@@ -0,0 +1,327 @@
+"""
+Incremental Parquet extract for the Power BI report (Jobs.pbix).
+
+Instead of pulling every table from PostgreSQL on each refresh, the report reads a local extract:
+
+    tmp_outputs/report_extract/jobs/created_month=YYYY-MM/part-0.parquet     one denormalized row per job
+    tmp_outputs/report_extract/facts/created_month=YYYY-MM/part-0.parquet    daily counts and salary sums (optional)
+    tmp_outputs/report_extract/_watermark.json                               last exported jobs.updated_at
+
+jobs.updated_at is set on insert and by every later update the report shows (predicted salaries,
+outlier flags, company merges), so each export only reads the jobs changed since the watermark, less
+REPORT_WATERMARK_OVERLAP minutes (rows already exported with the same updated_at are skipped). Those
+rows replace their previous version in their month's partition; other months are not touched.
+Company, location, level and search columns are dictionary-encoded.
+
+Usage (from the repository root):
+    python report_extract.py            export the jobs changed since the last export
+    python report_extract.py full       rebuild the extract from the whole jobs table
+"""
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+EXTRACT_DIR = os.getenv("REPORT_EXTRACT_DIR", "tmp_outputs/report_extract")
+WATERMARK_FILE = "_watermark.json"
+PARTITION_COLUMN = "created_month"
+# PostgreSQL stamps now() with the transaction's start time, so a job committed just after an export
+# can carry an updated_at below its watermark. Each export re-reads this window and skips the jobs
+# whose (job_id, updated_at) the extract already holds.
+WATERMARK_OVERLAP = timedelta(minutes=int(os.getenv("REPORT_WATERMARK_OVERLAP", "10")))
+
+DICTIONARY_COLUMNS = ["company", "location", "job_level", "source", "search_query", "search_location"]
+
+EXTRACT_SCHEMA = pa.schema([
+    ("job_id", pa.int64()),
+    ("title", pa.string()),
+    ("company", pa.dictionary(pa.int32(), pa.string())),
+    ("location", pa.dictionary(pa.int32(), pa.string())),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("job_level", pa.dictionary(pa.int32(), pa.string())),
+    ("source", pa.dictionary(pa.int32(), pa.string())),
+    ("search_query", pa.dictionary(pa.int32(), pa.string())),
+    ("search_location", pa.dictionary(pa.int32(), pa.string())),
+    ("salary_min", pa.float64()),
+    ("salary_max", pa.float64()),
+    ("predicted_salary_min", pa.float64()),
+    ("predicted_salary_max", pa.float64()),
+    ("salary_min_outlier", pa.bool_()),
+    ("salary_max_outlier", pa.bool_()),
+    ("redirect_url", pa.string()),
+    ("description", pa.string()),
+    ("created", pa.timestamp("s")),
+    ("date_downloaded", pa.timestamp("s")),
+    ("updated_at", pa.timestamp("us")),
+])
+
+FACT_KEYS = ["created_date", "job_level", "search_location", "source"]
+
+# One row per job: the first search that returned it stands for its metadata
+EXTRACT_SQL = """
+    SELECT j.job_id, j.title, c.company_name AS company, l.location_name AS location,
+           l.latitude, l.longitude, jl.level_name AS job_level, j.source,
+           m.search_query, m.search_location,
+           j.salary_min, j.salary_max, j.predicted_salary_min, j.predicted_salary_max,
+           j.salary_min_outlier, j.salary_max_outlier, j.redirect_url, d.description,
+           j.created, m.date_downloaded, j.updated_at
+    FROM jobs j
+    LEFT JOIN companies c ON c.company_id = j.company_id
+    LEFT JOIN locations l ON l.location_id = j.location_id
+    LEFT JOIN job_levels jl ON jl.job_level_id = j.job_level_id
+    LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    LEFT JOIN (
+        SELECT job_id, MIN(search_query) AS search_query, MIN(search_location) AS search_location,
+               MIN(date_downloaded) AS date_downloaded
+        FROM job_metadata
+        {metadata_filter}
+        GROUP BY job_id
+    ) m ON m.job_id = j.job_id
+    {job_filter}
+"""
+
+
+def ensure_updated_at(conn):
+    """
+    Adds jobs.updated_at and its index to databases created before the report extract (PostgreSQL;
+    the column is part of database_tables.sql and of the SQLite benchmark schema).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at)"))
+
+
+def load_watermark(extract_dir=EXTRACT_DIR):
+    path = os.path.join(extract_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(watermark, extract_dir=EXTRACT_DIR):
+    # Written last and atomically: an export interrupted before this point is simply redone
+    path = os.path.join(extract_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _since(conn, watermark):
+    """
+    Lower bound of the next export: the watermark less WATERMARK_OVERLAP.
+    """
+    since = datetime.fromisoformat(watermark["updated_at"]) - WATERMARK_OVERLAP
+    # SQLite compares the timestamps as text, so use its CURRENT_TIMESTAMP layout
+    return since.strftime("%Y-%m-%d %H:%M:%S") if conn.dialect.name == "sqlite" else since
+
+
+def changed_jobs(conn, since=None):
+    """
+    Reads the denormalized rows of the jobs updated at or after `since` (all jobs when None).
+    """
+    if since is None:
+        job_filter = metadata_filter = ""
+    else:
+        job_filter = "WHERE j.updated_at >= :since"
+        metadata_filter = "WHERE job_id IN (SELECT job_id FROM jobs WHERE updated_at >= :since)"
+    query = EXTRACT_SQL.format(job_filter=job_filter, metadata_filter=metadata_filter)
+    return pd.read_sql(text(query), conn, params={"since": since} if since is not None else {})
+
+
+def _timestamps(values, unit):
+    return pd.to_datetime(values, errors="coerce", format="mixed", utc=True).dt.tz_localize(None).astype(f"datetime64[{unit}]")
+
+
+def _to_table(df):
+    """
+    Coerces extract rows to EXTRACT_SCHEMA (missing columns become nulls).
+    """
+    df = df.copy()
+    for col in ("created", "date_downloaded", "updated_at"):
+        if col in df:
+            df[col] = _timestamps(df[col], "us" if col == "updated_at" else "s")
+
+    arrays = []
+    for field in EXTRACT_SCHEMA:
+        if field.name not in df:
+            arrays.append(pa.nulls(len(df), type=field.type))
+            continue
+        values = df[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values.astype("string"), type=pa.string(), from_pandas=True).dictionary_encode())
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array(values.astype("string"), type=pa.string(), from_pandas=True))
+        elif pa.types.is_floating(field.type):
+            arrays.append(pa.array(pd.to_numeric(values, errors="coerce"), type=field.type, from_pandas=True))
+        elif pa.types.is_boolean(field.type):
+            arrays.append(pa.array(values.fillna(False).astype(bool), type=field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=EXTRACT_SCHEMA)
+
+
+def _months(df):
+    return pd.to_datetime(df["created"], errors="coerce", format="mixed", utc=True).dt.strftime("%Y-%m").fillna("unknown")
+
+
+def _partition_path(extract_dir, kind, month):
+    return os.path.join(extract_dir, kind, f"{PARTITION_COLUMN}={month}", "part-0.parquet")
+
+
+def _write(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + ".tmp", compression="zstd", use_dictionary=[c for c in table.column_names if c in DICTIONARY_COLUMNS])
+    os.replace(path + ".tmp", path)
+
+
+def drop_exported(df, extract_dir=EXTRACT_DIR):
+    """
+    Leaves out the rows whose (job_id, updated_at) is already in their month partition, i.e. the
+    unchanged jobs re-read by the watermark overlap.
+    """
+    months = _months(df)
+    keys = pd.MultiIndex.from_arrays([df["job_id"].astype("int64"), _timestamps(df["updated_at"], "us")])
+    exported = np.zeros(len(df), dtype=bool)
+    for month in months.unique():
+        path = _partition_path(extract_dir, "jobs", month)
+        if not os.path.exists(path):
+            continue
+        existing = pq.read_table(path, columns=["job_id", "updated_at"]).to_pandas()
+        existing_keys = pd.MultiIndex.from_arrays([existing["job_id"].astype("int64"), existing["updated_at"].astype("datetime64[us]")])
+        in_month = (months == month).to_numpy()
+        exported[in_month] = keys[in_month].isin(existing_keys)
+    return df[~exported]
+
+
+def upsert_partitions(df, extract_dir=EXTRACT_DIR):
+    """
+    Replaces the previous version of each changed job in its month partition and appends new jobs.
+
+    Returns:
+        dict: {month: rows in the partition after the upsert} for the months rewritten.
+    """
+    months = _months(df)
+    rewritten = {}
+    for month in sorted(months.unique()):
+        batch = df[(months == month).values]
+        path = _partition_path(extract_dir, "jobs", month)
+        if os.path.exists(path):
+            existing = pq.read_table(path).to_pandas()
+            batch = pd.concat([existing[~existing["job_id"].isin(batch["job_id"])], batch], ignore_index=True)
+        batch = batch.sort_values("job_id")
+        _write(_to_table(batch), path)
+        rewritten[month] = len(batch)
+    return rewritten
+
+
+def fact_table(df):
+    """
+    Daily job counts and salary sums per level, search location and source. Salaries are the
+    advertised ones where known, else the predicted ones; flagged outliers are left out, so the
+    report's averages are sum / n.
+    """
+    df = df.copy()
+    df["created_date"] = pd.to_datetime(df["created"], errors="coerce").dt.normalize()
+    for target in ("salary_min", "salary_max"):
+        value = df[target].fillna(df[f"predicted_{target}"]).where(~df[f"{target}_outlier"].fillna(False).astype(bool))
+        df[f"n_{target}"] = value.notna().astype(int)
+        df[f"sum_{target}"] = value.fillna(0)
+        df[f"n_predicted_{target}"] = (df[target].isna() & df[f"predicted_{target}"].notna()).astype(int)
+
+    keys = df[FACT_KEYS].astype("string").fillna("")
+    keys["created_date"] = df["created_date"]
+    grouped = df.assign(**keys).groupby(FACT_KEYS, dropna=False)
+    facts = grouped.agg(
+        n_jobs=("job_id", "size"),
+        n_salary_min=("n_salary_min", "sum"), sum_salary_min=("sum_salary_min", "sum"),
+        n_predicted_salary_min=("n_predicted_salary_min", "sum"),
+        n_salary_max=("n_salary_max", "sum"), sum_salary_max=("sum_salary_max", "sum"),
+        n_predicted_salary_max=("n_predicted_salary_max", "sum"),
+    ).reset_index()
+    for col in ("job_level", "search_location", "source"):
+        facts[col] = facts[col].replace("", pd.NA)
+    return facts
+
+
+def refresh_facts(months, extract_dir=EXTRACT_DIR):
+    """
+    Recomputes the fact partitions of the given months from the job partitions.
+    """
+    columns = ["job_id", "created", *FACT_KEYS[1:], "salary_min", "salary_max", "predicted_salary_min",
+               "predicted_salary_max", "salary_min_outlier", "salary_max_outlier"]
+    for month in months:
+        jobs = pq.read_table(_partition_path(extract_dir, "jobs", month), columns=columns).to_pandas()
+        for col in FACT_KEYS[1:]:
+            jobs[col] = jobs[col].astype("string")
+        facts = pa.Table.from_pandas(fact_table(jobs), preserve_index=False)
+        for col in FACT_KEYS[1:]:
+            facts = facts.set_column(facts.schema.get_field_index(col), col, facts.column(col).dictionary_encode())
+        _write(facts, _partition_path(extract_dir, "facts", month))
+
+
+def export_report_extract(conn, extract_dir=EXTRACT_DIR, facts=None, full=False):
+    """
+    Exports the jobs inserted or updated since the last export to the report extract.
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        extract_dir (str): Root of the extract.
+        facts (bool): Also refresh the fact table (default: REPORT_FACTS, on unless set to 0).
+        full (bool): Drop the extract and export every job.
+
+    Returns:
+        int: Number of job rows exported.
+    """
+    if facts is None:
+        facts = os.getenv("REPORT_FACTS", "1") != "0"
+    ensure_updated_at(conn)
+
+    if full and os.path.isdir(extract_dir):
+        shutil.rmtree(extract_dir)
+    os.makedirs(extract_dir, exist_ok=True)
+    watermark = None if full else load_watermark(extract_dir)
+    since = _since(conn, watermark) if watermark else None
+
+    df = drop_exported(changed_jobs(conn, since), extract_dir)
+    if df.empty:
+        print("✅ Report extract is up to date.")
+        return 0
+
+    rewritten = upsert_partitions(df, extract_dir)
+    if facts:
+        refresh_facts(rewritten, extract_dir)
+
+    # Stored as the database returned it: fractional seconds only when the column has them
+    latest = pd.to_datetime(df["updated_at"], format="mixed").max()
+    if watermark:
+        # The overlap can return only rows older than the watermark; never move it back
+        latest = max(latest, pd.Timestamp(watermark["updated_at"]))
+    save_watermark({
+        "updated_at": latest.isoformat(sep=" "),
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(df),
+    }, extract_dir)
+    print(f"📤 Report extract: {len(df)} job(s) exported, {len(rewritten)} month partition(s) rewritten.")
+    return len(df)
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("", "full"):
+        print("Usage: python report_extract.py [full]")
+        sys.exit(1)
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        export_report_extract(conn, full=command == "full")
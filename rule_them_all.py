@@ -1,4 +1,5 @@
 import os
+import argparse
 import pandas as pd
 from reed_api import get_reed_jobs
 from adzuna_api import get_adzuna_jobs
@@ -10,82 +11,215 @@ from check_duplicates import remove_duplicates, filter_new_jobs_from_api
 from dotenv import load_dotenv
 from datetime import datetime
 from predict_and_update_salaries import predict_and_update_salaries
-
-if __name__ == "__main__":
-    queries = ["data analyst", "data science", "GIS"]
-    locations = ["England", "Scotland", "Wales", "Northern Ireland", "remote"]
-
-    all_dfs = []
-
-    for query in queries:
-        for location in locations:
+from salary_streaming import stream_and_update_salaries
+from job_embeddings import embed_new_jobs, EMBEDDING_MODEL_PATH, EMBEDDING_DIR
+from job_archive import write_snapshot, ARCHIVE_DIR
+from report_extract import export_report_extract, EXTRACT_DIR
+from term_stats import update_term_stats, export_eda_csvs, STORE_DIR
+from pipeline import PipelineRun
+from instrumentation import instrument_sqlalchemy, write_report
+from map_layers import refresh_map_layers
+from text_normalization import add_normalized_text, normalized_text
+from job_partitions import archive_partitions, read_window_days
+from sqlalchemy import create_engine
+
+QUERIES = ["data analyst", "data science", "GIS"]
+LOCATIONS = ["England", "Scotland", "Wales", "Northern Ireland", "remote"]
+REED_RESULTS_PER_CELL = 1000
+ADZUNA_RESULTS_PER_CELL = 100
+
+# Where the stages write (benchmarks/bench_pipeline.py points these at a scratch directory)
+MODEL_DIR = "models"
+METRICS_PATH = "tmp_outputs/metrics_results.csv"
+TERM_STATS_DIR = STORE_DIR
+EDA_DIR = "EDA"
+SNAPSHOT_DIR = ARCHIVE_DIR
+REPORT_EXTRACT_DIR = EXTRACT_DIR
+
+
+# ---------------- Stages ----------------
+
+def fetch_reed():
+    raw_dfs = []
+    for query in QUERIES:
+        for location in LOCATIONS:
             print(f"📥 REED: {query} in {location}")
-            df = get_reed_jobs(query, location)
+            df = get_reed_jobs(query, location, total_results=REED_RESULTS_PER_CELL)
             if not df.empty:
-                all_dfs.append(standardize_dataframe(df, source="reed"))
+                raw_dfs.append(df)
+    return raw_dfs
+
 
-    for query in queries:
-        for location in locations:
+def fetch_adzuna():
+    raw_dfs = []
+    for query in QUERIES:
+        for location in LOCATIONS:
             print(f"📥 ADZUNA: {query} in {location}")
-            df = get_adzuna_jobs(query, location, total_results=100)
+            df = get_adzuna_jobs(query, location, total_results=ADZUNA_RESULTS_PER_CELL)
             if not df.empty:
                 df["search_query"] = query
                 df["search_location"] = location
                 df["date_downloaded"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                all_dfs.append(standardize_dataframe(df, source="adzuna"))
+                raw_dfs.append(df)
+    return raw_dfs
+
 
-    
-   
+def standardize(reed_dfs, adzuna_dfs):
+    return [standardize_dataframe(df, source="reed") for df in reed_dfs] + \
+           [standardize_dataframe(df, source="adzuna") for df in adzuna_dfs]
+
+
+def normalize(standard_dfs):
+    # Clean title and description once; every later stage reads the normalized columns
+    return add_normalized_text(standard_dfs)
+
+
+def dedup(df):
     # remove duplicates
-    clean_df = remove_duplicates(all_dfs)
+    clean_df = remove_duplicates(df)
 
     # remove barista jobs
-    clean_df = clean_df[~(clean_df['title'].str.contains('barista', case=False, na=False) | clean_df['description'].str.contains('barista', case=False, na=False))]
+    clean_df = clean_df[~normalized_text(clean_df).str.contains('barista', regex=False)]
+    return clean_df.reset_index(drop=True)
 
 
-    # remove existing jobs from the database
+def filter_new(df):
+    # With READ_WINDOW_DAYS set, only the recent jobs partitions are compared
+    return filter_new_jobs_from_api(df, read_window_days())
 
-    new_jobs_from_api_df = filter_new_jobs_from_api(clean_df)
 
+def geocode(df):
+    return add_lat_long_if_missing(df.copy(), location_column="location")[["latitude", "longitude"]]
 
-    
-    if not new_jobs_from_api_df.empty:
-        coords_df = new_jobs_from_api_df.copy() 
-        print(f"✅ Combined dataset has {len(coords_df)} rows")
-        coords_df = add_lat_long_if_missing(coords_df, location_column="location")
 
-        ## Assign job levels
-        job_levels_df = assign_job_level(coords_df)
+def level(df):
+    return assign_job_level(df.copy())[["job_level"]]
 
-        ## Calculate missing salaries
-        #calculated_salaries_df = predict_missing_salaries(job_levels_df)
 
-        ## Import to the database
-        print(f"✅ Final dataset loaded with {len(job_levels_df)} rows")
-        if job_levels_df.empty:
-            raise ValueError("The DataFrame is empty. Please check the data source.")
-        ## Import to the database
-        DB_PARAMETERS = os.getenv("DB_PARAMETERS")
-        if not DB_PARAMETERS:
-            raise ValueError("Database parameters not found in environment variables.")
-        
-        df_to_db(job_levels_df, DB_PARAMETERS)
+def load(df):
+    print(f"✅ Final dataset loaded with {len(df)} rows")
+    if df.empty:
+        raise ValueError("The DataFrame is empty. Please check the data source.")
 
+    DB_PARAMETERS = os.getenv("DB_PARAMETERS")
+    if not DB_PARAMETERS:
+        raise ValueError("Database parameters not found in environment variables.")
 
-        ## Predict and update salaries
-        load_dotenv()  # Load variables from .env file
-        print("🚀 New data has been inserted into the DB (simulated).")
-        predict_and_update_salaries()
+    # df_to_db parses dates in place; keep the caller's copy untouched for the snapshot
+    return df_to_db(df.copy(), DB_PARAMETERS, window_days=read_window_days())
 
-        ## Save the final dataset
-        os.makedirs("tmp_outputs", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")  # e.g., 20250507194500
-        filename = f"tmp_outputs/all_jobs_{timestamp}.csv"
-        job_levels_df.to_csv(filename, index=False)
-        print(f"✅ Final dataset saved with {len(job_levels_df)} rows")
+
+def index(inserted_df):
+    ## Add the newly inserted jobs to the keyword statistics and refresh the EDA outputs
+    if update_term_stats(inserted_df, TERM_STATS_DIR):
+        export_eda_csvs(TERM_STATS_DIR, EDA_DIR)
+
+    ## Embed the newly inserted jobs for similarity search
+    if os.path.exists(EMBEDDING_MODEL_PATH):
+        embed_new_jobs(inserted_df, EMBEDDING_DIR)
+    else:
+        print(f"⚠ Embedding model not found at {EMBEDDING_MODEL_PATH}, skipping embeddings.")
+    return True
+
+
+def predict():
+    # SALARY_TRAINING=streaming trains out of core instead of loading every job into memory
+    if os.getenv("SALARY_TRAINING") == "streaming":
+        stream_and_update_salaries(MODEL_DIR, METRICS_PATH, window_days=read_window_days())
     else:
+        predict_and_update_salaries(MODEL_DIR, METRICS_PATH, window_days=read_window_days())
+    return True
+
+
+def map_layers():
+    ## Re-aggregate the dashboard map (after predict, so predicted salaries are in the medians)
+    return refresh_map_layers()
+
+
+def snapshot(df):
+    ## Save the final dataset to the date-partitioned Parquet archive
+    write_snapshot(df, SNAPSHOT_DIR)
+    print(f"✅ Final dataset saved with {len(df)} rows")
+    return True
+
+
+def retention():
+    ## Move monthly partitions past PARTITION_HOT_MONTHS to the Parquet archive
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        return archive_partitions(conn, embedding_dir=EMBEDDING_DIR, term_stats_dir=TERM_STATS_DIR)
+
+
+def report_extract():
+    ## Append the jobs inserted or updated this run (new rows, predicted salaries) to the Power BI extract
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        return export_report_extract(conn, REPORT_EXTRACT_DIR)
+
+
+# ---------------- Pipeline ----------------
+
+def run_pipeline(run_id=None, resume=True):
+    """
+    Runs (or resumes) the daily pipeline. Each stage is checkpointed under tmp_outputs/runs/<run_id>,
+    so after a failure the next call picks up at the failed stage instead of refetching everything.
+    """
+    run = PipelineRun(run_id, resume=resume)
+    print(f"🏁 Pipeline run {run.run_id}")
+    instrument_sqlalchemy()
+
+    try:
+        _run_stages(run)
+    finally:
+        # Written on failures too, so slow or failing stages can be inspected
+        write_report(run.run_dir, run.run_id)
+
+
+def _run_stages(run, skip=()):
+    """
+    The pipeline's stage sequence. Stages named in `skip` (index, predict, map_layers, snapshot,
+    retention, report_extract) are left out; the benchmark uses this to time a subset.
+    """
+    fetched = run.run_parallel({"fetch_reed": (fetch_reed, ()), "fetch_adzuna": (fetch_adzuna, ())})
+    standard_dfs = run.run_stage("standardize", standardize, fetched["fetch_reed"], fetched["fetch_adzuna"])
+    normalized_df = run.run_stage("normalize", normalize, standard_dfs)
+    clean_df = run.run_stage("dedup", dedup, normalized_df)
+
+    # remove existing jobs from the database
+    new_jobs_from_api_df = run.run_stage("filter_new", filter_new, clean_df)
+
+    if new_jobs_from_api_df.empty:
         print("⚠ No data collected.")
-    
-    
+    else:
+        print(f"✅ Combined dataset has {len(new_jobs_from_api_df)} rows")
+
+        # Geocoding (network bound) and level assignment (CPU bound) only read the new jobs
+        enriched = run.run_parallel({"geocode": (geocode, (new_jobs_from_api_df,)), "level": (level, (new_jobs_from_api_df,))})
+        job_levels_df = new_jobs_from_api_df.copy()
+        job_levels_df[["latitude", "longitude"]] = enriched["geocode"][["latitude", "longitude"]].values
+        job_levels_df["job_level"] = enriched["level"]["job_level"].values
+
+        inserted_df = run.run_stage("load", load, job_levels_df)
+
+        parallel = {"index": (index, (inserted_df,)), "predict": (predict, ())}
+        parallel = {name: stage for name, stage in parallel.items() if name not in skip}
+        if parallel:
+            run.run_parallel(parallel)
+        for name, stage, args in [("map_layers", map_layers, ()), ("snapshot", snapshot, (job_levels_df,))]:
+            if name not in skip:
+                run.run_stage(name, stage, *args)
+
+    # Retention and the report extract run every day, whether or not new jobs arrived
+    for name, stage in [("retention", retention), ("report_extract", report_extract)]:
+        if name not in skip:
+            run.run_stage(name, stage)
+    run.mark_complete()
+
+
+if __name__ == "__main__":
+    load_dotenv()  # Load variables from .env file
+
+    parser = argparse.ArgumentParser(description="Fetch, enrich and load the daily job postings.")
+    parser.add_argument("--run-id", help="Resume this run id (default: the latest unfinished run).")
+    parser.add_argument("--fresh", action="store_true", help="Start a new run even if an unfinished one exists.")
+    args = parser.parse_args()
 
-    
+    run_pipeline(args.run_id, resume=not args.fresh)
@@ -0,0 +1,237 @@
+"""
+Incremental salary outlier scoring.
+
+Every (job_level, region, target) group keeps a log-spaced salary histogram in the
+salary_histograms table. A histogram is an additive sketch: each batch only adds its own counts,
+and the group median and MAD are read back from the bins without rescanning jobs.
+New jobs are scored against those statistics with the modified z-score
+(0.6745 * |x - median| / MAD > OUTLIER_Z). The result is stored in jobs.salary_min_outlier /
+jobs.salary_max_outlier so that training and aggregates can skip outliers through
+idx_jobs_salary_inliers.
+
+The region is the search_location the job was downloaded for (England, Scotland, Wales, ...).
+Groups with fewer than MIN_GROUP_SIZE salaries fall back to the level across all regions, and
+then to all jobs.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+N_BINS = 480
+LOG_MIN, LOG_MAX = 0.0, 6.0  # £1 to £1M, ~3% wide bins; daily rates and annual salaries both fit
+OUTLIER_Z = 3.5
+MIN_GROUP_SIZE = 30
+ALL_LEVELS = 0
+ALL_REGIONS = "*"
+UNKNOWN_LEVEL = -1  # jobs without a level or region get a group of their own, never the "all" one
+UNKNOWN_REGION = "?"
+TARGETS = ("salary_min", "salary_max")
+
+_log_edges = np.linspace(LOG_MIN, LOG_MAX, N_BINS + 1)
+BIN_CENTERS = 10 ** ((_log_edges[:-1] + _log_edges[1:]) / 2)
+
+HISTOGRAM_UPSERT = """
+    INSERT INTO salary_histograms (job_level_id, region, target, bin, n)
+    VALUES (:job_level_id, :region, :target, :bin, :n)
+    ON CONFLICT (job_level_id, region, target, bin) DO UPDATE SET
+        n = salary_histograms.n + excluded.n
+"""
+
+
+def salary_bins(values):
+    """
+    Maps salaries to histogram bin numbers (-1 for missing or non-positive values).
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    bins = np.full(len(values), -1, dtype=int)
+    valid = np.isfinite(values) & (values > 0)
+    scaled = (np.log10(values[valid]) - LOG_MIN) / (LOG_MAX - LOG_MIN) * N_BINS
+    bins[valid] = np.clip(scaled.astype(int), 0, N_BINS - 1)
+    return bins
+
+
+def _grouped(df):
+    """
+    Expands each job into its three group keys: (level, region), (level, all) and (all, all).
+    """
+    level = pd.to_numeric(df["job_level_id"], errors="coerce").fillna(UNKNOWN_LEVEL).astype(int)
+    region = df["region"].fillna(UNKNOWN_REGION).astype(str)
+    return [
+        pd.DataFrame({"job_level_id": level, "region": region}),
+        pd.DataFrame({"job_level_id": level, "region": ALL_REGIONS}),
+        pd.DataFrame({"job_level_id": ALL_LEVELS, "region": ALL_REGIONS}, index=df.index),
+    ]
+
+
+def histogram_counts(df):
+    """
+    Counts a batch of jobs into histogram bins for every group it belongs to.
+
+    Parameters:
+        df (pd.DataFrame): Columns job_level_id, region, salary_min, salary_max.
+
+    Returns:
+        pd.DataFrame: job_level_id, region, target, bin, n
+    """
+    frames = []
+    for target in TARGETS:
+        bins = salary_bins(df[target])
+        for keys in _grouped(df):
+            keys = keys.assign(target=target, bin=bins)
+            frames.append(keys[keys["bin"] >= 0])
+
+    return pd.concat(frames).groupby(["job_level_id", "region", "target", "bin"]).size().rename("n").reset_index()
+
+
+def group_statistics(histograms):
+    """
+    Median and MAD of every group, read from its histogram.
+
+    Parameters:
+        histograms (pd.DataFrame): job_level_id, region, target, bin, n
+
+    Returns:
+        pd.DataFrame: job_level_id, region, target, n, median, mad
+    """
+    rows = []
+    for (level, region, target), group in histograms.groupby(["job_level_id", "region", "target"]):
+        counts = np.zeros(N_BINS)
+        np.add.at(counts, group["bin"].to_numpy(dtype=int), group["n"].to_numpy(dtype=float))
+        total = counts.sum()
+        if total == 0:
+            continue
+        median = _weighted_median(BIN_CENTERS, counts)
+        mad = _weighted_median(np.abs(BIN_CENTERS - median), counts)
+        rows.append({"job_level_id": level, "region": region, "target": target, "n": int(total), "median": median, "mad": mad})
+    return pd.DataFrame(rows, columns=["job_level_id", "region", "target", "n", "median", "mad"])
+
+
+def _weighted_median(values, weights):
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def score_salaries(df, stats):
+    """
+    Flags salary outliers for a batch of jobs in one vectorized pass per target.
+
+    Parameters:
+        df (pd.DataFrame): Columns job_level_id, region, salary_min, salary_max.
+        stats (pd.DataFrame): Output of group_statistics.
+
+    Returns:
+        pd.DataFrame: salary_min_outlier, salary_max_outlier (bool), aligned with df.
+    """
+    flags = pd.DataFrame(index=df.index)
+    usable = stats[(stats["n"] >= MIN_GROUP_SIZE) & (stats["mad"] > 0)]
+
+    for target in TARGETS:
+        target_stats = usable[usable["target"] == target][["job_level_id", "region", "median", "mad"]]
+        median = pd.Series(np.nan, index=df.index)
+        mad = pd.Series(np.nan, index=df.index)
+
+        # Most specific group first, falling back to wider ones where it is too small
+        for keys in _grouped(df):
+            matched = keys.merge(target_stats, on=["job_level_id", "region"], how="left")
+            matched.index = df.index
+            median = median.fillna(matched["median"])
+            mad = mad.fillna(matched["mad"])
+
+        values = pd.to_numeric(df[target], errors="coerce")
+        z = 0.6745 * (values - median).abs() / mad
+        flags[f"{target}_outlier"] = (z > OUTLIER_Z).fillna(False).astype(bool)
+    return flags
+
+
+def load_histograms(conn):
+    return pd.read_sql("SELECT job_level_id, region, target, bin, n FROM salary_histograms", conn)
+
+
+def _write_histograms(conn, counts):
+    if not counts.empty:
+        conn.execute(text(HISTOGRAM_UPSERT), counts.astype(object).to_dict("records"))
+
+
+def _write_flags(conn, job_ids, flags):
+    rows = [
+        {"job_id": int(job_id), "min_flag": bool(min_flag), "max_flag": bool(max_flag)}
+        for job_id, min_flag, max_flag in zip(job_ids, flags["salary_min_outlier"], flags["salary_max_outlier"])
+        if min_flag or max_flag  # the columns default to FALSE, so only outliers need writing
+    ]
+    if rows:
+        conn.execute(text("""
+            UPDATE jobs SET salary_min_outlier = :min_flag, salary_max_outlier = :max_flag, updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = :job_id
+        """), rows)
+    return len(rows)
+
+
+def update_outliers(conn, df):
+    """
+    Folds newly inserted jobs into the group histograms and flags their salary outliers.
+
+    Parameters:
+        conn: Open SQLAlchemy connection (normally the one df_to_db is inserting with).
+        df (pd.DataFrame): The inserted rows with job_id, job_level_id, search_location, salary_min, salary_max.
+    """
+    if df.empty:
+        return
+    batch = df[["job_id", "job_level_id", "salary_min", "salary_max"]].copy()
+    batch["region"] = df["search_location"].replace("", np.nan) if "search_location" in df else np.nan
+
+    _write_histograms(conn, histogram_counts(batch))
+    flags = score_salaries(batch, group_statistics(load_histograms(conn)))
+    flagged = _write_flags(conn, batch["job_id"], flags)
+    print(f"📐 Salary outliers: {flagged} of {len(batch)} new job(s) flagged.")
+
+
+def remove_from_histograms(conn, df):
+    """
+    Takes jobs that left the table (e.g. archived partitions) out of the group histograms again.
+
+    Parameters:
+        conn: Open SQLAlchemy connection.
+        df (pd.DataFrame): The removed jobs with job_level_id, region, salary_min, salary_max.
+    """
+    if df.empty:
+        return
+    counts = histogram_counts(df)
+    counts["n"] = -counts["n"]
+    _write_histograms(conn, counts)
+    conn.execute(text("DELETE FROM salary_histograms WHERE n <= 0"))
+
+
+def rebuild_outliers(conn):
+    """
+    Recomputes every histogram from the full jobs table and rescores all jobs
+    (initial backfill, or to refresh old flags after the distributions have drifted).
+    """
+    jobs = pd.read_sql("""
+        SELECT j.job_id, j.job_level_id, j.salary_min, j.salary_max, MIN(m.search_location) AS region
+        FROM jobs j
+        LEFT JOIN job_metadata m ON m.job_id = j.job_id
+        GROUP BY j.job_id, j.job_level_id, j.salary_min, j.salary_max
+    """, conn)
+
+    conn.execute(text("DELETE FROM salary_histograms"))
+    counts = histogram_counts(jobs)
+    _write_histograms(conn, counts)
+
+    conn.execute(text("""
+        UPDATE jobs SET salary_min_outlier = FALSE, salary_max_outlier = FALSE, updated_at = CURRENT_TIMESTAMP
+        WHERE salary_min_outlier OR salary_max_outlier
+    """))
+    flags = score_salaries(jobs, group_statistics(counts))
+    flagged = _write_flags(conn, jobs["job_id"], flags)
+    print(f"📐 Salary outliers rebuilt: {flagged} of {len(jobs)} job(s) flagged.")
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        rebuild_outliers(conn)
@@ -0,0 +1,214 @@
+"""
+Out-of-core salary model: streams jobs from the database in fixed-size chunks.
+
+predict_and_update_salaries loads every job (with its description) into memory, fits TF-IDF and two
+random forests. This mode keeps memory flat as the table grows:
+    - jobs are read through a server-side cursor, SALARY_CHUNK_SIZE rows at a time;
+    - text is vectorized with a stateless HashingVectorizer (no vocabulary pass);
+    - one SGDRegressor per target (salary_min, salary_max) is trained with partial_fit on
+      log salaries, over SALARY_PASSES passes of the stream;
+    - jobs with job_id % HOLDOUT_MODULUS == 0 are never trained on and are used for the metrics,
+      accumulated chunk by chunk.
+
+Missing salaries are then predicted in another streamed pass. Enable it in the pipeline with
+SALARY_TRAINING=streaming, or run `python salary_streaming.py`.
+"""
+import os
+import numpy as np
+import pandas as pd
+import joblib
+from sqlalchemy import create_engine, text
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDRegressor
+from instrumentation import timer, gauge
+from text_normalization import normalize_text
+from job_partitions import window_start
+
+CHUNK_SIZE = int(os.getenv("SALARY_CHUNK_SIZE", "5000"))
+PASSES = int(os.getenv("SALARY_PASSES", "5"))
+HOLDOUT_MODULUS = 10
+TARGETS = ("salary_min", "salary_max")
+
+VECTORIZER = HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), stop_words="english", alternate_sign=False)
+
+STREAM_SQL = """
+    SELECT j.job_id, j.normalized_title, d.normalized_description, j.title, d.description,
+           j.salary_min, j.salary_max, j.salary_min_outlier, j.salary_max_outlier,
+           j.predicted_salary_min AS previous_salary_min, j.predicted_salary_max AS previous_salary_max
+    FROM jobs j
+    LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+    {where}
+"""
+
+
+def stream_jobs(engine, where="", params=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields jobs in DataFrames of chunk_size rows, read through a server-side cursor
+    (stream_results), with the model text already built.
+    """
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as conn:
+        for chunk in pd.read_sql(text(STREAM_SQL.format(where=where)), conn, params=params or {}, chunksize=chunk_size):
+            chunk[["salary_min_outlier", "salary_max_outlier"]] = chunk[["salary_min_outlier", "salary_max_outlier"]].fillna(False).astype(bool)
+            # Only rows loaded before the normalized columns existed are normalized here
+            for column, raw in (("normalized_title", "title"), ("normalized_description", "description")):
+                missing = chunk[column].isna()
+                if missing.any():
+                    chunk.loc[missing, column] = normalize_text(chunk.loc[missing, raw])
+            chunk["text"] = chunk["normalized_title"] + " " + chunk["normalized_description"]
+            yield chunk
+
+
+def _training_rows(chunk, target):
+    salary = pd.to_numeric(chunk[target], errors="coerce")
+    return (salary > 0) & ~chunk[f"{target}_outlier"]
+
+
+def _window(window_days):
+    since = window_start(window_days)
+    return ("WHERE j.created >= :since", {"since": since}) if since is not None else ("", {})
+
+
+class _Metrics:
+    """
+    MAE / RMSE / R² accumulated over chunks (sums only, so memory does not grow).
+    """
+
+    def __init__(self):
+        self.n = self.abs_error = self.sq_error = self.sum_y = self.sum_y2 = 0.0
+
+    def add(self, y_true, y_pred):
+        error = y_true - y_pred
+        self.n += len(y_true)
+        self.abs_error += np.abs(error).sum()
+        self.sq_error += (error ** 2).sum()
+        self.sum_y += y_true.sum()
+        self.sum_y2 += (y_true ** 2).sum()
+
+    def result(self):
+        if self.n == 0:
+            return None
+        total = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {"MAE": self.abs_error / self.n, "RMSE": np.sqrt(self.sq_error / self.n), "R2": 1 - self.sq_error / total if total else np.nan}
+
+
+def _regressor():
+    # Absolute-error loss on log salaries: robust to the remaining odd salaries (daily rates, typos)
+    return SGDRegressor(loss="epsilon_insensitive", epsilon=0.0, alpha=1e-6, learning_rate="adaptive", eta0=0.05, random_state=42)
+
+
+def train_streaming(engine, passes=PASSES, chunk_size=CHUNK_SIZE, window_days=None):
+    """
+    Trains one SGDRegressor per target with partial_fit over the streamed jobs.
+
+    Returns:
+        dict: {'models': {target: SGDRegressor}, 'offsets': {target: mean log salary}, 'metrics': [...]}
+    """
+    where, params = _window(window_days)
+    models = {target: _regressor() for target in TARGETS}
+    offsets = {}
+    trained_rows = 0
+
+    for _ in range(passes):
+        for chunk in stream_jobs(engine, where, params, chunk_size):
+            train = chunk["job_id"] % HOLDOUT_MODULUS != 0
+            X = VECTORIZER.transform(chunk["text"])
+            for target in TARGETS:
+                rows = (train & _training_rows(chunk, target)).to_numpy()
+                if not rows.any():
+                    continue
+                y = np.log(chunk.loc[rows, target].astype(float).to_numpy())
+                # Targets are centred on the first chunk's mean, so SGD starts near the right scale
+                offsets.setdefault(target, float(y.mean()))
+                with timer("model_fit", model=f"streaming_{target}"):
+                    models[target].partial_fit(X[rows], y - offsets[target])
+                trained_rows += int(rows.sum())
+    gauge("training_rows", trained_rows // max(passes, 1))
+
+    # Holdout evaluation, streamed as well
+    metrics = {target: _Metrics() for target in TARGETS if target in offsets}
+    holdout_where = f"{where} {'AND' if where else 'WHERE'} j.job_id % {HOLDOUT_MODULUS} = 0"
+    for chunk in stream_jobs(engine, holdout_where, params, chunk_size):
+        X = VECTORIZER.transform(chunk["text"])
+        for target in metrics:
+            rows = _training_rows(chunk, target).to_numpy()
+            if rows.any():
+                y_pred = np.exp(models[target].predict(X[rows]) + offsets[target])
+                metrics[target].add(chunk.loc[rows, target].astype(float).to_numpy(), y_pred)
+
+    report = []
+    for target, accumulated in metrics.items():
+        result = accumulated.result()
+        if result:
+            report.append({"target": target, **result})
+            print(f"📉 MAE ({target}, streaming): £{result['MAE']:.2f} | RMSE: {result['RMSE']:.2f} | R²: {result['R2']:.3f}")
+    return {"models": {t: m for t, m in models.items() if t in offsets}, "offsets": offsets, "metrics": report}
+
+
+def predict_missing(engine, model, chunk_size=CHUNK_SIZE, window_days=None):
+    """
+    Predicts salary_min / salary_max where they are missing and writes predicted_salary_*.
+    Each chunk's predictions are written (and committed) on a second connection while the read
+    cursor stays open, so memory does not grow with the number of missing salaries. Predictions equal
+    to the stored ones are skipped, so updated_at only moves when a value changes.
+    """
+    where, params = _window(window_days)
+    missing = " OR ".join(f"j.{target} IS NULL" for target in model["models"])
+    if not missing:
+        return 0
+    where = f"{where} {'AND' if where else 'WHERE'} ({missing})"
+
+    if engine.dialect.name == "sqlite":
+        # The writes commit while the read cursor is still open, which SQLite only allows in WAL mode
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    updated = 0
+    for chunk in stream_jobs(engine, where, params, chunk_size):
+        X = VECTORIZER.transform(chunk["text"])
+        with engine.begin() as conn:
+            for target, regressor in model["models"].items():
+                rows = chunk[target].isna().to_numpy()
+                if not rows.any():
+                    continue
+                with timer("model_predict", model=f"streaming_{target}"):
+                    values = np.exp(regressor.predict(X[rows]) + model["offsets"][target])
+                previous = pd.to_numeric(chunk.loc[rows, f"previous_{target}"], errors="coerce").to_numpy(dtype=float)
+                changed = ~np.isclose(values, previous)
+                if not changed.any():
+                    continue
+                conn.execute(
+                    text(f"UPDATE jobs SET predicted_{target} = :value, updated_at = CURRENT_TIMESTAMP WHERE job_id = :job_id"),
+                    [{"job_id": int(j), "value": float(v)} for j, v in zip(chunk.loc[rows, "job_id"].to_numpy()[changed], values[changed])],
+                )
+                updated += int(changed.sum())
+    return updated
+
+
+def stream_and_update_salaries(model_dir="models", metrics_path="tmp_outputs/metrics_results.csv", window_days=None):
+    """
+    Streaming counterpart of predict_and_update_salaries: trains out of core, reports holdout
+    metrics to metrics_path and fills predicted_salary_min / predicted_salary_max.
+    """
+    db_url = os.getenv("DB_PARAMETERS")
+    if not db_url:
+        raise ValueError("❌ Environment variable DB_PARAMETERS is not set.")
+    engine = create_engine(db_url)
+
+    model = train_streaming(engine, window_days=window_days)
+    if not model["models"]:
+        print("⚠️ No training data for the streaming salary model")
+        return
+
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(model_dir, "streaming_salary_model.joblib"))
+    pd.DataFrame(model["metrics"]).to_csv(metrics_path, index=False)
+
+    updated = predict_missing(engine, model, window_days=window_days)
+    print(f"✅ Streaming prediction complete: {updated} salary value(s) changed.")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    stream_and_update_salaries()
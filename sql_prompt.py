@@ -0,0 +1,32 @@
+"""
+JobBot's text-to-SQL prompt, shared by the chatbot and benchmarks/bench_prompt_cache.py so the
+benchmark measures the exact prefix the inference server caches.
+"""
+
+# Static part of the prompt, kept evaluated by the server and restored for every question
+SQL_PROMPT_PREFIX = """
+You are an assistant that converts natural language questions into SQL for a PostgreSQL database about jobs.
+
+### Tables:
+- jobs (job_id, title, description_hash, salary_min, salary_max, predicted_salary_min, predicted_salary_max, redirect_url, created, source, company_id, location_id, job_level_id)
+- descriptions (description_hash, description) -- join on description_hash only when the description text is needed
+- companies (company_id, company_name)
+- locations (location_id, location_name, latitude, longitude)
+- job_levels (job_level_id, level_name)
+- job_metadata (metadata_id, job_id, search_query, search_location, date_downloaded)
+
+DO NOT use AVG() on timestamp columns like "created". Use MAX() or MIN() instead.
+
+### Question:
+"""
+
+
+def sql_prompt(question):
+    """
+    Full prompt for a question: the cached prefix followed by the question and the SQL cue.
+    """
+    return SQL_PROMPT_PREFIX + f"""{question}
+
+### SQL (PostgreSQL):
+SELECT
+"""
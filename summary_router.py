@@ -0,0 +1,83 @@
+import re
+
+# Levels produced by assing_job_level.assign_job_level
+JOB_LEVELS = ["Apprentice", "Graduate", "Junior", "Senior", "Mid-level", "Unknown"]
+
+SALARY_BY_LEVEL_SQL = """
+SELECT l.level_name,
+       s.n_jobs,
+       ROUND(s.sum_salary_min / NULLIF(s.n_salary_min, 0), 2) AS avg_salary_min,
+       ROUND(s.sum_salary_max / NULLIF(s.n_salary_max, 0), 2) AS avg_salary_max
+FROM summary_salary_by_level s
+JOIN job_levels l ON l.job_level_id = s.job_level_id
+{where}
+ORDER BY avg_salary_max DESC NULLS LAST;
+"""
+
+OVERALL_SALARY_SQL = """
+SELECT SUM(s.n_jobs) AS n_jobs,
+       ROUND(SUM(s.sum_salary_min) / NULLIF(SUM(s.n_salary_min), 0), 2) AS avg_salary_min,
+       ROUND(SUM(s.sum_salary_max) / NULLIF(SUM(s.n_salary_max), 0), 2) AS avg_salary_max
+FROM summary_salary_by_level s;
+"""
+
+JOBS_BY_LOCATION_SQL = """
+SELECT l.location_name, SUM(s.n_jobs) AS n_jobs
+FROM summary_jobs_by_location s
+JOIN locations l ON l.location_id = s.location_id
+GROUP BY l.location_name
+ORDER BY n_jobs DESC
+LIMIT {limit};
+"""
+
+POSTINGS_PER_DAY_SQL = """
+SELECT s.date_downloaded, s.n_jobs
+FROM summary_postings_by_day s
+ORDER BY s.date_downloaded DESC
+LIMIT {limit};
+"""
+
+TOTAL_JOBS_SQL = """
+SELECT SUM(s.n_jobs) AS n_jobs
+FROM summary_jobs_by_location s;
+"""
+
+
+def _limit(question, default=10, cap=100):
+    # Only "top 5" / "first 20" / "last 30" set the limit: other numbers (years, salaries) are not counts
+    match = re.search(r"\b(?:top|first|last)\s+(\d{1,3})\b", question)
+    return max(1, min(int(match.group(1)), cap)) if match else default
+
+
+def route_question(question):
+    """
+    Recognizes common aggregate questions that the summary tables can answer directly.
+
+    Returns:
+        str | None: SQL against the summary tables, or None if the question needs the LLM.
+    """
+    q = question.lower().strip()
+    mentions_salary = re.search(r"\b(salary|salaries|pay|wage)s?\b", q)
+    mentions_average = re.search(r"\b(average|avg|mean)\b", q)
+
+    if mentions_salary and mentions_average:
+        levels = [lvl for lvl in JOB_LEVELS if re.search(rf"\b{re.escape(lvl.lower())}\b", q)]
+        if levels:
+            names = ", ".join(f"'{lvl}'" for lvl in levels)
+            return SALARY_BY_LEVEL_SQL.format(where=f"WHERE l.level_name IN ({names})").strip()
+        if re.search(r"\b(level|levels|seniority)\b", q):
+            return SALARY_BY_LEVEL_SQL.format(where="").strip()
+        if not re.search(r"\b(in|at|for|from|with|where|company|title)\b", q):
+            return OVERALL_SALARY_SQL.strip()
+        return None
+
+    if re.search(r"\b(jobs|postings|count|how many)\b", q) and re.search(r"\b(per|by|each)\s+(location|city|town|place)s?\b|\btop\s+(\d+\s+)?locations\b", q):
+        return JOBS_BY_LOCATION_SQL.format(limit=_limit(q)).strip()
+
+    if re.search(r"\b(per|by|each|a)\s+day\b|\bdaily\b", q) and re.search(r"\b(jobs|postings|downloaded|posted)\b", q):
+        return POSTINGS_PER_DAY_SQL.format(limit=_limit(q, default=30, cap=366)).strip()
+
+    if re.fullmatch(r"(how many|total|count of|number of) (jobs|postings)( are there| in total| in the database)?\??", q):
+        return TOTAL_JOBS_SQL.strip()
+
+    return None
@@ -0,0 +1,81 @@
+from sqlalchemy import text
+
+# Each summary is an additive aggregate, so new rows can be folded in with an upsert
+# instead of recomputing the whole jobs table.
+SUMMARY_UPSERTS = {
+    "summary_salary_by_level": """
+        INSERT INTO summary_salary_by_level
+            (job_level_id, n_jobs, n_salary_min, sum_salary_min, n_salary_max, sum_salary_max)
+        SELECT j.job_level_id, COUNT(*),
+               COUNT(j.salary_min), COALESCE(SUM(j.salary_min), 0),
+               COUNT(j.salary_max), COALESCE(SUM(j.salary_max), 0)
+        FROM jobs j
+        WHERE j.job_level_id IS NOT NULL {job_filter}
+        GROUP BY j.job_level_id
+        ON CONFLICT (job_level_id) DO UPDATE SET
+            n_jobs = summary_salary_by_level.n_jobs + EXCLUDED.n_jobs,
+            n_salary_min = summary_salary_by_level.n_salary_min + EXCLUDED.n_salary_min,
+            sum_salary_min = summary_salary_by_level.sum_salary_min + EXCLUDED.sum_salary_min,
+            n_salary_max = summary_salary_by_level.n_salary_max + EXCLUDED.n_salary_max,
+            sum_salary_max = summary_salary_by_level.sum_salary_max + EXCLUDED.sum_salary_max
+    """,
+    "summary_jobs_by_location": """
+        INSERT INTO summary_jobs_by_location (location_id, n_jobs)
+        SELECT j.location_id, COUNT(*)
+        FROM jobs j
+        WHERE j.location_id IS NOT NULL {job_filter}
+        GROUP BY j.location_id
+        ON CONFLICT (location_id) DO UPDATE SET
+            n_jobs = summary_jobs_by_location.n_jobs + EXCLUDED.n_jobs
+    """,
+    "summary_postings_by_day": """
+        INSERT INTO summary_postings_by_day (date_downloaded, n_jobs)
+        SELECT m.date_downloaded, COUNT(DISTINCT m.job_id)
+        FROM job_metadata m
+        JOIN jobs j ON j.job_id = m.job_id
+        WHERE m.date_downloaded IS NOT NULL {job_filter}
+        GROUP BY m.date_downloaded
+        ON CONFLICT (date_downloaded) DO UPDATE SET
+            n_jobs = summary_postings_by_day.n_jobs + EXCLUDED.n_jobs
+    """,
+}
+
+
+def refresh_summaries(conn, job_ids):
+    """
+    Folds newly inserted jobs into the summary tables.
+
+    Parameters:
+        conn: Open SQLAlchemy connection (normally the one df_to_db is inserting with).
+        job_ids (list): job_id values inserted by the current run.
+    """
+    job_ids = [int(j) for j in job_ids]
+    if not job_ids:
+        return
+    if conn.dialect.name != "postgresql":
+        print("⚠️ Summary tables require PostgreSQL, skipping refresh.")
+        return
+
+    for table, sql in SUMMARY_UPSERTS.items():
+        conn.execute(text(sql.format(job_filter="AND j.job_id = ANY(:job_ids)")), {"job_ids": job_ids})
+    print(f"📊 Summary tables refreshed with {len(job_ids)} new job(s).")
+
+
+def rebuild_summaries(conn):
+    """
+    Recomputes every summary table from scratch (initial backfill or after manual edits to jobs).
+    """
+    for table, sql in SUMMARY_UPSERTS.items():
+        conn.execute(text(f"TRUNCATE {table}"))
+        conn.execute(text(sql.format(job_filter="")))
+    print("📊 Summary tables rebuilt from the full jobs table.")
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        rebuild_summaries(conn)
@@ -0,0 +1,275 @@
+"""
+Incremental term statistics behind the EDA keyword outputs.
+
+Counts are kept in a long, sparse table (only non-zero cells) at EDA/term_stats/counts.parquet:
+
+    kind | term | search_query | job_level | month | count | n_docs
+
+kind is 'word' (unigram), 'bigram' or 'skill' (curated phrases). Each nightly update tokenizes
+only jobs that were not counted before (tracked in EDA/term_stats/processed_jobs.parquet) in
+chunks with CountVectorizer and adds their counts to the store, so refreshing
+EDA/frequent_words_over_1.csv and EDA/keyword_mentions.csv no longer rescans all job text.
+
+Usage (from the repository root):
+    python term_stats.py rebuild EDA/jobs_with_levels.csv
+    python term_stats.py export
+"""
+import os
+import re
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from text_normalization import normalized_text
+
+STORE_DIR = "EDA/term_stats"
+COUNTS_FILE = "counts.parquet"
+PROCESSED_FILE = "processed_jobs.parquet"
+GROUP_COLUMNS = ["search_query", "job_level", "month"]
+CHUNK_SIZE = 5000
+
+# Curated skill / role phrases reported in EDA/keyword_mentions.csv
+SKILL_PHRASES = [
+    "data analysis", "data analyst", "data science", "senior", "artificial intelligence", "lead",
+    "data scientist", "data engineer", "python", "business analyst", "sql", "machine learning",
+    "data analytics", "trainee", "function", "graduate", "principal", "r", "gis", "power bi", "excel",
+    "azure", "business intelligence", "data quality", "junior", "forecasting", "agile", "data governance",
+    "data pipelines", "aws", "snowflake", "problem solving", "etl", "data warehouse", "senior data analyst",
+    "entry level", "databricks", "communication skills", "sql server", "devops", "data transformation",
+    "data architecture", "senior level", "data migration", "precision", "oracle", "classification", "gcp",
+    "tableau", "mysql", "looker", "data integration", "attention to detail", "data security",
+    "data visualization", "map", "powerbi", "pytorch", "apprentice", "self-motivated", "time series", "kpi",
+    "intern", "reduce", "tensorflow", "sas", "filter", "nlp", "statistical analysis", "data privacy",
+    "stakeholder management", "api", "linear regression", "a/b testing", "mid level", "scikit-learn",
+    "big data", "google cloud", "spatial data", "data cleansing", "docker", "kubernetes", "mongodb",
+    "natural language processing", "teamwork", "data structures", "power query", "gdpr", "postgresql",
+    "exploratory data analysis", "redshift", "time management", "data lake", "data storytelling", "dax",
+    "scrum", "deep learning", "spark", "data design", "model evaluation", "arcgis", "postgis", "bigquery",
+    "presentation skills", "junior data analyst", "flask", "cloud computing", "data breach",
+    "critical thinking", "numpy", "lean", "ci/cd", "data mining",
+]
+
+
+def _normalize(text):
+    # Treat "self-motivated", "a/b testing" and "ci/cd" as space separated tokens
+    return re.sub(r"[-/]", " ", text.lower())
+
+
+_SKILL_VOCAB = {_normalize(p): p for p in SKILL_PHRASES}
+
+VECTORIZERS = {
+    "word": lambda: CountVectorizer(stop_words="english", token_pattern=r"(?u)\b[a-z][a-z]+\b", preprocessor=_normalize),
+    "bigram": lambda: CountVectorizer(stop_words="english", token_pattern=r"(?u)\b[a-z][a-z]+\b", preprocessor=_normalize, ngram_range=(2, 2)),
+    "skill": lambda: CountVectorizer(vocabulary=list(_SKILL_VOCAB), token_pattern=r"(?u)\b\w+\b", preprocessor=_normalize, ngram_range=(1, 4)),
+}
+
+
+def _store_path(name, store_dir):
+    return os.path.join(store_dir, name)
+
+
+def load_counts(store_dir=STORE_DIR):
+    path = _store_path(COUNTS_FILE, store_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["kind", "term"] + GROUP_COLUMNS + ["count", "n_docs"])
+    return pd.read_parquet(path)
+
+
+def _job_keys(df):
+    # Prefer database ids; CSV extracts without job_id fall back to a hash of the content
+    if "job_id" in df:
+        return df["job_id"].astype("int64")
+    return pd.util.hash_pandas_object(df[["title", "description", "redirect_url"]].astype("string"), index=False).astype("int64")
+
+
+def _prepare(df):
+    out = pd.DataFrame({
+        "text": normalized_text(df),
+        "search_query": df.get("search_query", pd.Series("", index=df.index)).fillna("").astype(str),
+        "job_level": df.get("job_level", pd.Series("Unknown", index=df.index)).fillna("Unknown").astype(str),
+    })
+    dates = pd.to_datetime(df.get("date_downloaded"), errors="coerce", dayfirst=True, format="mixed", utc=True)
+    out["month"] = dates.dt.strftime("%Y-%m").fillna("unknown")
+    return out
+
+
+def _count_chunk(chunk):
+    """
+    Returns the long-format counts of one chunk of jobs for every kind of term.
+    """
+    groups = chunk[GROUP_COLUMNS].drop_duplicates().reset_index(drop=True)
+    group_idx = chunk[GROUP_COLUMNS].merge(groups.reset_index(), on=GROUP_COLUMNS, how="left")["index"].values
+    # One-hot (groups x docs) so a single sparse product sums the docs of every group
+    membership = sp.csr_matrix((np.ones(len(chunk)), (group_idx, np.arange(len(chunk)))), shape=(len(groups), len(chunk)))
+
+    frames = []
+    for kind, make_vectorizer in VECTORIZERS.items():
+        vectorizer = make_vectorizer()
+        try:
+            X = vectorizer.fit_transform(chunk["text"])
+        except ValueError:  # Empty vocabulary (e.g. only stop words)
+            continue
+        counts = (membership @ X).tocoo()
+        docs = (membership @ (X > 0).astype(np.int64)).tocoo()
+        terms = vectorizer.get_feature_names_out()
+        if kind == "skill":
+            terms = np.array([_SKILL_VOCAB[t] for t in terms])
+
+        frame = groups.iloc[counts.row].reset_index(drop=True)
+        frame.insert(0, "term", terms[counts.col])
+        frame.insert(0, "kind", kind)
+        frame["count"] = counts.data.astype("int64")
+        frame["n_docs"] = np.asarray(docs.tocsr()[counts.row, counts.col]).ravel().astype("int64")
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def _count_jobs(df, chunk_size=CHUNK_SIZE):
+    prepared = _prepare(df).reset_index(drop=True)
+    return [_count_chunk(prepared.iloc[start:start + chunk_size]) for start in range(0, len(prepared), chunk_size)]
+
+
+def _save_counts(frames, store_dir):
+    counts = (
+        pd.concat([f for f in frames if f is not None and not f.empty], ignore_index=True)
+        .groupby(["kind", "term"] + GROUP_COLUMNS, as_index=False, observed=True)[["count", "n_docs"]].sum()
+    )
+    counts = counts[counts["count"] > 0]
+    for col in ["kind", "term"] + GROUP_COLUMNS:
+        counts[col] = counts[col].astype("category")
+    counts.to_parquet(_store_path(COUNTS_FILE, store_dir), index=False)
+
+
+def update_term_stats(df, store_dir=STORE_DIR, chunk_size=CHUNK_SIZE):
+    """
+    Adds the term counts of jobs not yet processed to the store.
+
+    Parameters:
+        df (pd.DataFrame): Jobs with 'title', 'description', 'search_query', 'job_level',
+            'date_downloaded' and ideally 'job_id' (e.g. the output of df_to_db).
+
+    Returns:
+        int: Number of jobs counted.
+    """
+    if df is None or df.empty:
+        return 0
+
+    os.makedirs(store_dir, exist_ok=True)
+    processed_path = _store_path(PROCESSED_FILE, store_dir)
+    processed = pd.read_parquet(processed_path)["job_key"] if os.path.exists(processed_path) else pd.Series(dtype="int64")
+
+    keys = _job_keys(df)
+    is_new = ~keys.isin(processed) & ~keys.duplicated()
+    new_df = df[is_new.values]
+    if new_df.empty:
+        print("✅ Term statistics already up to date.")
+        return 0
+
+    _save_counts([load_counts(store_dir)] + _count_jobs(new_df, chunk_size), store_dir)
+
+    pd.DataFrame({"job_key": pd.concat([processed, keys[is_new.values]], ignore_index=True)}).to_parquet(processed_path, index=False)
+    print(f"📚 Term statistics updated with {len(new_df)} job(s).")
+    return len(new_df)
+
+
+def remove_term_stats(df, store_dir=STORE_DIR, chunk_size=CHUNK_SIZE):
+    """
+    Subtracts the term counts of jobs that left the database (e.g. archived partitions). Only jobs
+    counted before are subtracted, so running it twice for the same jobs is harmless.
+
+    Parameters:
+        df (pd.DataFrame): The removed jobs, with the columns update_term_stats takes.
+
+    Returns:
+        int: Number of jobs subtracted.
+    """
+    processed_path = _store_path(PROCESSED_FILE, store_dir)
+    if df is None or df.empty or not os.path.exists(processed_path):
+        return 0
+
+    processed = pd.read_parquet(processed_path)["job_key"]
+    keys = _job_keys(df)
+    counted = keys.isin(processed) & ~keys.duplicated()
+    if not counted.any():
+        return 0
+
+    removed = [f.assign(count=-f["count"], n_docs=-f["n_docs"]) for f in _count_jobs(df[counted.values], chunk_size) if f is not None]
+    _save_counts([load_counts(store_dir)] + removed, store_dir)
+    pd.DataFrame({"job_key": processed[~processed.isin(keys)]}).to_parquet(processed_path, index=False)
+    print(f"📚 Term statistics: {int(counted.sum())} archived job(s) subtracted.")
+    return int(counted.sum())
+
+
+def query_terms(kind="word", search_query=None, job_level=None, month=None, store_dir=STORE_DIR, counts=None):
+    """
+    Returns term totals for one kind, optionally sliced by search query, job level and/or month
+    (each filter accepts a single value or a list).
+
+    Returns:
+        pd.DataFrame: term, count, n_docs sorted by count.
+    """
+    counts = load_counts(store_dir) if counts is None else counts
+    mask = counts["kind"] == kind
+    for col, value in (("search_query", search_query), ("job_level", job_level), ("month", month)):
+        if value is not None:
+            mask &= counts[col].isin(value if isinstance(value, (list, tuple, set)) else [value])
+
+    return (
+        counts[mask]
+        .groupby("term", as_index=False, observed=True)[["count", "n_docs"]].sum()
+        .sort_values(["count", "term"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+
+
+def export_eda_csvs(store_dir=STORE_DIR, output_dir="EDA", min_count=2):
+    """
+    Regenerates EDA/frequent_words_over_1.csv and EDA/keyword_mentions.csv from the store.
+    """
+    counts = load_counts(store_dir)
+    words = query_terms("word", counts=counts)
+    words = words[words["count"] >= min_count].rename(columns={"term": "word"})[["word", "count"]]
+    words.to_csv(os.path.join(output_dir, "frequent_words_over_1.csv"), index=False)
+
+    keywords = query_terms("skill", counts=counts).rename(columns={"term": "keyword"})[["keyword", "count"]]
+    keywords.to_csv(os.path.join(output_dir, "keyword_mentions.csv"), index=False)
+    print(f"✅ Exported {len(words)} words and {len(keywords)} keywords to {output_dir}/")
+
+
+def rebuild_term_stats(df, store_dir=STORE_DIR):
+    """
+    Drops the store and recounts everything in df (initial backfill).
+    """
+    for name in (COUNTS_FILE, PROCESSED_FILE):
+        path = _store_path(name, store_dir)
+        if os.path.exists(path):
+            os.remove(path)
+    return update_term_stats(df, store_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    if command == "rebuild":
+        if len(sys.argv) > 2:
+            source_df = pd.read_csv(sys.argv[2])
+        else:
+            from dotenv import load_dotenv
+            from sqlalchemy import create_engine
+
+            load_dotenv()
+            source_df = pd.read_sql("""
+                SELECT j.job_id, j.title, d.description, m.search_query, l.level_name AS job_level, m.date_downloaded
+                FROM jobs j
+                LEFT JOIN descriptions d ON d.description_hash = j.description_hash
+                LEFT JOIN job_metadata m ON m.job_id = j.job_id
+                LEFT JOIN job_levels l ON l.job_level_id = j.job_level_id
+            """, create_engine(os.getenv("DB_PARAMETERS")))
+        rebuild_term_stats(source_df)
+        export_eda_csvs()
+    elif command == "export":
+        export_eda_csvs()
+    else:
+        print("Usage: python term_stats.py [rebuild [csv] | export]")
@@ -0,0 +1,99 @@
+"""
+Normalized job text, computed once at ingest.
+
+The normalize stage of rule_them_all adds 'normalized_title' and 'normalized_description' to the
+fetched jobs: HTML entities unescaped (&amp; -> &), tags dropped, the API truncation marker
+("..." / "…" at the end of Reed and Adzuna snippets) removed, whitespace collapsed, lower case.
+Dedup, the barista filter, job levels and term statistics read these columns. The loader stores
+them (jobs.normalized_title, descriptions.normalized_description) for the salary model.
+"""
+import re
+import html
+import pandas as pd
+
+TAG_RE = re.compile(r"<[^>]+>")
+TRUNCATION_RE = re.compile(r"\s*(?:\.\.\.|…)\s*$")
+
+
+def _normalize(value):
+    value = TAG_RE.sub(" ", html.unescape(value))
+    value = TRUNCATION_RE.sub("", value)
+    return " ".join(value.split()).lower()
+
+
+def normalize_text(values):
+    """
+    Normalizes a Series of strings (missing values become ""). Each distinct string is cleaned once,
+    so repeated boilerplate descriptions cost a single pass.
+    """
+    values = pd.Series(values, dtype="object").fillna("").astype(str)
+    cleaned = {value: _normalize(value) for value in values.unique()}
+    return values.map(cleaned)
+
+
+def add_normalized_text(df):
+    """
+    Adds 'normalized_title' and 'normalized_description' to a DataFrame of jobs.
+
+    Parameters:
+        df (pd.DataFrame | list): Jobs with 'title' and 'description' (a list of DataFrames is concatenated).
+
+    Returns:
+        pd.DataFrame
+    """
+    if isinstance(df, list):
+        frames = [d for d in df if not d.empty]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["title", "description"])
+    df = df.copy()
+    df["normalized_title"] = normalize_text(df["title"])
+    df["normalized_description"] = normalize_text(df["description"])
+    return df
+
+
+def normalized_text(df):
+    """
+    Title and description as one normalized string per job; normalizes on the fly only
+    for frames that did not go through add_normalized_text.
+    """
+    if "normalized_title" in df and "normalized_description" in df:
+        return df["normalized_title"].fillna("") + " " + df["normalized_description"].fillna("")
+    return normalize_text(df["title"]) + " " + normalize_text(df["description"])
+
+
+def backfill_normalized_text(conn, batch_size=5000):
+    """
+    Fills jobs.normalized_title and descriptions.normalized_description where missing
+    (rows loaded before the columns existed).
+    """
+    from sqlalchemy import text
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS normalized_title TEXT"))
+        conn.execute(text("ALTER TABLE descriptions ADD COLUMN IF NOT EXISTS normalized_description TEXT"))
+
+    total = 0
+    for table, key, source, target in (
+        ("jobs", "job_id", "title", "normalized_title"),
+        ("descriptions", "description_hash", "description", "normalized_description"),
+    ):
+        while True:
+            rows = pd.read_sql(text(f"SELECT {key}, {source} FROM {table} WHERE {target} IS NULL LIMIT {batch_size}"), conn)
+            if rows.empty:
+                break
+            rows[target] = normalize_text(rows[source])
+            conn.execute(
+                text(f"UPDATE {table} SET {target} = :{target} WHERE {key} = :{key}"),
+                rows[[key, target]].astype(object).to_dict("records"),
+            )
+            total += len(rows)
+    print(f"🧹 Normalized text backfilled for {total} row(s).")
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    with create_engine(os.getenv("DB_PARAMETERS")).begin() as conn:
+        backfill_normalized_text(conn)